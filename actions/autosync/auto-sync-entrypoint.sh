@@ -34,6 +34,14 @@ if [[ ${INPUT_SKIP_REGENERATE} == true ]]; then
     command+=" --skip-regenerate"
 fi
 
+if [[ ${INPUT_FORCE} == true ]]; then
+    command+=" --force"
+fi
+
+if [[ -n ${INPUT_BASE_REF} ]]; then
+    command+=" --base-ref=\"${INPUT_BASE_REF}\""
+fi
+
 if [[ ${INPUT_DRY_RUN} == true ]]; then
     command+=" --dry-run"
 fi
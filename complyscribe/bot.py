@@ -5,6 +5,7 @@
 """This module implements functions for the complyscribe bot."""
 
 import logging
+import pathlib
 from typing import List, Optional
 
 from git import GitCommandError
@@ -145,6 +146,26 @@ class ComplyScribe:
             except TaskException as e:
                 raise RepoException(f"Bot pre-tasks failed: {e}")
 
+    def _get_changed_files(self, gitwd: Repo, base_ref: str) -> List[pathlib.Path]:
+        """Get the files changed on the branch since it diverged from a base ref."""
+        try:
+            output = gitwd.git.diff("--name-only", "--no-renames", f"{base_ref}...HEAD")
+        except GitCommandError as e:
+            raise RepoException(f"Git diff against {base_ref} failed: {e}") from e
+        return [
+            pathlib.Path(str(gitwd.working_tree_dir), path)
+            for path in output.splitlines()
+            if path
+        ]
+
+    def _scope_tasks(self, gitwd: Repo, tasks: List[TaskBase], base_ref: str) -> None:
+        """Limit the models processed by tasks to those changed since a base ref."""
+        changed_files = self._get_changed_files(gitwd, base_ref)
+        logger.info(f"{len(changed_files)} files changed since {base_ref}")
+        for task in tasks:
+            if task.filter is not None:
+                task.filter.set_changed_files(changed_files)
+
     def _get_committed_files(self, commit: Commit) -> List[str]:
         """Get the list of committed files in the commit."""
         changes: List[str] = []
@@ -174,6 +195,7 @@ class ComplyScribe:
         commit_message: str = "Automatic updates from bot",
         pull_request_title: str = "Automatic updates from bot",
         dry_run: bool = False,
+        base_ref: str = "",
     ) -> BotResults:
         """
         Runs complyscribe logic and returns commit and pull request information.
@@ -185,6 +207,9 @@ class ComplyScribe:
                 commit_message: Optional commit message for local commit
                 pull_request_title: Optional customized pull request title
                 dry_run: Only complete pre-tasks and return changes without pushing
+                base_ref: Optional git ref to only process models whose markdown,
+                JSON or dependencies changed on the branch since it diverged from
+                the ref
 
         Returns:
             BotResults with changes, commit_sha, and pull request number.
@@ -200,6 +225,8 @@ class ComplyScribe:
 
         # Execute bot pre-tasks before committing repository updates
         if pre_tasks:
+            if base_ref:
+                self._scope_tasks(repo, pre_tasks, base_ref)
             self._run_tasks(pre_tasks)
 
         # Check if there are any unstaged files
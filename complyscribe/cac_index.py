@@ -0,0 +1,760 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Persistent indexes over Compliance as Code content."""
+
+import hashlib
+import logging
+import os
+import pathlib
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ssg.variables import get_variable_files
+from ssg.yaml import open_and_expand
+
+from complyscribe.utils import (
+    ProductContext,
+    SharedInstances,
+    fingerprint_dir,
+    get_cache_dir,
+    hash_str,
+    load_controls_manager,
+    read_json_cache,
+    write_json_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CAC_INDEX_DIR = "cac"
+RULE_FILE = "rule.yml"
+# Rule subdirectories with check and remediation content that can refer to variables
+RULE_CONTENT_DIRS = (
+    "oval",
+    "sce",
+    "bash",
+    "ansible",
+    "anaconda",
+    "puppet",
+    "ignition",
+    "kubernetes",
+    "blueprint",
+    "kickstart",
+    "bootc",
+)
+MACROS_DIR = os.path.join("shared", "macros")
+VARIABLE_FILE_SUFFIX = ".var"
+POLICY_FILE_SUFFIXES = (".yml", ".yaml")
+POLICY_ID_PATTERN = re.compile(r"^id:\s*(?P<id>[^#\s]+)")
+
+
+class RuleDirIndex(SharedInstances):
+    """
+    Index of rule ids to rule directories under a benchmark root.
+
+    Notes: Every visited directory is stored with its mtime and inode. A directory
+    is only listed again when that fingerprint changes, because adding, removing or
+    renaming an entry always updates the mtime of its parent directory. The index is
+    persisted in the complyscribe cache directory and one instance per benchmark
+    root is shared within the process through `for_root`.
+    """
+
+    VERSION = 2
+
+    def __init__(
+        self, benchmark_root: str, cache_dir: Optional[pathlib.Path] = None
+    ) -> None:
+        """
+        Initialize the index.
+
+        Args:
+            benchmark_root: Directory to search for rule directories
+            cache_dir: Optional directory for the index file. Defaults to the
+            complyscribe cache directory.
+        """
+        self.benchmark_root = os.path.abspath(benchmark_root)
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.cache_file = cache_dir.joinpath(
+            CAC_INDEX_DIR, f"rule-dirs-{hash_str(self.benchmark_root)[:16]}.json"
+        )
+        # Relative directory path ->
+        # [mtime_ns, inode, is_rule_dir, sorted subdirs, symlinked subdirs]
+        self._dirs: Dict[str, List[Any]] = dict()
+        self._rule_dirs: Dict[str, str] = dict()
+        self.listed_dirs: int = 0
+        self.refresh_seconds: float = 0.0
+
+    @classmethod
+    def for_root(cls, benchmark_root: str) -> "RuleDirIndex":
+        """
+        Get the shared, up to date index for a benchmark root.
+
+        Notes: The index is loaded from disk and refreshed the first time a root
+        is requested in the process. Call `refresh` to pick up later changes.
+        """
+        key = os.path.abspath(benchmark_root)
+        return cls._get_shared(key, key)
+
+    def _init_shared(self) -> None:
+        """Load and refresh the index before it is shared."""
+        self.load()
+        self.refresh()
+
+    @property
+    def rule_dirs(self) -> Dict[str, str]:
+        """Get the rule id to rule directory mapping."""
+        return self._rule_dirs
+
+    def rule_ids(self) -> List[str]:
+        """Get all rule ids in walk order."""
+        return list(self._rule_dirs.keys())
+
+    def load(self) -> None:
+        """Load the persisted index if it matches this benchmark root."""
+        data = read_json_cache(self.cache_file)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == self.VERSION
+            and data.get("root") == self.benchmark_root
+        ):
+            self._dirs = data.get("dirs", {})
+
+    def save(self) -> None:
+        """Persist the index."""
+        write_json_cache(
+            self.cache_file,
+            {"version": self.VERSION, "root": self.benchmark_root, "dirs": self._dirs},
+        )
+
+    def refresh(self) -> None:
+        """
+        Bring the index up to date with the file system and persist any changes.
+
+        Notes: Directories are visited like os.walk in ssg.rules.find_rule_dirs:
+        top-down in sorted order, finding the rule directories among the
+        subdirectories of each visited directory. Symlinked directories are
+        checked for a rule file but not descended into. Rule ids found more than
+        once resolve to the last directory found, as with find_rule_dirs.
+        """
+        start = time.perf_counter()
+        dirs: Dict[str, List[Any]] = dict()
+        rule_dirs: Dict[str, str] = dict()
+        self.listed_dirs = 0
+
+        stack: List[str] = [""]
+        while stack:
+            rel_path = stack.pop()
+            entry = self._get_entry(rel_path, dirs)
+            if entry is None:
+                continue
+            subdirs, links = entry[3], entry[4]
+            for name in subdirs:
+                sub_path = os.path.join(rel_path, name)
+                sub_entry = self._get_entry(sub_path, dirs)
+                if sub_entry is not None and sub_entry[2]:
+                    rule_dirs[name] = os.path.join(self.benchmark_root, sub_path)
+            stack.extend(
+                os.path.join(rel_path, d) for d in reversed(subdirs) if d not in links
+            )
+
+        changed = self.listed_dirs > 0 or dirs.keys() != self._dirs.keys()
+        self._dirs = dirs
+        self._rule_dirs = rule_dirs
+        self.refresh_seconds = time.perf_counter() - start
+        if changed:
+            self.save()
+        logger.log(
+            logging.INFO if self.listed_dirs else logging.DEBUG,
+            f"Rule directory index for {self.benchmark_root} refreshed in "
+            f"{self.refresh_seconds:.3f}s, {self.listed_dirs} of {len(dirs)} "
+            "directories listed",
+        )
+
+    def _get_entry(
+        self, rel_path: str, dirs: Dict[str, List[Any]]
+    ) -> Optional[List[Any]]:
+        """Get the entry of a directory, listing it only when it changed."""
+        if rel_path in dirs:
+            return dirs[rel_path]
+        dir_path = (
+            os.path.join(self.benchmark_root, rel_path)
+            if rel_path
+            else self.benchmark_root
+        )
+        try:
+            stat = os.stat(dir_path)
+        except OSError:
+            return None
+        entry = self._dirs.get(rel_path)
+        if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_ino]:
+            is_rule_dir, subdirs, links = self._scan(dir_path)
+            entry = [stat.st_mtime_ns, stat.st_ino, is_rule_dir, subdirs, links]
+            self.listed_dirs += 1
+        dirs[rel_path] = entry
+        return entry
+
+    @staticmethod
+    def _scan(dir_path: str) -> Tuple[bool, List[str], List[str]]:
+        """
+        List a directory.
+
+        Returns:
+            Whether it is a rule directory, its sorted subdirectories including
+            symlinked ones, and the symlinked subdirectories.
+        """
+        is_rule_dir = False
+        subdirs: List[str] = list()
+        links: List[str] = list()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.name == RULE_FILE:
+                        is_rule_dir = True
+                    elif entry.is_dir():
+                        subdirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.append(entry.name)
+        except OSError as e:
+            logger.debug(f"Failed to list {dir_path}: {e}")
+        return is_rule_dir, sorted(subdirs), sorted(links)
+
+
+def hash_macro_files(cac_content_root: str) -> str:
+    """
+    Hash the Jinja macro files used to expand CaC content.
+
+    Notes: ssg loads every *.jinja file under shared/macros of the content root
+    before expanding a rule, so any change in them can change an expanded rule.
+    """
+    digest = hashlib.sha256()
+    macros_dir = pathlib.Path(cac_content_root, MACROS_DIR)
+    for macro_file in sorted(macros_dir.glob("*.jinja")):
+        digest.update(macro_file.name.encode("utf-8"))
+        digest.update(hashlib.sha256(macro_file.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+class ExpandedRuleCache(SharedInstances):
+    """
+    Content addressed cache of expanded rule data.
+
+    Notes: Entries are keyed by the caller, from the hashes of everything the
+    expansion depends on, so they never need to be invalidated. The store is a
+    single JSON file in the complyscribe cache directory. Every entry records when
+    it was last used and the least recently used entries are evicted on `save`
+    once there are more than `max_entries`. Hits only make the cache be saved
+    again when the recorded use is older than `USE_INTERVAL` seconds, so runs that
+    only hit the cache do not rewrite it. One instance per cache directory is
+    shared within the process through `for_dir`.
+    """
+
+    VERSION = 2
+    DEFAULT_MAX_ENTRIES = 50000
+    USE_INTERVAL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        cache_dir: Optional[pathlib.Path] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Optional directory for the cache file. Defaults to the
+            complyscribe cache directory.
+            max_entries: Number of entries kept when the cache is saved
+        """
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.cache_file = cache_dir.joinpath(CAC_INDEX_DIR, "expanded-rules.json")
+        self.max_entries = max_entries
+        # Key -> [last used timestamp, expanded rule data]
+        self._entries: Dict[str, List[Any]] = dict()
+        self._dirty = False
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def for_dir(cls, cache_dir: Optional[pathlib.Path] = None) -> "ExpandedRuleCache":
+        """Get the shared, loaded cache for a cache directory."""
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        return cls._get_shared(os.path.abspath(cache_dir), cache_dir)
+
+    def _init_shared(self) -> None:
+        """Load the cache before it is shared."""
+        self.load()
+
+    def __len__(self) -> int:
+        """Get the number of entries."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the expanded rule data stored for a key and mark it as used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - entry[0] >= self.USE_INTERVAL:
+            self._dirty = True
+        entry[0] = now
+        return entry[1]
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        """Store expanded rule data for a key."""
+        self._entries[key] = [time.time(), data]
+        self._dirty = True
+
+    def load(self) -> None:
+        """Load the persisted cache."""
+        data = read_json_cache(self.cache_file)
+        if isinstance(data, dict) and data.get("version") == self.VERSION:
+            self._entries = data.get("entries", {})
+
+    def save(self) -> None:
+        """Evict the least recently used entries and persist the cache if it changed."""
+        if not self._dirty:
+            return
+        if len(self._entries) > self.max_entries:
+            by_last_use = sorted(self._entries.items(), key=lambda item: item[1][0])
+            self._entries = dict(by_last_use[-self.max_entries :])  # noqa: E203
+        write_json_cache(
+            self.cache_file, {"version": self.VERSION, "entries": self._entries}
+        )
+        self._dirty = False
+        logger.debug(
+            f"Expanded rule cache saved with {len(self._entries)} entries, "
+            f"{self.hits} hits and {self.misses} misses"
+        )
+
+
+class VariableIndex(SharedInstances):
+    """
+    Index of CaC variables by id, loaded once per content root.
+
+    Notes: The ssg.variables helpers read every variable file on each call, so
+    looking up variables for many rules through them is quadratic. The index reads
+    each file once and one instance per content root is shared within the process
+    through `for_root`.
+    """
+
+    def __init__(self, cac_content_root: str) -> None:
+        """Initialize the index."""
+        self.cac_content_root = cac_content_root
+        self._variables: Dict[str, Dict[str, Any]] = dict()
+        self._files: Dict[str, str] = dict()
+
+    @classmethod
+    def for_root(cls, cac_content_root: str) -> "VariableIndex":
+        """Get the shared, loaded index for a CaC content root."""
+        key = os.path.abspath(cac_content_root)
+        return cls._get_shared(key, str(cac_content_root))
+
+    def _init_shared(self) -> None:
+        """Load the index before it is shared."""
+        self.load()
+
+    def load(self) -> None:
+        """Read all variable files of the content root."""
+        start = time.perf_counter()
+        self._variables = dict()
+        self._files = dict()
+        for var_file in get_variable_files(self.cac_content_root):
+            var_id = os.path.basename(var_file).split(VARIABLE_FILE_SUFFIX)[0]
+            self._variables[var_id] = open_and_expand(var_file)
+            self._files[var_id] = var_file
+        logger.debug(
+            f"Loaded {len(self._variables)} variables from {self.cac_content_root} "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+
+    def variable_ids(self) -> Set[str]:
+        """Get the ids of all variables."""
+        return set(self._variables.keys())
+
+    def get_description(self, var_id: str) -> str:
+        """Get the description of a variable."""
+        return self._variables.get(var_id, {}).get("description", "")
+
+    def get_options(self, var_id: str) -> Dict[str, Any]:
+        """Get the options of a variable."""
+        return self._variables.get(var_id, {}).get("options", {})
+
+    def get_file(self, var_id: str) -> Optional[str]:
+        """Get the path of the file defining a variable."""
+        return self._files.get(var_id)
+
+    def add_option(self, var_id: str, option: str) -> None:
+        """Record an option added to the file of a variable."""
+        variable = self._variables.get(var_id)
+        if variable is not None:
+            variable.setdefault("options", {})[option] = option
+
+
+def read_policy_id(policy_file: str) -> Optional[str]:
+    """
+    Read the id of a CaC policy without loading the policy.
+
+    Notes: Only the top-level `id:` key is read, so ids built by Jinja
+    expressions are not found and have to be looked up by loading the policy.
+    """
+    try:
+        with open(policy_file, "r", encoding="utf-8") as f:
+            for line in f:
+                match = POLICY_ID_PATTERN.match(line)
+                if match:
+                    policy_id = match.group("id").strip("'\"")
+                    return None if "{{" in policy_id else policy_id
+    except (OSError, UnicodeDecodeError) as e:
+        logger.debug(f"Failed to read the policy id of {policy_file}: {e}")
+    return None
+
+
+class PolicyIndex(SharedInstances):
+    """
+    Index of CaC policy ids to policy files under a controls directory.
+
+    Notes: Every file is stored with its mtime, size and the id read by
+    `read_policy_id`. A lookup trusts an indexed file as long as its fingerprint
+    is unchanged and only otherwise stats all files, reading the ids of new and
+    changed ones. The index is persisted in the complyscribe cache directory and
+    one instance per controls directory is shared within the process through
+    `for_dir`.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, controls_dir: str, cache_dir: Optional[pathlib.Path] = None
+    ) -> None:
+        """
+        Initialize the index.
+
+        Args:
+            controls_dir: Directory to search for policy files
+            cache_dir: Optional directory for the index file. Defaults to the
+            complyscribe cache directory.
+        """
+        self.controls_dir = os.path.abspath(controls_dir)
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.cache_file = cache_dir.joinpath(
+            CAC_INDEX_DIR, f"policy-files-{hash_str(self.controls_dir)[:16]}.json"
+        )
+        # Relative file path -> [mtime_ns, size, policy id]
+        self._files: Dict[str, List[Any]] = dict()
+        self.read_files: int = 0
+
+    @classmethod
+    def for_dir(cls, controls_dir: str) -> "PolicyIndex":
+        """Get the shared, loaded index for a controls directory."""
+        key = os.path.abspath(controls_dir)
+        return cls._get_shared(key, key)
+
+    def _init_shared(self) -> None:
+        """Load the index before it is shared."""
+        self.load()
+
+    def load(self) -> None:
+        """Load the persisted index if it matches this controls directory."""
+        data = read_json_cache(self.cache_file)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == self.VERSION
+            and data.get("root") == self.controls_dir
+        ):
+            self._files = data.get("files", {})
+
+    def save(self) -> None:
+        """Persist the index."""
+        write_json_cache(
+            self.cache_file,
+            {"version": self.VERSION, "root": self.controls_dir, "files": self._files},
+        )
+
+    def find(self, policy_id: str) -> Optional[str]:
+        """
+        Find the file of a policy.
+
+        Returns:
+            The path of the first file, in sorted order, declaring the policy id
+            or None if no file does.
+        """
+        policy_file = self._find_indexed(policy_id)
+        if policy_file is None:
+            self.refresh()
+            policy_file = self._find_indexed(policy_id)
+        return policy_file
+
+    def _find_indexed(self, policy_id: str) -> Optional[str]:
+        """Find an indexed policy file that has not changed since it was read."""
+        for rel_path in sorted(self._files):
+            entry = self._files[rel_path]
+            if entry[2] != policy_id:
+                continue
+            path = os.path.join(self.controls_dir, rel_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if entry[:2] != [stat.st_mtime_ns, stat.st_size]:
+                return None
+            return path
+        return None
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the file system and persist any changes."""
+        start = time.perf_counter()
+        files: Dict[str, List[Any]] = dict()
+        self.read_files = 0
+        for dir_path, dir_names, file_names in os.walk(self.controls_dir):
+            dir_names.sort()
+            for name in file_names:
+                if not name.lower().endswith(POLICY_FILE_SUFFIXES):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(path, self.controls_dir)
+                entry = self._files.get(rel_path)
+                if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_size]:
+                    entry = [stat.st_mtime_ns, stat.st_size, read_policy_id(path)]
+                    self.read_files += 1
+                files[rel_path] = entry
+
+        changed = self.read_files > 0 or files.keys() != self._files.keys()
+        self._files = files
+        if changed:
+            self.save()
+        logger.debug(
+            f"Policy index for {self.controls_dir} refreshed in "
+            f"{time.perf_counter() - start:.3f}s, {self.read_files} of {len(files)} "
+            "files read"
+        )
+
+
+class ContentReverseIndex(SharedInstances):
+    """
+    Index of the controls and profiles of a product that use a rule or variable.
+
+    Notes: The index is built from the loaded controls manager and the resolved
+    profiles of the product, so ids only match exactly. It is persisted in the
+    complyscribe cache directory with a fingerprint of the control files, the
+    profile files and the product.yml, and rebuilt when the fingerprint changes.
+    One instance per product is shared within the process through `for_product`,
+    `for_products` fingerprints the control files shared by all products once.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        cac_content_root: str,
+        product: str,
+        cache_dir: Optional[pathlib.Path] = None,
+        controls_fingerprint: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the index.
+
+        Args:
+            cac_content_root: Root of the CaC content project
+            product: Product whose controls and profiles are indexed
+            cache_dir: Optional directory for the index file. Defaults to the
+            complyscribe cache directory.
+            controls_fingerprint: Optional fingerprint of the control files, used
+            by the first refresh of a shared instance
+        """
+        self.cac_content_root = os.path.abspath(cac_content_root)
+        self.product = product
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.cache_file = cache_dir.joinpath(
+            CAC_INDEX_DIR,
+            f"reverse-{product}-{hash_str(self.cac_content_root)[:16]}.json",
+        )
+        self.fingerprint: str = ""
+        # Rule id -> [policy id, control id] pairs
+        self._rule_controls: Dict[str, List[List[str]]] = dict()
+        # Rule or variable id -> profile ids
+        self._rule_profiles: Dict[str, List[str]] = dict()
+        self._variable_profiles: Dict[str, List[str]] = dict()
+        self.built: bool = False
+        self._controls_fingerprint = controls_fingerprint
+
+    @classmethod
+    def for_product(
+        cls,
+        cac_content_root: str,
+        product: str,
+        controls_fingerprint: Optional[str] = None,
+    ) -> "ContentReverseIndex":
+        """
+        Get the shared, up to date index for a product.
+
+        Notes: The index is loaded from disk and refreshed the first time a
+        product is requested in the process. Call `refresh` to pick up later
+        changes.
+        """
+        key = (os.path.abspath(cac_content_root), product)
+        return cls._get_shared(
+            key, cac_content_root, product, None, controls_fingerprint
+        )
+
+    @classmethod
+    def for_products(
+        cls, cac_content_root: str, products: List[str]
+    ) -> Dict[str, "ContentReverseIndex"]:
+        """
+        Get the shared, up to date indexes for a set of products.
+
+        Notes: The control files are shared by all products, so they are
+        fingerprinted once for all indexes refreshed here.
+        """
+        controls_fingerprint = cls.get_controls_fingerprint(cac_content_root)
+        return {
+            product: cls.for_product(cac_content_root, product, controls_fingerprint)
+            for product in products
+        }
+
+    @staticmethod
+    def get_controls_fingerprint(cac_content_root: str) -> str:
+        """Hash the state of the control files of the content."""
+        return fingerprint_dir(
+            os.path.join(os.path.abspath(cac_content_root), "controls")
+        )
+
+    def _init_shared(self) -> None:
+        """Load and refresh the index before it is shared."""
+        self.load()
+        self.refresh(self._controls_fingerprint)
+        self._controls_fingerprint = None
+
+    def load(self) -> None:
+        """Load the persisted index if it matches this content root and product."""
+        data = read_json_cache(self.cache_file)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == self.VERSION
+            and data.get("root") == self.cac_content_root
+            and data.get("product") == self.product
+        ):
+            self.fingerprint = data.get("fingerprint", "")
+            self._rule_controls = data.get("rule_controls", {})
+            self._rule_profiles = data.get("rule_profiles", {})
+            self._variable_profiles = data.get("variable_profiles", {})
+
+    def save(self) -> None:
+        """Persist the index."""
+        write_json_cache(
+            self.cache_file,
+            {
+                "version": self.VERSION,
+                "root": self.cac_content_root,
+                "product": self.product,
+                "fingerprint": self.fingerprint,
+                "rule_controls": self._rule_controls,
+                "rule_profiles": self._rule_profiles,
+                "variable_profiles": self._variable_profiles,
+            },
+        )
+
+    def get_fingerprint(self, controls_fingerprint: Optional[str] = None) -> str:
+        """
+        Hash the state of the files the index is built from.
+
+        Args:
+            controls_fingerprint: Optional fingerprint of the control files from
+            `get_controls_fingerprint`, computed when not given
+        """
+        if controls_fingerprint is None:
+            controls_fingerprint = self.get_controls_fingerprint(self.cac_content_root)
+        product_dir = os.path.join(self.cac_content_root, "products", self.product)
+        product_yml = os.path.join(product_dir, "product.yml")
+        try:
+            stat = os.stat(product_yml)
+            product_yml_state = f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            product_yml_state = ""
+        return hash_str(
+            ":".join(
+                [
+                    controls_fingerprint,
+                    fingerprint_dir(os.path.join(product_dir, "profiles")),
+                    product_yml_state,
+                ]
+            )
+        )
+
+    def refresh(self, controls_fingerprint: Optional[str] = None) -> None:
+        """
+        Rebuild and persist the index if the files it is built from changed.
+
+        Args:
+            controls_fingerprint: Optional fingerprint of the control files, see
+            `get_fingerprint`
+        """
+        fingerprint = self.get_fingerprint(controls_fingerprint)
+        self.built = False
+        if fingerprint == self.fingerprint:
+            return
+        self.build()
+        self.fingerprint = fingerprint
+        self.save()
+
+    def build(self) -> None:
+        """Build the index from the controls and profiles of the product."""
+        start = time.perf_counter()
+        product_context = ProductContext.for_product(
+            self.cac_content_root, self.product
+        )
+        rule_controls: Dict[str, List[List[str]]] = dict()
+        controls_manager = load_controls_manager(
+            self.cac_content_root, self.product, product_context
+        )
+        for policy_id in sorted(controls_manager.policies):
+            for control in controls_manager.get_all_controls(policy_id):
+                for rule_id in dict.fromkeys(control.rules):
+                    # Variables are set in the rules of a control as var=value
+                    if "=" not in rule_id:
+                        rule_controls.setdefault(rule_id, []).append(
+                            [policy_id, control.id]
+                        )
+
+        rule_profiles: Dict[str, List[str]] = dict()
+        variable_profiles: Dict[str, List[str]] = dict()
+        for profile in product_context.profiles:
+            unselected_rules = set(profile.unselected_rules)
+            for rule_id in dict.fromkeys(profile.rules):
+                if rule_id not in unselected_rules:
+                    rule_profiles.setdefault(rule_id, []).append(profile.profile_id)
+            for var_id in profile.variables:
+                variable_profiles.setdefault(var_id, []).append(profile.profile_id)
+
+        self._rule_controls = rule_controls
+        self._rule_profiles = rule_profiles
+        self._variable_profiles = variable_profiles
+        self.built = True
+        logger.debug(
+            f"Reverse index of {self.product} built in "
+            f"{time.perf_counter() - start:.3f}s with {len(rule_controls)} rules in "
+            f"controls and {len(rule_profiles)} rules in profiles"
+        )
+
+    def get_rule_controls(self, rule_id: str) -> List[Tuple[str, str]]:
+        """Get the policy and control ids of the controls selecting a rule."""
+        return [
+            (policy_id, control_id)
+            for policy_id, control_id in self._rule_controls.get(rule_id, [])
+        ]
+
+    def get_rule_profiles(self, rule_id: str) -> List[str]:
+        """Get the ids of the profiles selecting a rule."""
+        return list(self._rule_profiles.get(rule_id, []))
+
+    def get_variable_profiles(self, var_id: str) -> List[str]:
+        """Get the ids of the profiles setting a variable."""
+        return list(self._variable_profiles.get(var_id, []))
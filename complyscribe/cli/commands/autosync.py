@@ -17,6 +17,7 @@ from complyscribe.tasks.assemble_task import AssembleTask
 from complyscribe.tasks.authored import types
 from complyscribe.tasks.authored.base_authored import AuthoredObjectBase
 from complyscribe.tasks.base_task import ModelFilter, TaskBase
+from complyscribe.tasks.model_manifest import ModelManifest
 from complyscribe.tasks.regenerate_task import RegenerateTask
 
 
@@ -70,6 +71,28 @@ logger = logging.getLogger(__name__)
     type=str,
     required=False,
 )
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=0),
+    help="Number of models assembled or regenerated in parallel. "
+    "Use 0 for the CPU count.",
+    required=False,
+    default=1,
+)
+@click.option(
+    "--force",
+    help="Assemble and regenerate all models, including unchanged ones.",
+    is_flag=True,
+    default=False,
+    show_default=True,
+)
+@click.option(
+    "--base-ref",
+    help="Only assemble and regenerate models whose markdown, JSON or "
+    "dependencies changed on the branch since it diverged from this git ref.",
+    type=str,
+    required=False,
+)
 def autosync_cmd(ctx: click.Context, **kwargs: Any) -> None:
     """Command to autosync catalog, profile, compdef and ssp."""
 
@@ -97,6 +120,11 @@ def autosync_cmd(ctx: click.Context, **kwargs: Any) -> None:
             working_dir,
             kwargs.get("ssp_index_file", ""),
         )
+        # Models with inputs unchanged since the last run are skipped. Dry runs
+        # do not write the manifest into the workspace.
+        manifest = ModelManifest(working_dir, read_only=kwargs.get("dry_run", False))
+        if not kwargs["force"]:
+            manifest.load()
 
         # Assuming an edit has occurred assemble would be run before regenerate.
         if not kwargs.get("skip_assemble"):
@@ -105,6 +133,8 @@ def autosync_cmd(ctx: click.Context, **kwargs: Any) -> None:
                 markdown_dir=markdown_dir,
                 version=kwargs.get("version", ""),
                 model_filter=model_filter,
+                jobs=kwargs["jobs"],
+                manifest=manifest,
             )
             pre_tasks.append(assemble_task)
         else:
@@ -115,6 +145,8 @@ def autosync_cmd(ctx: click.Context, **kwargs: Any) -> None:
                 authored_object=authored_object,
                 markdown_dir=markdown_dir,
                 model_filter=model_filter,
+                jobs=kwargs["jobs"],
+                manifest=manifest,
             )
             pre_tasks.append(regenerate_task)
         else:
@@ -0,0 +1,94 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Module for query cac content command"""
+import json
+import logging
+import pathlib
+from typing import Any, Dict, List, Tuple
+
+import click
+
+from complyscribe.cac_index import ContentReverseIndex
+from complyscribe.cli.options.common import debug_to_log_level
+from complyscribe.utils import get_cac_products
+
+
+logger = logging.getLogger(__name__)
+
+
+@click.command(
+    name="query-cac-content",
+    help="Find the controls and profiles using CaC rules and variables.",
+)
+@click.pass_context
+@click.option(
+    "--debug",
+    is_flag=True,
+    default=False,
+    expose_value=False,
+    help="Enable debug logging messages.",
+    callback=debug_to_log_level,
+)
+@click.option(
+    "--cac-content-root",
+    help="Root of the CaC content project.",
+    type=click.Path(
+        exists=True, file_okay=False, dir_okay=True, path_type=pathlib.Path
+    ),
+    required=True,
+)
+@click.option(
+    "--product",
+    "products",
+    type=str,
+    multiple=True,
+    help="Product to query. Can be repeated. Defaults to all products.",
+)
+@click.option(
+    "--rule",
+    "rules",
+    type=str,
+    multiple=True,
+    help="Rule id to look up. Can be repeated.",
+)
+@click.option(
+    "--variable",
+    "variables",
+    type=str,
+    multiple=True,
+    help="Variable id to look up. Can be repeated.",
+)
+def query_cac_content_cmd(
+    ctx: click.Context,
+    cac_content_root: pathlib.Path,
+    products: Tuple[str, ...],
+    rules: Tuple[str, ...],
+    variables: Tuple[str, ...],
+) -> None:
+    """Print the controls and profiles using rules and variables as JSON."""
+    if not rules and not variables:
+        raise click.UsageError("At least one --rule or --variable is required.")
+    root = str(cac_content_root.resolve())
+    results: Dict[str, Dict[str, Any]] = dict()
+    indexes = ContentReverseIndex.for_products(
+        root, list(products) or get_cac_products(root)
+    )
+    for product, index in indexes.items():
+        rule_results: Dict[str, Dict[str, List[Any]]] = dict()
+        for rule_id in rules:
+            rule_results[rule_id] = {
+                "controls": [
+                    {"policy": policy_id, "control": control_id}
+                    for policy_id, control_id in index.get_rule_controls(rule_id)
+                ],
+                "profiles": index.get_rule_profiles(rule_id),
+            }
+        results[product] = {
+            "rules": rule_results,
+            "variables": {
+                var_id: {"profiles": index.get_variable_profiles(var_id)}
+                for var_id in variables
+            },
+        }
+    click.echo(json.dumps(results, indent=2))
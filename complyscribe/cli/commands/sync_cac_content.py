@@ -5,10 +5,11 @@
 import logging
 import os
 import pathlib
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 
 import click
 import trestle.oscal.catalog as cat
+import yaml
 from trestle.common.model_utils import ModelUtils
 from trestle.core.models.file_content_type import FileContentType
 
@@ -23,10 +24,14 @@ from complyscribe.tasks.base_task import TaskBase
 from complyscribe.tasks.sync_cac_catalog_task import SyncCacCatalogTask
 from complyscribe.tasks.sync_cac_content_profile_task import SyncCacContentProfileTask
 from complyscribe.tasks.sync_cac_content_task import SyncCacContentTask
+from complyscribe.tasks.sync_cac_schedule_task import SyncCacScheduleTask
+from complyscribe.utils import load_controls_manager
 
 
 logger = logging.getLogger(__name__)
 
+COMPONENT_DEFINITION_TYPES = ["service", "validation", "software"]
+
 
 @click.group(name="sync-cac-content", help="Transform cac content to OSCAL models")
 @click.pass_context
@@ -117,23 +122,47 @@ def sync_cac_catalog_cmd(
 )
 @click.option(
     "--component-definition-type",
-    type=click.Choice(["service", "validation", "software"]),
+    type=click.Choice(COMPONENT_DEFINITION_TYPES),
     help="Type of component definition. Default: service",
     required=False,
     default="service",
 )
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=0),
+    help="Number of processes used to expand CaC rule files. Use 0 for the CPU count.",
+    required=False,
+    default=1,
+    show_default=True,
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Expand every CaC rule file instead of reusing rules cached by earlier runs.",
+    default=False,
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write new component definitions while they are created to reduce memory use.",
+    default=False,
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Update only the changed rule sets and implemented requirements of existing "
+    "component definitions.",
+    default=False,
+)
 def sync_content_to_component_definition_cmd(ctx: click.Context, **kwargs: Any) -> None:
     """Transform CaC content to OSCAL component definition."""
 
     product = kwargs["product"]
     cac_content_root = kwargs["cac_content_root"]
     component_definition_type = kwargs["component_definition_type"]
-    cac_profile = kwargs["cac_profile"]
-    if not pathlib.Path(cac_profile).exists():
-        cac_profile = os.path.join(
-            f"{cac_content_root}/products/{product}/profiles/",
-            kwargs["cac_profile"] + ".profile",
-        )
+    cac_profile = _get_cac_profile_path(
+        cac_content_root, product, kwargs["cac_profile"]
+    )
     oscal_profile = kwargs["oscal_profile"]
     working_dir = str(kwargs["repo_path"].resolve())
 
@@ -145,12 +174,176 @@ def sync_content_to_component_definition_cmd(ctx: click.Context, **kwargs: Any)
         component_definition_type,
         oscal_profile,
         working_dir,
+        jobs=kwargs["jobs"],
+        use_cache=not kwargs["no_cache"],
+        stream=kwargs["stream"],
+        incremental=kwargs["incremental"],
     )
     pre_tasks.append(sync_cac_content_task)
     results = run_bot(pre_tasks, kwargs)
     logger.debug(f"complyscribe results: {results}")
 
 
+@sync_cac_content_cmd.command(
+    name="component-definitions",
+    help="Transform several CaC profiles of a product to component definitions in OSCAL.",
+)
+@click.pass_context
+@common_options
+@git_options
+@click.option(
+    "--cac-content-root",
+    help="Root of the CaC content project.",
+    required=True,
+)
+@click.option(
+    "--product",
+    type=str,
+    help="Product to build OSCAL component definitions with",
+    required=True,
+)
+@click.option(
+    "--profile",
+    "profile_pairs",
+    type=str,
+    multiple=True,
+    help="CaC profile and main OSCAL profile pair as CAC_PROFILE:OSCAL_PROFILE. "
+    "Can be repeated.",
+)
+@click.option(
+    "--profiles-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="YAML file with a list of entries with the cac-profile, oscal-profile and "
+    "optional component-definition-type keys.",
+    required=False,
+)
+@click.option(
+    "--component-definition-type",
+    type=click.Choice(COMPONENT_DEFINITION_TYPES),
+    help="Type of component definition for pairs without a type. Default: service",
+    required=False,
+    default="service",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=0),
+    help="Number of processes used to expand CaC rule files. Use 0 for the CPU count.",
+    required=False,
+    default=1,
+    show_default=True,
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Expand every CaC rule file instead of reusing rules cached by earlier runs.",
+    default=False,
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write new component definitions while they are created to reduce memory use.",
+    default=False,
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Update only the changed rule sets and implemented requirements of existing "
+    "component definitions.",
+    default=False,
+)
+def sync_content_to_component_definitions_cmd(
+    ctx: click.Context, **kwargs: Any
+) -> None:
+    """Transform several CaC profiles to OSCAL component definitions in one run."""
+
+    product = kwargs["product"]
+    cac_content_root = kwargs["cac_content_root"]
+    working_dir = str(kwargs["repo_path"].resolve())
+
+    profile_pairs = [
+        _parse_profile_pair(pair, kwargs["component_definition_type"])
+        for pair in kwargs["profile_pairs"]
+    ]
+    if kwargs["profiles_file"]:
+        profile_pairs.extend(
+            _load_profiles_file(
+                kwargs["profiles_file"], kwargs["component_definition_type"]
+            )
+        )
+    if not profile_pairs:
+        raise click.UsageError("Provide at least one --profile or a --profiles-file.")
+
+    # The controls of the product are loaded once and shared by all pairs
+    controls_manager = load_controls_manager(cac_content_root, product)
+    pre_tasks: List[TaskBase] = []
+    for cac_profile, oscal_profile, component_definition_type in profile_pairs:
+        pre_tasks.append(
+            SyncCacContentTask(
+                product,
+                _get_cac_profile_path(cac_content_root, product, cac_profile),
+                cac_content_root,
+                component_definition_type,
+                oscal_profile,
+                working_dir,
+                jobs=kwargs["jobs"],
+                use_cache=not kwargs["no_cache"],
+                controls_manager=controls_manager,
+                stream=kwargs["stream"],
+                incremental=kwargs["incremental"],
+            )
+        )
+    results = run_bot(pre_tasks, kwargs)
+    logger.debug(f"complyscribe results: {results}")
+
+
+def _get_cac_profile_path(cac_content_root: str, product: str, cac_profile: str) -> str:
+    """Get the path of a CaC profile given as a path or a profile id."""
+    if pathlib.Path(cac_profile).exists():
+        return cac_profile
+    return os.path.join(
+        f"{cac_content_root}/products/{product}/profiles/",
+        cac_profile + ".profile",
+    )
+
+
+def _parse_profile_pair(pair: str, compdef_type: str) -> Tuple[str, str, str]:
+    """Parse a CAC_PROFILE:OSCAL_PROFILE pair."""
+    cac_profile, _, oscal_profile = pair.partition(":")
+    if not cac_profile or not oscal_profile:
+        raise click.BadParameter(
+            f"Invalid profile pair {pair}, expected CAC_PROFILE:OSCAL_PROFILE",
+            param_hint="--profile",
+        )
+    return cac_profile, oscal_profile, compdef_type
+
+
+def _load_profiles_file(
+    profiles_file: pathlib.Path, compdef_type: str
+) -> List[Tuple[str, str, str]]:
+    """Load the profile pairs of a profiles file."""
+    with open(profiles_file, "r", encoding="utf-8") as f:
+        entries: List[Dict[str, str]] = yaml.safe_load(f) or []
+    profile_pairs: List[Tuple[str, str, str]] = list()
+    for entry in entries:
+        try:
+            entry_type = entry.get("component-definition-type", compdef_type)
+            if entry_type not in COMPONENT_DEFINITION_TYPES:
+                raise click.BadParameter(
+                    f"Invalid component definition type {entry_type} in {profiles_file}",
+                    param_hint="--profiles-file",
+                )
+            profile_pairs.append(
+                (entry["cac-profile"], entry["oscal-profile"], entry_type)
+            )
+        except (AttributeError, KeyError):
+            raise click.BadParameter(
+                f"Invalid entry {entry} in {profiles_file}, expected the cac-profile "
+                "and oscal-profile keys",
+                param_hint="--profiles-file",
+            )
+    return profile_pairs
+
+
 @sync_cac_content_cmd.command(
     name="profile",
     help="Authoring Oscal Profiles by level with synced CaC content.",
@@ -232,3 +425,68 @@ def sync_cac_content_profile_cmd(
     pre_tasks.append(sync_cac_content_profile_task)
     run_bot(pre_tasks, kwargs)
     logger.debug("The sync cac content profile task is complete.")
+
+
+@sync_cac_content_cmd.command(
+    name="schedule",
+    help="Sync catalogs, profiles and component definitions for all CaC products.",
+)
+@click.pass_context
+@common_options
+@git_options
+@click.option(
+    "--cac-content-root",
+    help="Root of the CaC content project.",
+    required=True,
+)
+@click.option(
+    "--product",
+    "products",
+    type=str,
+    multiple=True,
+    help="Product to sync. Can be repeated. Defaults to all products.",
+)
+@click.option(
+    "--component-definition-type",
+    type=click.Choice(COMPONENT_DEFINITION_TYPES),
+    help="Type of component definition. Default: service",
+    required=False,
+    default="service",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=0),
+    help="Number of sync tasks run in parallel. Use 0 for the CPU count.",
+    required=False,
+    default=1,
+    show_default=True,
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Expand every CaC rule file instead of reusing rules cached by earlier runs.",
+    default=False,
+)
+@click.option(
+    "--git-range",
+    type=str,
+    help="Only run the sync tasks affected by the files changed in this commit range "
+    "of the CaC content repository, e.g. main..HEAD.",
+    required=False,
+)
+def sync_cac_schedule_cmd(ctx: click.Context, **kwargs: Any) -> None:
+    """Sync all CaC products to OSCAL models in dependency order."""
+    working_dir = str(kwargs["repo_path"].resolve())
+    pre_tasks: List[TaskBase] = [
+        SyncCacScheduleTask(
+            cac_content_root=str(pathlib.Path(kwargs["cac_content_root"]).resolve()),
+            working_dir=working_dir,
+            products=list(kwargs["products"]),
+            compdef_type=kwargs["component_definition_type"],
+            jobs=kwargs["jobs"],
+            use_cache=not kwargs["no_cache"],
+            git_range=kwargs["git_range"],
+        )
+    ]
+    results = run_bot(pre_tasks, kwargs)
+    logger.debug(f"complyscribe results: {results}")
@@ -59,11 +59,20 @@ def sync_oscal_content_cmd(ctx: click.Context) -> None:
     help="Name of the profile in trestle workspace",
     required=True,
 )
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=0),
+    help="Number of processes used to sync policy control files. Use 0 for the CPU count.",
+    required=False,
+    default=1,
+    show_default=True,
+)
 def sync_oscal_cd_to_cac_content_cmd(
     ctx: click.Context,
     cac_content_root: pathlib.Path,
     product: str,
     oscal_profile: str,
+    jobs: int,
     **kwargs: Any,
 ) -> None:
     """Sync OSCAL component definition to cac content"""
@@ -74,6 +83,7 @@ def sync_oscal_cd_to_cac_content_cmd(
         working_dir=working_dir,
         product=product,
         oscal_profile=oscal_profile,
+        jobs=jobs,
     )
     pre_tasks.append(sync_cac_content_task)
     # change working_dir to CaC content repo, since this task changing
@@ -9,6 +9,7 @@ import click
 from complyscribe.cli.commands.autosync import autosync_cmd
 from complyscribe.cli.commands.create import create_cmd
 from complyscribe.cli.commands.init import init_cmd
+from complyscribe.cli.commands.query_cac_content import query_cac_content_cmd
 from complyscribe.cli.commands.rules_transform import rules_transform_cmd
 from complyscribe.cli.commands.sync_cac_content import sync_cac_content_cmd
 from complyscribe.cli.commands.sync_oscal_content import sync_oscal_content_cmd
@@ -38,6 +39,7 @@ root_cmd.add_command(rules_transform_cmd)
 root_cmd.add_command(sync_cac_content_cmd)
 root_cmd.add_command(sync_upstreams_cmd)
 root_cmd.add_command(sync_oscal_content_cmd)
+root_cmd.add_command(query_cac_content_cmd)
 
 if __name__ == "__main__":
     root_cmd()
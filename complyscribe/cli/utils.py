@@ -34,4 +34,5 @@ def run_bot(pre_tasks: List[TaskBase], kwargs: Dict[Any, Any]) -> BotResults:
             "commit_message", "Automatic updates from complyscribe"
         ),
         dry_run=kwargs.get("dry_run", False),
+        base_ref=kwargs.get("base_ref") or "",
     )
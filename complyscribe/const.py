@@ -57,6 +57,10 @@ GITHUB_SERVER_URL = "https://github.com"
 COMPLYSCRIBE_CONFIG_DIR = ".complyscribe"
 COMPLYSCRIBE_KEEP_FILE = ".keep"
 
+# Persistent caches
+CACHE_DIR_ENV_VAR = "COMPLYSCRIBE_CACHE_DIR"
+CACHE_DIR_NAME = "complyscribe"
+
 # Props
 
 # TODO(jpower432): Propose upstream as to be populated
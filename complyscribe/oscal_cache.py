@@ -0,0 +1,457 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Cache of catalogs resolved from OSCAL profiles."""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import trestle
+import yaml
+from trestle.common import const
+from trestle.core.control_interface import ParameterRep
+from trestle.core.profile_resolver import ProfileResolver
+from trestle.oscal.catalog import Catalog
+
+from complyscribe.utils import (
+    SharedInstances,
+    get_cache_dir,
+    hash_str,
+    read_json_cache,
+    write_json_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_CATALOGS_DIR = "resolved-catalogs"
+# Glob of the 16 hex digit keys in the names of cached catalogs
+KEY_GLOB = "[0-9a-f]" * 16
+
+
+def _get_href_path(trestle_root: pathlib.Path, href: str) -> Optional[pathlib.Path]:
+    """
+    Get the local file an href points to the way trestle fetches it.
+
+    Returns:
+        The absolute path or None for remote hrefs.
+    """
+    if href.startswith(const.TRESTLE_HREF_HEADING):
+        return trestle_root.joinpath(
+            href.replace(const.TRESTLE_HREF_HEADING, "", 1)
+        ).resolve()
+    if href.startswith(const.FILE_URI):
+        return pathlib.Path("/", href.replace(const.FILE_URI, "", 1)).resolve()
+    if ":" in href:
+        return None
+    # Like trestle, relative paths are resolved from the working directory
+    return pathlib.Path(href).resolve()
+
+
+def _load_model_dict(path: pathlib.Path) -> Dict[str, Any]:
+    """Load the dictionary form of an OSCAL model file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".json":
+            return json.load(f)
+        return yaml.safe_load(f)
+
+
+def _get_stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Get the mtime and size of a file, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _get_import_hrefs(profile: Dict[str, Any]) -> List[str]:
+    """Get the hrefs of the models imported by a profile dictionary."""
+    back_matter_hrefs: Dict[str, str] = dict()
+    for resource in profile.get("back-matter", {}).get("resources", []):
+        rlinks = resource.get("rlinks", [])
+        if rlinks:
+            back_matter_hrefs[resource["uuid"]] = rlinks[0]["href"]
+    hrefs: List[str] = list()
+    for profile_import in profile.get("imports", []):
+        href = profile_import["href"]
+        # Imports can point to a back matter resource with the resource uuid
+        if href.startswith("#"):
+            href = back_matter_hrefs.get(href[1:], href)
+        hrefs.append(href)
+    return hrefs
+
+
+def _get_model_import_hrefs(model: Dict[str, Any]) -> List[str]:
+    """
+    Get the hrefs of the models a model dictionary imports.
+
+    Notes: Profiles import catalogs and profiles, component definitions import
+    the profiles of their control implementations and other component
+    definitions.
+    """
+    if "profile" in model:
+        return _get_import_hrefs(model["profile"])
+    compdef = model.get("component-definition")
+    if not isinstance(compdef, dict):
+        return []
+    hrefs = [
+        compdef_import["href"]
+        for compdef_import in compdef.get("import-component-definitions", [])
+    ]
+    for component in compdef.get("components", []):
+        for control_implementation in component.get("control-implementations", []):
+            hrefs.append(control_implementation["source"])
+    return list(dict.fromkeys(hrefs))
+
+
+def get_model_imports(
+    trestle_root: pathlib.Path, model_paths: List[pathlib.Path]
+) -> List[pathlib.Path]:
+    """
+    Get the local model files imported by models, directly or indirectly.
+
+    Args:
+        trestle_root: Root of the trestle workspace
+        model_paths: Paths of the model files
+
+    Returns:
+        The sorted paths of the imported models. Remote imports and models that
+        cannot be read are left out.
+    """
+    seen: Set[pathlib.Path] = set()
+    imports: Set[pathlib.Path] = set()
+    pending = list(model_paths)
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            model = _load_model_dict(path)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            logger.debug(f"Not reading the imports of {path}: {e}")
+            continue
+        if not isinstance(model, dict):
+            continue
+        for href in _get_model_import_hrefs(model):
+            import_path = _get_href_path(trestle_root, href)
+            if import_path is not None:
+                imports.add(import_path)
+                pending.append(import_path)
+    return sorted(imports)
+
+
+def _get_resolve_options(
+    block_adds: bool = False,
+    block_params: bool = False,
+    params_format: Optional[str] = None,
+    param_rep: ParameterRep = ParameterRep.LEAVE_MOUSTACHE,
+    show_value_warnings: bool = False,
+    value_assigned_prefix: Optional[str] = None,
+    value_not_assigned_prefix: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get the profile resolution options with their defaults."""
+    return {
+        "block_adds": block_adds,
+        "block_params": block_params,
+        "params_format": params_format,
+        "param_rep": param_rep,
+        "show_value_warnings": show_value_warnings,
+        "value_assigned_prefix": value_assigned_prefix,
+        "value_not_assigned_prefix": value_not_assigned_prefix,
+    }
+
+
+class ResolvedCatalogCache(SharedInstances):
+    """
+    Cache of resolved profile catalogs, in memory and on disk.
+
+    Notes: Entries are keyed on the profile path, the resolution options and the
+    content hashes of the profile and every model it imports, directly or through
+    other profiles, so changes to any of them resolve the catalog again. Profiles
+    importing remote models are always resolved. The resolved catalogs are written
+    to the complyscribe cache directory, one file per profile and options, and kept
+    in memory for the process. Indexes built from a resolved catalog can be stored
+    next to it with `get_catalog_index`. Callers get a copy of the cached catalog,
+    while indexes are shared and must not be modified. The dependencies of a
+    profile are only read again when the size or mtime of one of them changed.
+    One instance per cache directory is shared within the process through
+    `for_dir`.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: Optional[pathlib.Path] = None) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Optional directory for the catalog files. Defaults to the
+            complyscribe cache directory.
+        """
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.catalogs_dir = cache_dir.joinpath(RESOLVED_CATALOGS_DIR)
+        self._catalogs: Dict[str, Catalog] = dict()
+        # (Resolution key, index name) -> index
+        self._indexes: Dict[Tuple[str, str], Dict[str, Any]] = dict()
+        # Path -> (mtime_ns, size, sha256) of the models read for cache keys
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = dict()
+        # (Working directory, trestle root, profile path) -> (path, mtime_ns, size)
+        # of every dependency and the dependency entries computed from them
+        self._dependencies: Dict[
+            Tuple[str, str, str], Tuple[List[Tuple[str, int, int]], List[str]]
+        ] = dict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def for_dir(
+        cls, cache_dir: Optional[pathlib.Path] = None
+    ) -> "ResolvedCatalogCache":
+        """Get the shared cache for a cache directory."""
+        cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        return cls._get_shared(os.path.abspath(cache_dir), cache_dir)
+
+    def _hash_file(self, path: pathlib.Path, stat: os.stat_result) -> str:
+        """Hash the content of a file, reusing the hash while it is unchanged."""
+        cached = self._file_hashes.get(str(path))
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._file_hashes[str(path)] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _get_dependencies(
+        self, trestle_root: pathlib.Path, profile_path: pathlib.Path
+    ) -> Optional[List[str]]:
+        """
+        Get the paths and hashes of a profile and all models it imports.
+
+        Notes: The entries are reused while the size and mtime of every model
+        they were computed from are unchanged, so the models are only parsed again
+        when one of them changed.
+
+        Returns:
+            Sorted path:hash entries or None if a model cannot be read locally.
+        """
+        memo_key = (os.getcwd(), str(trestle_root), str(profile_path))
+        memo = self._dependencies.get(memo_key)
+        if memo is not None and all(
+            _get_stat_signature(path) == (mtime_ns, size)
+            for path, mtime_ns, size in memo[0]
+        ):
+            return memo[1]
+
+        signatures: List[Tuple[str, int, int]] = list()
+        entries: List[str] = list()
+        seen: Set[pathlib.Path] = set()
+        pending = [profile_path]
+        while pending:
+            path = pending.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                stat = path.stat()
+                signatures.append((str(path), stat.st_mtime_ns, stat.st_size))
+                entries.append(f"{path}:{self._hash_file(path, stat)}")
+                model = _load_model_dict(path)
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                logger.debug(f"Not caching the resolution of {profile_path}: {e}")
+                return None
+            if not isinstance(model, dict) or "profile" not in model:
+                continue
+            for href in _get_import_hrefs(model["profile"]):
+                import_path = _get_href_path(trestle_root, href)
+                if import_path is None:
+                    logger.debug(
+                        f"Not caching the resolution of {profile_path}: "
+                        f"remote import {href}"
+                    )
+                    return None
+                pending.append(import_path)
+        self._dependencies[memo_key] = (signatures, sorted(entries))
+        return sorted(entries)
+
+    def _get_keys(
+        self,
+        trestle_root: pathlib.Path,
+        profile_path: Union[str, pathlib.Path],
+        options: Dict[str, Any],
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Get the keys of a profile resolution.
+
+        Returns:
+            The key of the profile and options, and the key of the resolution,
+            or None if the resolution cannot be cached.
+        """
+        path = _get_href_path(trestle_root, str(profile_path))
+        if path is None:
+            return None
+        dependencies = self._get_dependencies(trestle_root, path)
+        if dependencies is None:
+            return None
+        name_key = hash_str(
+            json.dumps([str(path), {**options, "param_rep": options["param_rep"].name}])
+        )[:16]
+        key = hash_str(
+            json.dumps([self.VERSION, trestle.__version__, name_key, dependencies])
+        )[:16]
+        return name_key, key
+
+    def get_resolved_profile_catalog(
+        self,
+        trestle_root: pathlib.Path,
+        profile_path: Union[str, pathlib.Path],
+        **kwargs: Any,
+    ) -> Catalog:
+        """
+        Get the catalog resolved from a profile.
+
+        Notes: The arguments are those of
+        `ProfileResolver.get_resolved_profile_catalog`. Value warnings are only
+        shown when the catalog is resolved. The returned catalog is a copy the
+        caller can modify.
+        """
+        options = _get_resolve_options(**kwargs)
+        keys = self._get_keys(trestle_root, profile_path, options)
+        if keys is None:
+            return ProfileResolver.get_resolved_profile_catalog(
+                trestle_root, str(profile_path), **options
+            )
+        return self._get_catalog(trestle_root, profile_path, options, keys).copy(
+            deep=True
+        )
+
+    def _get_catalog(
+        self,
+        trestle_root: pathlib.Path,
+        profile_path: Union[str, pathlib.Path],
+        options: Dict[str, Any],
+        keys: Tuple[str, str],
+    ) -> Catalog:
+        """Get the shared cached catalog resolved from a profile."""
+        name_key, key = keys
+        catalog = self._catalogs.get(key)
+        if catalog is not None:
+            self.hits += 1
+            return catalog
+
+        catalog_file = self.catalogs_dir.joinpath(f"{name_key}-{key}.json")
+        if catalog_file.exists():
+            try:
+                catalog = Catalog.oscal_read(catalog_file)
+            except Exception as e:
+                logger.debug(
+                    f"Ignoring unreadable resolved catalog {catalog_file}: {e}"
+                )
+        if catalog is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            start = time.perf_counter()
+            catalog = ProfileResolver.get_resolved_profile_catalog(
+                trestle_root, str(profile_path), **options
+            )
+            logger.debug(
+                f"Resolved {profile_path} in {time.perf_counter() - start:.3f}s"
+            )
+            self._write_catalog(catalog_file, name_key, catalog)
+        self._catalogs[key] = catalog
+        return catalog
+
+    def get_catalog_index(
+        self,
+        trestle_root: pathlib.Path,
+        profile_path: Union[str, pathlib.Path],
+        index_name: str,
+        build_index: Callable[[Catalog], Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Get an index built from the catalog resolved from a profile.
+
+        Args:
+            trestle_root: Root of the trestle workspace
+            profile_path: Path or href of the profile
+            index_name: Name of the index, changed when its format changes
+            build_index: Function building the index from the resolved catalog
+            kwargs: Arguments of `ProfileResolver.get_resolved_profile_catalog`
+
+        Notes: Indexes are stored as JSON next to the resolved catalog, keyed the
+        same way, so they are loaded without reading the catalog. The catalog is
+        only resolved or read when the index is missing or out of date.
+        """
+        options = _get_resolve_options(**kwargs)
+        keys = self._get_keys(trestle_root, profile_path, options)
+        if keys is None:
+            return build_index(
+                ProfileResolver.get_resolved_profile_catalog(
+                    trestle_root, str(profile_path), **options
+                )
+            )
+
+        name_key, key = keys
+        index = self._indexes.get((key, index_name))
+        if index is not None:
+            return index
+        index_file = self.catalogs_dir.joinpath(f"{name_key}-{key}.{index_name}.json")
+        data = read_json_cache(index_file)
+        if isinstance(data, dict) and data.get("key") == key:
+            index = data.get("index")
+        if not isinstance(index, dict):
+            index = build_index(
+                self._get_catalog(trestle_root, profile_path, options, keys)
+            )
+            for old_file in self.catalogs_dir.glob(f"{name_key}-*.{index_name}.json"):
+                old_file.unlink(missing_ok=True)
+            write_json_cache(index_file, {"key": key, "index": index})
+        self._indexes[(key, index_name)] = index
+        return index
+
+    def _write_catalog(
+        self, catalog_file: pathlib.Path, name_key: str, catalog: Catalog
+    ) -> None:
+        """
+        Atomically write a resolved catalog, replacing older ones of the profile.
+
+        Notes: Caches are an optimization, so failures to write are logged and ignored.
+        """
+        try:
+            self.catalogs_dir.mkdir(parents=True, exist_ok=True)
+            # Only catalogs, the indexes next to them are replaced on their own
+            for old_file in self.catalogs_dir.glob(f"{name_key}-{KEY_GLOB}.json"):
+                old_file.unlink(missing_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.catalogs_dir, prefix=f".{catalog_file.stem}.", suffix=".json"
+            )
+            os.close(fd)
+            try:
+                catalog.oscal_write(pathlib.Path(tmp_path))
+                os.replace(tmp_path, catalog_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.debug(f"Failed to write resolved catalog {catalog_file}: {e}")
+
+
+def get_resolved_profile_catalog(
+    trestle_root: pathlib.Path, profile_path: Union[str, pathlib.Path], **kwargs: Any
+) -> Catalog:
+    """
+    Get the catalog resolved from a profile through the shared cache.
+
+    Notes: Takes the arguments of `ProfileResolver.get_resolved_profile_catalog`.
+    """
+    return ResolvedCatalogCache.for_dir().get_resolved_profile_catalog(
+        trestle_root, profile_path, **kwargs
+    )
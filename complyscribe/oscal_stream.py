@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Incremental JSON writer for large OSCAL models."""
+
+import logging
+import pathlib
+from typing import IO, Any, Dict, Iterable, List, Tuple, Union
+
+import orjson
+from trestle.common.str_utils import AliasMode, classname_to_alias
+from trestle.core.base_model import OscalBaseModel
+
+
+logger = logging.getLogger(__name__)
+
+INDENT = b"  "
+
+
+class StreamedModel:
+    """
+    An OSCAL model with list fields written from iterables.
+
+    Notes: The iterables, keyed by field name, replace the values of those fields
+    in the model. Their items can be OSCAL models, other streamed models or
+    dictionaries in their JSON form, and are only consumed while the model is
+    written, so generators never have all items in memory.
+    """
+
+    def __init__(self, model: OscalBaseModel, **fields: Iterable[Any]) -> None:
+        """Initialize a streamed model."""
+        self.model = model
+        self.fields = fields
+
+
+class _Stream:
+    """Marks the iterable of a streamed field."""
+
+    def __init__(self, items: Iterable[Any]) -> None:
+        self.items = items
+
+
+def write_oscal_json(
+    path: pathlib.Path, model: Union[OscalBaseModel, StreamedModel]
+) -> None:
+    """
+    Write an OSCAL model as JSON without serializing it as a whole.
+
+    Notes: The output is identical to `oscal_write` for a model holding the same
+    items. Only one item of a streamed list is serialized at a time, while
+    `oscal_write` keeps the model, a dictionary copy of it and the encoded JSON
+    in memory together.
+    """
+    oscal_model = model.model if isinstance(model, StreamedModel) else model
+    alias = classname_to_alias(oscal_model.__class__.__name__, AliasMode.JSON)
+    with open(path, "wb") as f:
+        _write_object(f, [(alias, model)], 0)
+    logger.debug(f"Streamed {alias} to {path}")
+
+
+def _dumps(value: Any, level: int) -> bytes:
+    """Serialize a value like oscal_write, indented to a nesting level."""
+    data = orjson.dumps(
+        value, default=OscalBaseModel.__json_encoder__, option=orjson.OPT_INDENT_2
+    )
+    if level:
+        data = data.replace(b"\n", b"\n" + INDENT * level)
+    return data
+
+
+def _write_value(f: IO[bytes], value: Any, level: int) -> None:
+    """Write a model, streamed model or JSON value."""
+    if isinstance(value, StreamedModel):
+        _write_object(f, _get_entries(value), level)
+    elif isinstance(value, OscalBaseModel):
+        f.write(_dumps(value.dict(by_alias=True, exclude_none=True), level))
+    elif isinstance(value, dict):
+        f.write(_dumps({k: v for k, v in value.items() if v is not None}, level))
+    else:
+        f.write(_dumps(value, level))
+
+
+def _write_object(f: IO[bytes], entries: List[Tuple[str, Any]], level: int) -> None:
+    """Write the entries of an object, streaming iterables as arrays."""
+    f.write(b"{")
+    for i, (key, value) in enumerate(entries):
+        if i:
+            f.write(b",")
+        f.write(b"\n" + INDENT * (level + 1) + orjson.dumps(key) + b": ")
+        if isinstance(value, _Stream):
+            _write_array(f, value.items, level + 1)
+        else:
+            _write_value(f, value, level + 1)
+    f.write(b"\n" + INDENT * level + b"}" if entries else b"}")
+
+
+def _write_array(f: IO[bytes], items: Iterable[Any], level: int) -> None:
+    """Write the items of an iterable as an array, one at a time."""
+    f.write(b"[")
+    empty = True
+    for item in items:
+        f.write((b"\n" if empty else b",\n") + INDENT * (level + 1))
+        _write_value(f, item, level + 1)
+        empty = False
+    if not empty:
+        f.write(b"\n" + INDENT * level)
+    f.write(b"]")
+
+
+def _get_entries(streamed: StreamedModel) -> List[Tuple[str, Any]]:
+    """Get the JSON entries of a streamed model in field order."""
+    model = streamed.model
+    data: Dict[str, Any] = model.dict(
+        by_alias=True, exclude_none=True, exclude=set(streamed.fields)
+    )
+    entries: List[Tuple[str, Any]] = list()
+    for name, field in model.__fields__.items():
+        if name in streamed.fields:
+            entries.append((field.alias, _Stream(streamed.fields[name])))
+        elif field.alias in data:
+            entries.append((field.alias, data[field.alias]))
+    return entries
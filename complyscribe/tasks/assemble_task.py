@@ -4,17 +4,20 @@
 
 """ComplyScribe Assembly Tasks"""
 
+import functools
 import logging
 import os
 import pathlib
-from typing import Optional
+from typing import List, Optional, Set
 
 from complyscribe import const
+from complyscribe.tasks.authored import types
 from complyscribe.tasks.authored.base_authored import (
     AuthoredObjectBase,
     AuthoredObjectException,
 )
 from complyscribe.tasks.base_task import ModelFilter, TaskBase, TaskException
+from complyscribe.tasks.model_manifest import ModelManifest
 
 
 logger = logging.getLogger(__name__)
@@ -31,6 +34,8 @@ class AssembleTask(TaskBase):
         markdown_dir: str,
         version: str = "",
         model_filter: Optional[ModelFilter] = None,
+        jobs: Optional[int] = 1,
+        manifest: Optional[ModelManifest] = None,
     ) -> None:
         """
         Initialize assemble task.
@@ -40,11 +45,16 @@ class AssembleTask(TaskBase):
             markdown_dir: Location of directory to write Markdown in
             model_filter: Optional filter to apply to the task to include or exclude models
             from processing
+            jobs: Number of models assembled in parallel, 0 or None for the CPU count
+            manifest: Optional manifest to skip models with unchanged inputs and
+            record the processed models in
         """
 
         self._authored_object = authored_object
         self._markdown_dir = markdown_dir
         self._version = version
+        self._jobs = jobs
+        self._manifest = manifest
         working_dir = self._authored_object.get_trestle_root()
         super().__init__(working_dir, model_filter)
 
@@ -63,17 +73,55 @@ class AssembleTask(TaskBase):
         if not os.path.exists(search_path):
             raise TaskException(f"Markdown directory {search_path} does not exist")
 
-        for model in self.iterate_models(pathlib.Path(search_path)):
-            # Construct model path from markdown path. AuthoredObject already has
-            # the working dir data as part of object construction.
-            logger.info(f"Assembling model {model}")
-            model_base_name = os.path.basename(model)
-            model_path = os.path.join(self._markdown_dir, model_base_name)
-            try:
-                self._authored_object.assemble(
-                    markdown_path=model_path, version_tag=self._version
-                )
-            except AuthoredObjectException as e:
-                raise TaskException(f"Assemble task failed for model {model_path}: {e}")
-
+        models = list(self.iterate_models(pathlib.Path(search_path)))
+        run = functools.partial(
+            self.run_for_models, func=self._assemble_model, jobs=self._jobs
+        )
+        manifest = self._manifest
+        if manifest is None:
+            run(models)
+            return const.SUCCESS_EXIT_CODE
+
+        model_type_dir = types.get_trestle_model_dir(self._authored_object)
+        manifest.run_changed(
+            f"assemble:{model_type_dir}:{self._markdown_dir}",
+            models,
+            functools.partial(self._get_model_state, manifest),
+            self._get_model_dependencies,
+            run,
+        )
+        manifest.save()
         return const.SUCCESS_EXIT_CODE
+
+    def _get_model_state(self, manifest: ModelManifest, model: pathlib.Path) -> str:
+        """Hash the inputs of a model and the version set during assembly."""
+        return manifest.get_state(
+            types.get_model_inputs(
+                self._authored_object, self._markdown_dir, model.name
+            ),
+            self._version,
+        )
+
+    def get_model_inputs(self, model: pathlib.Path) -> List[pathlib.Path]:
+        """Get the paths whose changes affect a model, by model name."""
+        return types.get_model_change_inputs(
+            self._authored_object, self._markdown_dir, model.name
+        )
+
+    def _get_model_dependencies(self, model: pathlib.Path) -> Set[str]:
+        """Get the names of the models of the same type a model depends on."""
+        return types.get_model_dependency_names(self._authored_object, model.name)
+
+    def _assemble_model(self, model: pathlib.Path) -> None:
+        """Assemble one object from its markdown directory."""
+        # Construct model path from markdown path. AuthoredObject already has
+        # the working dir data as part of object construction.
+        logger.info(f"Assembling model {model}")
+        model_base_name = os.path.basename(model)
+        model_path = os.path.join(self._markdown_dir, model_base_name)
+        try:
+            self._authored_object.assemble(
+                markdown_path=model_path, version_tag=self._version
+            )
+        except AuthoredObjectException as e:
+            raise TaskException(f"Assemble task failed for model {model_path}: {e}")
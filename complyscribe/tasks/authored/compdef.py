@@ -14,10 +14,10 @@ import trestle.oscal.profile as prof
 from trestle.common.err import TrestleError
 from trestle.common.model_utils import ModelUtils
 from trestle.core.catalog.catalog_interface import CatalogInterface
-from trestle.core.profile_resolver import ProfileResolver
 from trestle.core.repository import AgileAuthoring
 
 from complyscribe.const import RULE_PREFIX, RULES_VIEW_DIR, YAML_EXTENSION
+from complyscribe.oscal_cache import get_resolved_profile_catalog
 from complyscribe.tasks.authored.base_authored import (
     AuthoredObjectBase,
     AuthoredObjectException,
@@ -48,9 +48,7 @@ class FilterByProfile:
                 f"Profile {profile_name} does not exist in the workspace"
             )
 
-        catalog = ProfileResolver.get_resolved_profile_catalog(
-            trestle_root, filter_profile_path
-        )
+        catalog = get_resolved_profile_catalog(trestle_root, filter_profile_path)
         self._control_ids = CatalogInterface(catalog).get_control_ids()
 
     def __call__(self, control_id: str) -> bool:
@@ -186,7 +184,7 @@ class RulesViewBuilder:
             component_info: Component info to use for the rules
             criteria: Optional criteria to filter the controls to include in the rules
         """
-        catalog = ProfileResolver.get_resolved_profile_catalog(
+        catalog = get_resolved_profile_catalog(
             self._trestle_root, profile_path=profile_path
         )
 
@@ -8,7 +8,7 @@ import os
 import pathlib
 import shutil
 from copy import deepcopy
-from typing import Dict, List, Optional, Set, Type
+from typing import Any, Dict, List, Optional, Set, Type
 
 import trestle.core.generators as gens
 import trestle.oscal.catalog as cat
@@ -27,6 +27,7 @@ from trestle.core.models.file_content_type import FileContentType
 from trestle.core.repository import AgileAuthoring
 from trestle.oscal.common import IncludeAll
 
+from complyscribe.oscal_cache import ResolvedCatalogCache
 from complyscribe.tasks.authored.base_authored import (
     AuthoredObjectBase,
     AuthoredObjectException,
@@ -237,6 +238,9 @@ class AuthoredProfile(AuthoredObjectBase):
 class CatalogControlResolver:
     """Helper class find control ids in OSCAL catalogs based on the label property."""
 
+    # Changed when the format of the index changes
+    INDEX_NAME = "control-resolver-v1"
+
     def __init__(self) -> None:
         """Initialize."""
         self.all_controls: Set[str] = set()
@@ -244,29 +248,71 @@ class CatalogControlResolver:
 
     def load(self, catalog: cat.Catalog) -> None:
         """Load the catalog."""
+        self.load_index(self.build_index(catalog))
+
+    def load_profile(
+        self, trestle_root: pathlib.Path, profile_path: str, **kwargs: Any
+    ) -> None:
+        """
+        Load the catalog resolved from a profile.
+
+        Notes: The index of the catalog is persisted with the resolved catalog, so
+        the catalog is only resolved and walked when the profile or a model it
+        imports changed. The keyword arguments are those of
+        `ProfileResolver.get_resolved_profile_catalog`.
+        """
+        self.load_index(
+            ResolvedCatalogCache.for_dir().get_catalog_index(
+                trestle_root, profile_path, self.INDEX_NAME, self.build_index, **kwargs
+            )
+        )
+
+    @classmethod
+    def build_index(cls, catalog: cat.Catalog) -> Dict[str, Any]:
+        """
+        Build the index of the control and part ids and labels of a catalog.
+
+        Returns:
+            A JSON serializable index with all control and part ids and the
+            labels in the order they are found.
+        """
+        controls: List[str] = list()
+        # [label, id, whether it is the label of a control]
+        labels: List[List[Any]] = list()
         for control in CatalogInterface(catalog).get_all_controls_from_dict():
-            self.all_controls.add(control.id)
+            controls.append(control.id)
             label = ControlInterface.get_label(control)
             if label:
-                self._controls_by_label[label] = control.id
-                self._handle_parts(control)
-
+                labels.append([label, control.id, True])
+                cls._handle_parts(control, controls, labels)
+        return {"controls": controls, "labels": labels}
+
+    def load_index(self, index: Dict[str, Any]) -> None:
+        """Load the index of a catalog."""
+        self.all_controls.update(index["controls"])
+        for label, control_id, is_control in index["labels"]:
+            # Avoiding key collision here. The higher level control object will take
+            # precedence.
+            if is_control or label not in self._controls_by_label:
+                self._controls_by_label[label] = control_id
+
+    @classmethod
     def _handle_parts(
-        self,
+        cls,
         control: TypeWithParts,
+        controls: List[str],
+        labels: List[List[Any]],
     ) -> None:
         """Handle parts of a control."""
         if control.parts:
             for part in control.parts:
                 if not part.id:
                     continue
-                self.all_controls.add(part.id)
+                controls.append(part.id)
                 label = ControlInterface.get_label(part)
-                # Avoiding key collision here. The higher level control object will take
-                # precedence.
-                if label and label not in self._controls_by_label.keys():
-                    self._controls_by_label[label] = part.id
-                self._handle_parts(part)
+                if label:
+                    labels.append([label, part.id, False])
+                cls._handle_parts(part, controls, labels)
 
     def get_id(self, control_label: str) -> Optional[str]:
         """
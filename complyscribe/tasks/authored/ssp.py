@@ -51,6 +51,11 @@ class SSPIndex:
         self.yaml_header_by_ssp: Dict[str, str] = {}
         self._load()
 
+    @property
+    def index_path(self) -> str:
+        """Return the path of the index file"""
+        return self._index_path
+
     def _load(self) -> None:
         """Load the index from the index file"""
         # Try to load the current file. If it does not exist,
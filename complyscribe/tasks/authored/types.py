@@ -4,10 +4,18 @@
 
 """ComplyScribe authoring type information"""
 
+import pathlib
 from enum import Enum
+from typing import List, Set, Type
 
 from trestle.common import const
+from trestle.common.common_types import TopLevelOscalModel
+from trestle.common.model_utils import ModelUtils
+from trestle.oscal.component import ComponentDefinition
+from trestle.oscal.profile import Profile
+from trestle.oscal.ssp import SystemSecurityPlan
 
+from complyscribe.oscal_cache import get_model_imports
 from complyscribe.tasks.authored.base_authored import (
     AuthoredObjectBase,
     AuthoredObjectException,
@@ -58,3 +66,113 @@ def get_trestle_model_dir(authored_object: AuthoredObjectBase) -> str:
         raise AuthoredObjectException(
             f"Invalid authored object {type(authored_object)}"
         )
+
+
+def _get_model_file(
+    trestle_root: pathlib.Path, model_name: str, model_class: Type[TopLevelOscalModel]
+) -> List[pathlib.Path]:
+    """Get the file of a model in the workspace, if it exists."""
+    model_path = ModelUtils.get_model_path_for_name_and_class(
+        trestle_root, model_name, model_class
+    )
+    return [model_path] if model_path is not None else []
+
+
+def get_model_dependencies(
+    authored_object: AuthoredObjectBase, model_name: str
+) -> List[pathlib.Path]:
+    """
+    Determine the model files an authored model is built from besides its own
+
+    Notes: Profiles and component definitions depend on the models they import,
+    SSPs on the profile, component definitions and leveraged SSP of the SSP index
+    and the models those import. Remote imports are not included.
+    """
+    trestle_root = pathlib.Path(authored_object.get_trestle_root())
+    if isinstance(authored_object, AuthoredProfile):
+        return get_model_imports(
+            trestle_root, _get_model_file(trestle_root, model_name, Profile)
+        )
+    elif isinstance(authored_object, AuthoredComponentDefinition):
+        return get_model_imports(
+            trestle_root,
+            _get_model_file(trestle_root, model_name, ComponentDefinition),
+        )
+    elif isinstance(authored_object, AuthoredSSP):
+        ssp_index = authored_object.ssp_index
+        try:
+            profile = ssp_index.get_profile_by_ssp(model_name)
+            compdefs = ssp_index.get_comps_by_ssp(model_name)
+        except AuthoredObjectException:
+            return []
+        model_files = _get_model_file(trestle_root, profile, Profile)
+        for compdef in compdefs:
+            model_files.extend(
+                _get_model_file(trestle_root, compdef, ComponentDefinition)
+            )
+        leveraged_ssp = ssp_index.get_leveraged_by_ssp(model_name)
+        if leveraged_ssp:
+            model_files.extend(
+                _get_model_file(trestle_root, leveraged_ssp, SystemSecurityPlan)
+            )
+        return sorted(
+            set(model_files).union(get_model_imports(trestle_root, model_files))
+        )
+    return []
+
+
+def get_model_dependency_names(
+    authored_object: AuthoredObjectBase, model_name: str
+) -> Set[str]:
+    """Determine the names of the models of the same type an authored model depends on"""
+    dependencies = get_model_dependencies(authored_object, model_name)
+    if not dependencies:
+        return set()
+    model_dir = pathlib.Path(authored_object.get_trestle_root()).joinpath(
+        get_trestle_model_dir(authored_object)
+    )
+    names: Set[str] = set()
+    for path in dependencies:
+        if model_dir in path.parents:
+            names.add(path.relative_to(model_dir).parts[0])
+    names.discard(model_name)
+    return names
+
+
+def get_model_inputs(
+    authored_object: AuthoredObjectBase, markdown_dir: str, model_name: str
+) -> List[pathlib.Path]:
+    """
+    Determine the workspace paths an authored model is assembled and regenerated from
+
+    Notes: Besides the markdown and JSON of the model, this includes the files of
+    the models it depends on and, for SSPs, the SSP index.
+    """
+    trestle_root = pathlib.Path(authored_object.get_trestle_root())
+    model_dir = get_trestle_model_dir(authored_object)
+    inputs: List[pathlib.Path] = [
+        trestle_root.joinpath(markdown_dir, model_name),
+        trestle_root.joinpath(model_dir, model_name),
+    ]
+    inputs.extend(get_model_dependencies(authored_object, model_name))
+    if isinstance(authored_object, AuthoredSSP):
+        inputs.append(pathlib.Path(authored_object.ssp_index.index_path).resolve())
+    return inputs
+
+
+def get_model_change_inputs(
+    authored_object: AuthoredObjectBase, markdown_dir: str, model_name: str
+) -> List[pathlib.Path]:
+    """
+    Determine the workspace paths whose changes affect an authored model
+
+    Notes: Besides the inputs of the model, this includes the markdown of the
+    models of the same type it depends on, since assembling them changes its inputs.
+    """
+    trestle_root = pathlib.Path(authored_object.get_trestle_root())
+    inputs = get_model_inputs(authored_object, markdown_dir, model_name)
+    inputs.extend(
+        trestle_root.joinpath(markdown_dir, name)
+        for name in sorted(get_model_dependency_names(authored_object, model_name))
+    )
+    return inputs
@@ -5,13 +5,21 @@
 """ComplyScribe base task for extensible bot pre-tasks"""
 
 import fnmatch
+import logging
+import os
 import pathlib
 from abc import ABC, abstractmethod
-from typing import Callable, Iterable, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Set
 
 from trestle.common import const
 from trestle.common.file_utils import is_hidden
 
+from complyscribe.utils import resolve_jobs
+
+
+logger = logging.getLogger(__name__)
+
 
 class TaskException(Exception):
     """An error during task execution"""
@@ -26,27 +34,58 @@ class ModelFilter:
         include_patterns: List of glob patterns to include in processing.
 
     Note: If a model is in both the include and exclude lists, it will be excluded.
-    The skip list is applied first.
+    The skip list is applied first. Once changed files are set, models built from
+    none of them are skipped as well.
     """
 
     def __init__(self, skip_patterns: List[str], include_patterns: List[str]):
         self._include_model_list: List[str] = include_patterns
         self._skip_model_list: List[str] = [const.TRESTLE_KEEP_FILE] + skip_patterns
+        self._changed_paths: Optional[Set[str]] = None
+
+    def set_changed_files(self, changed_files: Iterable[pathlib.Path]) -> None:
+        """
+        Only include models built from one of the changed files.
+
+        Args:
+            changed_files: Paths of changed files, including deleted ones
+        """
+        changed_paths: Set[str] = set()
+        for changed_file in changed_files:
+            path = pathlib.Path(os.path.realpath(changed_file))
+            changed_paths.add(str(path))
+            changed_paths.update(str(parent) for parent in path.parents)
+        self._changed_paths = changed_paths
+
+    def is_skipped(
+        self,
+        model_path: pathlib.Path,
+        get_inputs: Optional[Callable[[pathlib.Path], List[pathlib.Path]]] = None,
+    ) -> bool:
+        """
+        Check if the model is skipped through include or skip lists or changed files.
+
+        Args:
+            model_path: Path of the model
+            get_inputs: Optional function getting the files and directories a model
+            is built from, which default to the model path
 
-    def is_skipped(self, model_path: pathlib.Path) -> bool:
-        """Check if the model is skipped through include or skip lists."""
+        Notes: A model is changed if one of its inputs is or contains a changed file.
+        """
         if any(
             fnmatch.fnmatch(model_path.name, pattern)
             for pattern in self._skip_model_list
         ):
             return True
-        elif any(
+        elif not any(
             fnmatch.fnmatch(model_path.name, pattern)
             for pattern in self._include_model_list
         ):
-            return False
-        else:
             return True
+        elif self._changed_paths is None:
+            return False
+        inputs = get_inputs(model_path) if get_inputs is not None else [model_path]
+        return not any(os.path.realpath(path) in self._changed_paths for path in inputs)
 
 
 class TaskBase(ABC):
@@ -75,10 +114,11 @@ class TaskBase(ABC):
         filtered_paths: Iterable[pathlib.Path]
 
         if self.filter is not None:
-            is_skipped: Callable[[pathlib.Path], bool] = self.filter.is_skipped
+            model_filter: ModelFilter = self.filter
             filtered_paths = list(
                 filter(
-                    lambda p: not is_skipped(p) and (not is_hidden(p) or p.is_dir()),
+                    lambda p: not model_filter.is_skipped(p, self.get_model_inputs)
+                    and (not is_hidden(p) or p.is_dir()),
                     pathlib.Path.iterdir(directory_path),
                 )
             )
@@ -92,6 +132,64 @@ class TaskBase(ABC):
 
         return filtered_paths.__iter__()
 
+    def get_model_inputs(self, model: pathlib.Path) -> List[pathlib.Path]:
+        """Get the files and directories a model is built from for change scoping."""
+        return [model]
+
+    def run_for_models(
+        self,
+        models: Iterable[pathlib.Path],
+        func: Callable[[pathlib.Path], None],
+        jobs: Optional[int] = 1,
+    ) -> None:
+        """
+        Run a function for every model, in a process pool with more than one job.
+
+        Args:
+            models: Models to run the function for
+            func: Picklable function processing one model
+            jobs: Number of worker processes, 0 or None for the CPU count
+
+        Notes: Models are independent, so the outputs are the same as when they
+        are processed one at a time. Either way all models are processed and the
+        failures are reported together in model order. Errors other than a
+        TaskException are logged with their traceback and the first of them is
+        chained to the raised TaskException.
+        """
+        models = list(models)
+        workers = min(resolve_jobs(jobs), len(models))
+        errors: List[str] = list()
+        unexpected: Optional[Exception] = None
+        if workers <= 1:
+            for model in models:
+                try:
+                    func(model)
+                except Exception as e:
+                    errors.append(self._get_model_error(model, e))
+                    if not isinstance(e, TaskException):
+                        unexpected = unexpected or e
+        else:
+            logger.debug(f"Processing {len(models)} models with {workers} workers")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(func, model) for model in models]
+                for model, future in zip(models, futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(self._get_model_error(model, e))
+                        if not isinstance(e, TaskException):
+                            unexpected = unexpected or e
+        if errors:
+            raise TaskException("\n".join(errors)) from unexpected
+
+    @staticmethod
+    def _get_model_error(model: pathlib.Path, error: Exception) -> str:
+        """Get the message of a model failure, logging unexpected errors."""
+        if isinstance(error, TaskException):
+            return str(error)
+        logger.error(f"Unexpected error processing model {model}", exc_info=error)
+        return f"Unexpected {type(error).__name__} processing model {model}: {error}"
+
     @abstractmethod
     def execute(self) -> int:
         """Execute the task and return the exit code"""
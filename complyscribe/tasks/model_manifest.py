@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+
+"""ComplyScribe manifest of the models processed by tasks"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from complyscribe.const import COMPLYSCRIBE_CONFIG_DIR
+from complyscribe.utils import read_json_cache
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "autosync-manifest.json"
+
+
+class ModelManifest:
+    """
+    Content hashes of the inputs of models after a task processed them.
+
+    Notes: A task records, per model, a hash of the content of every file the
+    model is built from after processing it. Models whose inputs hash the same
+    on the next run are unchanged and skipped. Hashes are taken from file content,
+    not modification times, so the manifest stays valid in fresh clones. The
+    state of every recorded model is taken again when the manifest is saved, so
+    changes made by later tasks of the same run are not seen as changed inputs
+    on the next run. The manifest is stored in the .complyscribe directory of
+    the workspace, unless it is read only.
+    """
+
+    VERSION = 1
+
+    def __init__(self, working_dir: str, read_only: bool = False) -> None:
+        """
+        Initialize the manifest.
+
+        Args:
+            working_dir: Root of the trestle workspace
+            read_only: Skip unchanged models without writing the manifest file,
+            e.g. for dry runs
+        """
+        self.working_dir = pathlib.Path(working_dir)
+        self.manifest_file = self.working_dir.joinpath(
+            COMPLYSCRIBE_CONFIG_DIR, MANIFEST_FILE
+        )
+        self.read_only = read_only
+        self._entries: Dict[str, str] = dict()
+        # Task key -> models and state function recorded by the task
+        self._recorded: Dict[
+            str, Tuple[List[pathlib.Path], Callable[[pathlib.Path], str]]
+        ] = dict()
+        # Path -> (mtime_ns, size, sha256) of files hashed by this instance
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = dict()
+
+    def load(self) -> None:
+        """Load the manifest file if it exists."""
+        data = read_json_cache(self.manifest_file)
+        if isinstance(data, dict) and data.get("version") == self.VERSION:
+            self._entries = data.get("models", {})
+
+    def save(self) -> None:
+        """Record the state of the recorded models again and write the manifest file."""
+        for task_key, (models, get_state) in self._recorded.items():
+            for model in models:
+                self._entries[f"{task_key}:{model.name}"] = get_state(model)
+        if self.read_only:
+            return
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.VERSION, "models": self._entries},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+
+    def _hash_file(self, path: str) -> str:
+        """Hash the content of a file, reusing the hash while it is unchanged."""
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def get_state(self, inputs: Iterable[pathlib.Path], *params: str) -> str:
+        """
+        Hash the content of input files and directories and task parameters.
+
+        Args:
+            inputs: Files and directories, missing ones are hashed as missing
+            params: Task parameters that change the output
+        """
+        digest = hashlib.sha256()
+        for param in params:
+            digest.update(f"param:{param}\n".encode("utf-8"))
+        for path in inputs:
+            files: List[str] = list()
+            if path.is_dir():
+                for dir_path, dir_names, file_names in os.walk(path):
+                    dir_names.sort()
+                    files.extend(os.path.join(dir_path, name) for name in file_names)
+            elif path.is_file():
+                files.append(str(path))
+            else:
+                digest.update(f"missing:{path}\n".encode("utf-8"))
+            for file in sorted(files):
+                rel_path = os.path.relpath(file, self.working_dir)
+                digest.update(f"{rel_path}:{self._hash_file(file)}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def select_changed(
+        self,
+        task_key: str,
+        models: Iterable[pathlib.Path],
+        get_state: Callable[[pathlib.Path], str],
+    ) -> List[pathlib.Path]:
+        """
+        Get the models whose inputs changed since a task last processed them.
+
+        Args:
+            task_key: Key of the task and its settings
+            models: Models the task would process
+            get_state: Function hashing the inputs of a model
+        """
+        models = list(models)
+        changed = [
+            model for model in models if self._is_changed(task_key, model, get_state)
+        ]
+        logger.info(
+            f"Skipping {len(models) - len(changed)} unchanged models, "
+            f"{len(changed)} models to process for {task_key}"
+        )
+        return changed
+
+    def _is_changed(
+        self,
+        task_key: str,
+        model: pathlib.Path,
+        get_state: Callable[[pathlib.Path], str],
+    ) -> bool:
+        """Check if the inputs of a model changed since it was recorded."""
+        return self._entries.get(f"{task_key}:{model.name}") != get_state(model)
+
+    def run_changed(
+        self,
+        task_key: str,
+        models: Iterable[pathlib.Path],
+        get_state: Callable[[pathlib.Path], str],
+        get_dependencies: Callable[[pathlib.Path], Set[str]],
+        run: Callable[[List[pathlib.Path]], None],
+    ) -> None:
+        """
+        Run a task for the models whose inputs changed and record all models.
+
+        Args:
+            task_key: Key of the task and its settings
+            models: Models the task would process
+            get_state: Function hashing the inputs of a model
+            get_dependencies: Function getting the names of the models a model
+            depends on
+            run: Function processing a list of models
+
+        Notes: Changed models run after the changed models they depend on. Models
+        whose inputs changed because a model they depend on was processed run in
+        the same task, so dependents are never left behind.
+        """
+        models = list(models)
+        changed = self.select_changed(task_key, models, get_state)
+        done: Set[str] = set()
+        while changed:
+            changed_names = {model.name for model in changed}
+            ready = [
+                model
+                for model in changed
+                if get_dependencies(model).isdisjoint(changed_names)
+            ]
+            # Models depending on each other run together
+            ready = ready or changed
+            run(ready)
+            self.record(task_key, ready, get_state)
+            done.update(model.name for model in ready)
+            changed = [
+                model
+                for model in models
+                if model.name not in done
+                and self._is_changed(task_key, model, get_state)
+            ]
+        self.record(task_key, models, get_state)
+
+    def record(
+        self,
+        task_key: str,
+        models: Iterable[pathlib.Path],
+        get_state: Callable[[pathlib.Path], str],
+    ) -> None:
+        """
+        Record the inputs of models after a task processed them.
+
+        Notes: The models recorded last for a task are recorded again on `save`.
+        """
+        models = list(models)
+        for model in models:
+            self._entries[f"{task_key}:{model.name}"] = get_state(model)
+        self._recorded[task_key] = (models, get_state)
@@ -4,10 +4,11 @@
 
 """ComplyScribe Regenerate Tasks"""
 
+import functools
 import logging
 import os
 import pathlib
-from typing import Optional
+from typing import List, Optional, Set
 
 from complyscribe import const
 from complyscribe.tasks.authored import types
@@ -16,6 +17,7 @@ from complyscribe.tasks.authored.base_authored import (
     AuthoredObjectException,
 )
 from complyscribe.tasks.base_task import ModelFilter, TaskBase, TaskException
+from complyscribe.tasks.model_manifest import ModelManifest
 
 
 logger = logging.getLogger(__name__)
@@ -31,6 +33,8 @@ class RegenerateTask(TaskBase):
         authored_object: AuthoredObjectBase,
         markdown_dir: str,
         model_filter: Optional[ModelFilter] = None,
+        jobs: Optional[int] = 1,
+        manifest: Optional[ModelManifest] = None,
     ) -> None:
         """
         Initialize regenerate task.
@@ -40,10 +44,15 @@ class RegenerateTask(TaskBase):
             markdown_dir: Location of directory to write Markdown in
             model_filter: Optional filter to apply to the task to include or exclude models
             from processing.
+            jobs: Number of models regenerated in parallel, 0 or None for the CPU count
+            manifest: Optional manifest to skip models with unchanged inputs and
+            record the processed models in
         """
 
         self._authored_object = authored_object
         self._markdown_dir = markdown_dir
+        self._jobs = jobs
+        self._manifest = manifest
         working_dir = self._authored_object.get_trestle_root()
         super().__init__(working_dir, model_filter)
 
@@ -61,16 +70,54 @@ class RegenerateTask(TaskBase):
         model_dir = types.get_trestle_model_dir(self._authored_object)
 
         search_path = os.path.join(self.working_dir, model_dir)
-        for model in self.iterate_models(pathlib.Path(search_path)):
-            logger.info(f"Regenerating model {model}")
-            model_base_name = os.path.basename(model)
-            model_path = os.path.join(model_dir, model_base_name)
-
-            try:
-                self._authored_object.regenerate(
-                    model_path=model_path, markdown_path=self._markdown_dir
-                )
-            except AuthoredObjectException as e:
-                raise TaskException(f"Regenerate task failed for model {model}: {e}")
-
+        models = list(self.iterate_models(pathlib.Path(search_path)))
+        run = functools.partial(
+            self.run_for_models,
+            func=functools.partial(self._regenerate_model, model_dir),
+            jobs=self._jobs,
+        )
+        manifest = self._manifest
+        if manifest is None:
+            run(models)
+            return const.SUCCESS_EXIT_CODE
+
+        manifest.run_changed(
+            f"regenerate:{model_dir}:{self._markdown_dir}",
+            models,
+            functools.partial(self._get_model_state, manifest),
+            self._get_model_dependencies,
+            run,
+        )
+        manifest.save()
         return const.SUCCESS_EXIT_CODE
+
+    def _get_model_state(self, manifest: ModelManifest, model: pathlib.Path) -> str:
+        """Hash the inputs of a model."""
+        return manifest.get_state(
+            types.get_model_inputs(
+                self._authored_object, self._markdown_dir, model.name
+            )
+        )
+
+    def get_model_inputs(self, model: pathlib.Path) -> List[pathlib.Path]:
+        """Get the paths whose changes affect a model, by model name."""
+        return types.get_model_change_inputs(
+            self._authored_object, self._markdown_dir, model.name
+        )
+
+    def _get_model_dependencies(self, model: pathlib.Path) -> Set[str]:
+        """Get the names of the models of the same type a model depends on."""
+        return types.get_model_dependency_names(self._authored_object, model.name)
+
+    def _regenerate_model(self, model_dir: str, model: pathlib.Path) -> None:
+        """Regenerate the markdown of one object."""
+        logger.info(f"Regenerating model {model}")
+        model_base_name = os.path.basename(model)
+        model_path = os.path.join(model_dir, model_base_name)
+
+        try:
+            self._authored_object.regenerate(
+                model_path=model_path, markdown_path=self._markdown_dir
+            )
+        except AuthoredObjectException as e:
+            raise TaskException(f"Regenerate task failed for model {model}: {e}")
@@ -10,7 +10,8 @@ import logging
 import os
 import pathlib
 import re
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Set
 
 import ssg
 from ssg.controls import Policy
@@ -23,6 +24,7 @@ from trestle.oscal import common
 from trestle.oscal.catalog import Catalog, Control, Group
 
 from complyscribe import const
+from complyscribe.cac_index import PolicyIndex
 from complyscribe.tasks.base_task import TaskBase
 
 
@@ -135,6 +137,88 @@ def control_cac_to_oscal(
     return oscal_control
 
 
+class CatalogIndex:
+    """
+    Index of the groups and child controls of an OSCAL catalog by id.
+
+    Notes: Child controls are indexed per parent object, on first lookup, so a
+    lookup finds the same control as scanning the controls of that parent. As
+    with a scan, the first of duplicate ids wins. Groups and controls have to be
+    added through the index to keep it up to date.
+    """
+
+    def __init__(self, catalog: Catalog) -> None:
+        """Index the groups of a catalog."""
+        self._catalog = catalog
+        self._groups: Dict[str, Group] = dict()
+        for group in catalog.groups or []:
+            self._groups.setdefault(group.id, group)
+        self._children: Dict[int, Dict[str, Control]] = dict()
+
+    def get_group(self, group_id: str) -> Optional[Group]:
+        """Get a group by id."""
+        return self._groups.get(group_id)
+
+    def add_group(self, group: Group) -> None:
+        """Append a group to the catalog."""
+        self._catalog.groups.append(group)
+        self._groups.setdefault(group.id, group)
+
+    def get_control(
+        self, parent: Control | Group, control_id: str
+    ) -> Optional[Control]:
+        """Get a child control of a group or control by id."""
+        return self._get_children(parent).get(control_id)
+
+    def add_control(self, parent: Control | Group, control: Control) -> None:
+        """Append a child control to a group or control."""
+        children = self._get_children(parent)
+        parent.controls.append(control)
+        children.setdefault(control.id, control)
+
+    def _get_children(self, parent: Control | Group) -> Dict[str, Control]:
+        """Get the index of the child controls of a parent."""
+        children = self._children.get(id(parent))
+        if children is None:
+            children = dict()
+            for control in parent.controls or []:
+                children.setdefault(control.id, control)
+            self._children[id(parent)] = children
+        return children
+
+
+def merge_control(matched_control: Control, new_control: Control) -> None:
+    """
+    Merge the params, props, links and parts of a new control into a control.
+
+    Notes: Entries are only added to lists the matched control already has.
+    """
+    if new_control.params and matched_control.params:
+        param_ids: Set[str] = {mp.id for mp in matched_control.params}
+        for new_param in new_control.params:
+            if new_param.id not in param_ids:
+                matched_control.params.append(new_param)
+                param_ids.add(new_param.id)
+    if new_control.props and matched_control.props:
+        prop_names: Set[str] = {mp.name for mp in matched_control.props}
+        for new_prop in new_control.props:
+            if new_prop.name not in prop_names:
+                matched_control.props.append(new_prop)
+                prop_names.add(new_prop.name)
+    if new_control.links and matched_control.links:
+        link_hrefs: Set[str] = {mp.href for mp in matched_control.links}
+        for new_link in new_control.links:
+            if new_link.href not in link_hrefs:
+                matched_control.links.append(new_link)
+                link_hrefs.add(new_link.href)
+    if new_control.parts and matched_control.parts:
+        part_ids: Set[Optional[str]] = {mp.id for mp in matched_control.parts}
+        for new_part in new_control.parts:
+            if new_part.id not in part_ids:
+                matched_control.parts.append(new_part)
+                part_ids.add(new_part.id)
+
+
 class SyncCacCatalogTask(TaskBase):
     """Sync CaC policy controls to OSCAL catalog task."""
 
@@ -157,8 +241,23 @@ class SyncCacCatalogTask(TaskBase):
         self.rules: List[str] = []
 
     def _load_policy_controls(self) -> Policy:
-        """Load a CaC policy."""
+        """
+        Load a CaC policy.
+
+        Notes: The policy file is found through the policy index. Only if the
+        index has no loadable file for the policy id are all policies loaded.
+        """
         cac_controls_path = self.cac_content_root / "controls"
+        policy_file = PolicyIndex.for_dir(str(cac_controls_path)).find(self.policy_id)
+        if policy_file is not None:
+            try:
+                policy = Policy(policy_file)
+                policy.load()
+                if policy.id == self.policy_id:
+                    return policy
+            except Exception as e:
+                logger.debug("Failed to load Policy %s", policy_file, exc_info=e)
+        logger.debug(f"Policy {self.policy_id} not indexed, loading all policies")
         for policy_yaml in itertools.chain(
             cac_controls_path.rglob("*.[Yy][Mm][Ll]"),
             cac_controls_path.rglob("*.[Yy][Aa][Mm][Ll]"),
@@ -182,6 +281,8 @@ class SyncCacCatalogTask(TaskBase):
         policy: Policy,
     ) -> None:
         """Update an OSCAL catalog from a CaC Policy."""
+        start = time.perf_counter()
+        index = CatalogIndex(oscal_catalog)
         for cac_control in policy.controls:
             # 1. extract oscal-compatible identifiers
             group_id, *control_path = [
@@ -189,20 +290,16 @@ class SyncCacCatalogTask(TaskBase):
             ]
             # 2. find the correct place in oscal
             # 2a. find the group
-            group = None
             # Warning: the line below is only compatible with pydantic 1
             # and will need to be updated if trestle updates to pydantic 2
             if Group.__fields__["id"].type_.regex.match(group_id) is None:
                 group_id = f"{policy.id}_{group_id}"
-            for g in oscal_catalog.groups:
-                if g.id == group_id:
-                    group = g
-                    break
+            group = index.get_group(group_id)
             # 2b. If the group doesn't exist, create it
             if not group:
                 group = generate_sample_model(Group)
                 group.id = group_id
-                oscal_catalog.groups.append(group)
+                index.add_group(group)
             if not group.controls:
                 group.controls = []
             parent = group
@@ -212,20 +309,17 @@ class SyncCacCatalogTask(TaskBase):
                 # search the controls for the next path until the last path part
                 for parent_path_len in range(1, len(control_path)):
                     parent_id = f"{group_id}-{'.'.join(control_path[:parent_path_len])}"
-                    found = False
-                    for control in parent.controls:
-                        if control.id == parent_id:
-                            if not control.controls:
-                                control.controls = []
-                            parent = control
-                            found = True
-                            break
-                    if not found:
+                    control = index.get_control(parent, parent_id)
+                    if control:
+                        if not control.controls:
+                            control.controls = []
+                        parent = control
+                    else:
                         # insert an empty parent control
                         control = generate_sample_model(Control)
                         control.controls = []
                         control.id = parent_id
-                        parent.controls.append(control)
+                        index.add_control(parent, control)
                         parent = control
             # 4. Find the associated oscal control to the cac control
             # 4a. Map the cac control onto a new oscal control
@@ -233,44 +327,17 @@ class SyncCacCatalogTask(TaskBase):
                 cac_control, group_id, control_path, parent
             )
             # 4b. Find a control to merge into
-            matched_control = None
-            for control in parent.controls:
-                if control.id == new_control.id:
-                    matched_control = control
-                    break
+            matched_control = index.get_control(parent, new_control.id)
             # 4c. Merge mapped cac control into oscal control
             # (note: CatalogAPI.merge_catalog doesn't work for this)
             if not matched_control:
-                parent.controls.append(new_control)
+                index.add_control(parent, new_control)
             else:
-                # 4c1. params
-                if new_control.params:
-                    for new_param in new_control.params:
-                        if matched_control.params:
-                            matched_params = [mp.id for mp in matched_control.params]
-                            if new_param.id not in matched_params:
-                                matched_control.params.append(new_param)
-                # 4c2. props
-                if new_control.props:
-                    for new_prop in new_control.props:
-                        if matched_control.props:
-                            matched_props = [mp.name for mp in matched_control.props]
-                            if new_prop.name not in matched_props:
-                                matched_control.props.append(new_prop)
-                # 4c3. links
-                if new_control.links:
-                    for new_link in new_control.links:
-                        if matched_control.links:
-                            matched_links = [mp.href for mp in matched_control.links]
-                            if new_link.href not in matched_links:
-                                matched_control.links.append(new_link)
-                # 4c4. parts
-                if new_control.parts:
-                    for new_part in new_control.parts:
-                        if matched_control.parts:
-                            matched_parts = [mp.id for mp in matched_control.parts]
-                            if new_part.id not in matched_parts:
-                                matched_control.parts.append(new_part)
+                merge_control(matched_control, new_control)
+        logger.debug(
+            f"Synced {len(policy.controls)} controls of {policy.id} "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
 
     def _create_or_update_catalog(self, policy: Policy) -> None:
         """Create or update catalog for specified CaC profile."""
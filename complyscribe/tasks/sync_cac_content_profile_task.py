@@ -67,7 +67,9 @@ class SyncCacContentProfileTask(TaskBase):
             filter_by_level: List[str]: User indicated baseline level that will be used to
             filter control files.
         """
-        control_manager = load_controls_manager(self.cac_content_root, self.product)
+        control_manager = load_controls_manager(
+            self.cac_content_root, self.product, policy_ids=[policy_id]
+        )
 
         # accessing control file within content/controls
         # ControlsManager() object can access methods for handling controls.
@@ -7,11 +7,23 @@ import logging
 import os
 import pathlib
 import re
-from typing import Dict, List, Optional, Pattern
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+)
 
 # from ssg.products import get_all
-from ssg.controls import Control, Status
-from ssg.profiles import _load_yaml_profile_file, get_profiles_from_products
+from ssg.controls import Control, ControlsManager, Status
+from ssg.profiles import _load_yaml_profile_file
 from trestle.common.common_types import TypeWithProps
 from trestle.common.const import (
     IMPLEMENTATION_STATUS,
@@ -23,8 +35,6 @@ from trestle.common.list_utils import as_list, none_if_empty
 from trestle.common.model_utils import ModelUtils
 from trestle.core.generators import generate_sample_model
 from trestle.core.models.file_content_type import FileContentType
-from trestle.core.profile_resolver import ProfileResolver
-from trestle.oscal.catalog import Catalog
 from trestle.oscal.common import Property
 from trestle.oscal.component import (
     ComponentDefinition,
@@ -34,8 +44,11 @@ from trestle.oscal.component import (
     SetParameter,
     Statement,
 )
+from trestle.tasks.csv_to_oscal_cd import RULE_ID
 
 from complyscribe import const
+from complyscribe.cac_index import ExpandedRuleCache
+from complyscribe.oscal_stream import StreamedModel, write_oscal_json
 from complyscribe.tasks.authored.profile import CatalogControlResolver
 from complyscribe.tasks.base_task import TaskBase
 from complyscribe.transformers.cac_transformer import (
@@ -44,8 +57,9 @@ from complyscribe.transformers.cac_transformer import (
     add_prop,
     get_component_info,
     get_validation_component_mapping,
+    iter_validation_component_mapping,
 )
-from complyscribe.utils import load_controls_manager
+from complyscribe.utils import ProductContext, load_controls_manager
 
 
 logger = logging.getLogger(__name__)
@@ -53,6 +67,161 @@ logger = logging.getLogger(__name__)
 SECTION_PATTERN = r"Section ([a-z]):"
 
 
+@dataclass
+class ChangeSummary:
+    """Counts of the entries added, changed, removed and kept by an update."""
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def updated(self) -> bool:
+        """Whether any entry was added, changed or removed."""
+        return bool(self.added or self.changed or self.removed)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.added} added, {self.changed} changed, {self.removed} removed, "
+            f"{self.unchanged} unchanged"
+        )
+
+
+def _group_rule_props(props: Optional[List[Property]]) -> Dict[str, List[Property]]:
+    """
+    Group props by the rule id of their rule set, keeping their order.
+
+    Notes: Rule set ids are positional, so props are grouped by rule set id first
+    and each group is keyed by the value of its rule id prop. Groups without a rule
+    id prop keep the rule set id as key.
+    """
+    rule_sets: Dict[str, List[Property]] = dict()
+    for prop in as_list(props):
+        rule_sets.setdefault(prop.remarks or "", []).append(prop)
+    by_rule_id: Dict[str, List[Property]] = dict()
+    for rule_set_id, rule_set in rule_sets.items():
+        rule_id = next(
+            (prop.value for prop in rule_set if prop.name == RULE_ID), rule_set_id
+        )
+        by_rule_id[rule_id] = rule_set
+    return by_rule_id
+
+
+def merge_rule_props(
+    old_props: Optional[List[Property]],
+    new_props: Optional[List[Property]],
+    summary: ChangeSummary,
+) -> Optional[List[Property]]:
+    """
+    Merge the props of a component by rule id.
+
+    Notes: Rule sets are matched by rule id, so inserting or removing a rule does
+    not change the rule sets after it. The props of unchanged rule sets are kept
+    as they are, renumbered to the new rule set id when needed. The props of new
+    and changed rule sets are taken from the new props, in their order.
+    """
+    old_rule_sets = _group_rule_props(old_props)
+    merged: List[Property] = list()
+    for rule_id, props in _group_rule_props(new_props).items():
+        old_rule_set = old_rule_sets.pop(rule_id, None)
+        if old_rule_set is None:
+            summary.added += 1
+            merged.extend(props)
+            continue
+        rule_set_id = props[0].remarks
+        if any(prop.remarks != rule_set_id for prop in old_rule_set):
+            old_rule_set = [
+                prop.copy(update={"remarks": rule_set_id}) for prop in old_rule_set
+            ]
+        if ModelUtils.models_are_equivalent(old_rule_set, props, ignore_all_uuid=True):
+            summary.unchanged += 1
+            props = old_rule_set
+        else:
+            summary.changed += 1
+        merged.extend(props)
+    summary.removed += len(old_rule_sets)
+    return none_if_empty(merged)
+
+
+def merge_implemented_requirements(
+    old_reqs: List[ImplementedRequirement],
+    new_reqs: List[ImplementedRequirement],
+    summary: ChangeSummary,
+) -> List[ImplementedRequirement]:
+    """
+    Merge the implemented requirements of a control implementation by control id.
+
+    Notes: Unchanged implemented requirements are kept as they are. Changed ones
+    are taken from the new requirements with the UUIDs of the requirement and its
+    statements preserved.
+    """
+    old_by_control_id = {req.control_id: req for req in old_reqs}
+    merged: List[ImplementedRequirement] = list()
+    for new_req in new_reqs:
+        old_req = old_by_control_id.pop(new_req.control_id, None)
+        if old_req is None:
+            summary.added += 1
+            merged.append(new_req)
+        elif ModelUtils.models_are_equivalent(old_req, new_req, ignore_all_uuid=True):
+            summary.unchanged += 1
+            merged.append(old_req)
+        else:
+            summary.changed += 1
+            new_req.uuid = old_req.uuid
+            old_statements = {
+                statement.statement_id: statement
+                for statement in as_list(old_req.statements)
+            }
+            for statement in as_list(new_req.statements):
+                if statement.statement_id in old_statements:
+                    statement.uuid = old_statements[statement.statement_id].uuid
+            merged.append(new_req)
+    summary.removed += len(old_by_control_id)
+    return merged
+
+
+def merge_control_implementations(
+    old_cis: Optional[List[ControlImplementation]],
+    new_cis: Optional[List[ControlImplementation]],
+    summary: ChangeSummary,
+) -> Tuple[Optional[List[ControlImplementation]], bool]:
+    """
+    Merge control implementations by source and their requirements by control id.
+
+    Returns:
+        The merged control implementations and whether any control implementation
+        was added or removed or has changed outside of its implemented
+        requirements.
+    """
+    old_by_source = {ci.source: ci for ci in as_list(old_cis)}
+    merged: List[ControlImplementation] = list()
+    changed = False
+    for new_ci in as_list(new_cis):
+        old_ci = old_by_source.pop(new_ci.source, None)
+        if old_ci is None:
+            changed = True
+            summary.added += len(new_ci.implemented_requirements)
+            merged.append(new_ci)
+            continue
+        # Compare everything but the implemented requirements
+        if not ModelUtils.models_are_equivalent(
+            old_ci.copy(update={"implemented_requirements": []}),
+            new_ci.copy(update={"implemented_requirements": []}),
+            ignore_all_uuid=True,
+        ):
+            changed = True
+        new_ci.uuid = old_ci.uuid
+        new_ci.implemented_requirements = merge_implemented_requirements(
+            old_ci.implemented_requirements, new_ci.implemented_requirements, summary
+        )
+        merged.append(new_ci)
+    for old_ci in old_by_source.values():
+        changed = True
+        summary.removed += len(old_ci.implemented_requirements)
+    return none_if_empty(merged), changed
+
+
 class OscalStatus:
     """
     Represent the status of a control in OSCAL.
@@ -100,15 +269,47 @@ class SyncCacContentTask(TaskBase):
         compdef_type: str,
         oscal_profile: str,
         working_dir: str,
+        jobs: int = 1,
+        use_cache: bool = True,
+        controls_manager: Optional[ControlsManager] = None,
+        stream: bool = False,
+        incremental: bool = False,
     ) -> None:
-        """Initialize CaC content sync task."""
+        """
+        Initialize CaC content sync task.
+
+        Args:
+            product: Product to build the component definition for
+            cac_profile: Path of the CaC profile
+            cac_content_root: Root of the CaC content project
+            compdef_type: Type of the component
+            oscal_profile: Profile href, or name of the profile in the trestle workspace
+            working_dir: Trestle workspace to write the component definition to
+            jobs: Number of processes used to expand rule files, 0 for the CPU count
+            use_cache: Reuse rules expanded by earlier runs from the complyscribe
+            cache directory
+            controls_manager: Optional loaded controls manager of the product to
+            share between tasks
+            stream: Write new component definitions while they are created instead
+            of building them in memory first
+            incremental: Update only the changed rule sets and implemented
+            requirements of an existing component definition
+        """
 
         self.product: str = product
         self.cac_profile: str = cac_profile
         self.cac_content_root: str = cac_content_root
         self.compdef_type: str = compdef_type
         self.oscal_profile: str = oscal_profile
+        self.jobs: int = jobs
+        self.use_cache: bool = use_cache
+        self.controls_manager: Optional[ControlsManager] = controls_manager
+        self.stream: bool = stream
+        self.incremental: bool = incremental
+        self.change_summary: Dict[str, ChangeSummary] = dict()
         self.rules: List[str] = []
+        # Set of the selected rules for membership checks across all controls
+        self.rule_selection: FrozenSet[str] = frozenset()
         self.controls: List[Control] = list()
         self.rules_by_id: Dict[str, RuleInfo] = dict()
 
@@ -117,50 +318,80 @@ class SyncCacContentTask(TaskBase):
         self.profile_href: str = ""
         self.profile_path: str = ""
         self.catalog_helper = CatalogControlResolver()
+        self._product_context: Optional[ProductContext] = None
+        self.implemented_requirements_seconds: float = 0.0
 
         super().__init__(working_dir, None)
 
+    @property
+    def product_context(self) -> ProductContext:
+        """Get the product context shared by everything loaded for the product."""
+        if self._product_context is None:
+            self._product_context = ProductContext.for_product(
+                self.cac_content_root, self.product
+            )
+        return self._product_context
+
     def _collect_rules(self) -> None:
         """Collect all rules from the product profile."""
-        profiles = get_profiles_from_products(self.cac_content_root, [self.product])
-        for profile in profiles:
-            if profile.profile_id == self.cac_profile_id:
-                self.rules = list(
-                    filter(lambda x: x not in profile.unselected_rules, profile.rules)
-                )
-                break
+        profile = self.product_context.get_profile(self.cac_profile_id)
+        if profile is not None:
+            unselected_rules = set(profile.unselected_rules)
+            self.rules = list(
+                filter(lambda x: x not in unselected_rules, profile.rules)
+            )
+        self.rule_selection = frozenset(self.rules)
 
     def _get_rules_properties(self) -> List[Property]:
         """Create all top-level component properties for rules."""
+        return list(self._iter_rules_properties())
+
+    def _iter_rules_properties(self) -> Iterator[Property]:
+        """
+        Load the rules and yield the top-level component properties for them.
+
+        Notes: The rules are loaded into `rules_by_id` when this is called, the
+        properties are created one rule at a time.
+        """
         rules_transformer = RulesTransformer(
             self.cac_content_root,
             self.product,
             self.cac_profile,
+            product_context=self.product_context,
+            jobs=self.jobs,
+            rule_cache=ExpandedRuleCache.for_dir() if self.use_cache else None,
         )
         rules_transformer.add_rules(self.rules)
         self.rules_by_id = rules_transformer.get_all_rule_objs()
         rules: List[RuleInfo] = list(self.rules_by_id.values())
-        all_rule_properties: List[Property] = rules_transformer.transform(rules)
-        return all_rule_properties
+        return rules_transformer.iter_transform(rules)
 
     def _add_props(self, oscal_component: DefinedComponent) -> DefinedComponent:
         """Add props to OSCAL component."""
-        product_name, full_name = get_component_info(
-            self.product, self.cac_content_root
-        )
+        self._add_component_info(oscal_component)
         all_rule_properties = self._get_rules_properties()
         props = none_if_empty(all_rule_properties)
-        oscal_component.type = self.compdef_type
 
+        if oscal_component.type == "validation":
+            oscal_component.props = none_if_empty(
+                get_validation_component_mapping(props)
+            )
+        else:
+            oscal_component.props = props
+        return oscal_component
+
+    def _add_component_info(self, oscal_component: DefinedComponent) -> None:
+        """Add the type, title and description to OSCAL component."""
+        oscal_component.type = self.compdef_type
         if oscal_component.type == "validation":
             oscal_component.title = "openscap"
             oscal_component.description = "openscap"
-            oscal_component.props = get_validation_component_mapping(props)
         else:
+            product_name, full_name = get_component_info(
+                self.product, self.cac_content_root, self.product_context
+            )
             oscal_component.title = product_name
             oscal_component.description = full_name
-            oscal_component.props = props
-        return oscal_component
 
     def _get_source(self, profile_name_or_href: str) -> None:
         """Get the href and source of the profile."""
@@ -175,25 +406,34 @@ class SyncCacContentTask(TaskBase):
 
     def _get_controls(self) -> None:
         """Collect controls selected by profile."""
-        controls_manager = load_controls_manager(self.cac_content_root, self.product)
-        policies = controls_manager.policies
         profile_yaml = _load_yaml_profile_file(self.cac_profile)
         selections = profile_yaml.get("selections", [])
-        for selected in selections:
-            if ":" in selected:
-                parts = selected.split(":")
-                policy_id = parts[0]
-                policy = policies.get(policy_id)
-                if policy is not None:
-                    if len(parts) == 3:
-                        levels = [parts[2]]
-                    else:
-                        levels = [level.id for level in policy.levels]
-
-                    for level in levels:
-                        self.controls.extend(
-                            controls_manager.get_all_controls_of_level(policy_id, level)
-                        )
+        policy_selections = [selected for selected in selections if ":" in selected]
+        controls_manager = self.controls_manager
+        if controls_manager is None:
+            controls_manager = load_controls_manager(
+                self.cac_content_root,
+                self.product,
+                self.product_context,
+                policy_ids=sorted(
+                    {selected.split(":")[0] for selected in policy_selections}
+                ),
+            )
+        policies = controls_manager.policies
+        for selected in policy_selections:
+            parts = selected.split(":")
+            policy_id = parts[0]
+            policy = policies.get(policy_id)
+            if policy is not None:
+                if len(parts) == 3:
+                    levels = [parts[2]]
+                else:
+                    levels = [level.id for level in policy.levels]
+
+                for level in levels:
+                    self.controls.extend(
+                        controls_manager.get_all_controls_of_level(policy_id, level)
+                    )
 
     @staticmethod
     def _build_sections_dict(
@@ -312,8 +552,7 @@ class SyncCacContentTask(TaskBase):
     ) -> None:
         """Add rules to a type with props."""
         all_props: List[Property] = as_list(type_with_props.props)
-        all_rule_ids = self.rules_by_id.keys()
-        error_rules = list(filter(lambda x: x not in all_rule_ids, rule_ids))
+        error_rules = list(filter(lambda x: x not in self.rules_by_id, rule_ids))
         if error_rules:
             raise ValueError(f"Could not find rules: {', '.join(error_rules)}")
         rule_properties: List[Property] = rules_transformer.get_rule_id_props(rule_ids)
@@ -355,41 +594,59 @@ class SyncCacContentTask(TaskBase):
             # Rules and variables are collected from rules section in control files, but for
             # product agnostic control files some rules are unselected or variables are overridden
             # in the profile level of products and should not be included in transformed content.
-            unselected_rules_or_vars = list(
-                filter(lambda x: x not in self.rules, control.rules)
-            )
+            only_rules_in_profile: List[str] = list()
+            unselected_rules_or_vars: List[str] = list()
+            for rule_id in control.rules:
+                if rule_id in self.rule_selection:
+                    only_rules_in_profile.append(rule_id)
+                else:
+                    unselected_rules_or_vars.append(rule_id)
             if unselected_rules_or_vars:
                 logger.info(
                     f"Unselected rules or vars in {self.cac_profile_id} profile for {self.product}:"
                     f"{', '.join(unselected_rules_or_vars)}"
                 )
-            only_rules_in_profile = list(
-                filter(lambda x: x in self.rules, control.rules)
-            )
             rule_ids = self._process_rule_ids(only_rules_in_profile)
             self._attach_rules(implemented_req, rule_ids, rules_transformer)
             return implemented_req
         return None
 
-    def _create_control_implementation(self) -> ControlImplementation:
-        """Create control implementation for a component."""
-        ci = generate_sample_model(ControlImplementation)
-        ci.source = self.profile_href
-        all_implement_reqs = list()
-        self._get_controls()
+    def _iter_implemented_requirements(self) -> Iterator[ImplementedRequirement]:
+        """Create the implemented requirements of the controls one at a time."""
         rules_transformer = RulesTransformer(
             self.cac_content_root,
             self.product,
             self.cac_profile,
+            product_context=self.product_context,
         )
 
+        count = 0
+        start = time.perf_counter()
         for control in self.controls:
             implemented_req = self._create_implemented_requirement(
                 control, rules_transformer
             )
             if implemented_req:
-                all_implement_reqs.append(implemented_req)
-        ci.implemented_requirements = all_implement_reqs
+                count += 1
+                yield implemented_req
+        self.implemented_requirements_seconds = time.perf_counter() - start
+        logger.info(
+            f"Created {count} implemented requirements for "
+            f"{len(self.controls)} controls in "
+            f"{self.implemented_requirements_seconds:.3f}s"
+        )
+
+    def _create_control_implementation(self) -> ControlImplementation:
+        """Create control implementation for a component."""
+        ci = self._new_control_implementation()
+        ci.implemented_requirements = list(self._iter_implemented_requirements())
+        return ci
+
+    def _new_control_implementation(self) -> ControlImplementation:
+        """Create control implementation without implemented requirements."""
+        ci = generate_sample_model(ControlImplementation)
+        ci.source = self.profile_href
+        self._get_controls()
         self._add_set_parameters(ci)
 
         # Add framework prop for complytime consumption. This should be the
@@ -407,22 +664,23 @@ class SyncCacContentTask(TaskBase):
         self, oscal_component: DefinedComponent
     ) -> DefinedComponent:
         """Add control implementations to OSCAL component."""
+        self._load_profile_catalog()
+        control_implementation: ControlImplementation = (
+            self._create_control_implementation()
+        )
+        oscal_component.control_implementations = [control_implementation]
+        return oscal_component
+
+    def _load_profile_catalog(self) -> None:
+        """Load the catalog resolved from the OSCAL profile."""
         self._get_source(self.oscal_profile)
-        profile_resolver = ProfileResolver()
-        resolved_catalog: Catalog = profile_resolver.get_resolved_profile_catalog(
+        self.catalog_helper.load_profile(
             pathlib.Path(self.working_dir),
             self.profile_path,
             block_params=False,
             params_format="[.]",
             show_value_warnings=True,
         )
-        self.catalog_helper.load(resolved_catalog)
-
-        control_implementation: ControlImplementation = (
-            self._create_control_implementation()
-        )
-        oscal_component.control_implementations = [control_implementation]
-        return oscal_component
 
     def _update_compdef(
         self, cd_json: pathlib.Path, oscal_component: DefinedComponent
@@ -435,6 +693,11 @@ class SyncCacContentTask(TaskBase):
             components_titles.append(component.title)
             # Check if the component exists and needs to be updated
             if component.title == oscal_component.title:
+                if self.incremental:
+                    updated = self._update_component_incrementally(
+                        component, oscal_component
+                    )
+                    break
                 if not ModelUtils.models_are_equivalent(
                     component.props, oscal_component.props, ignore_all_uuid=True
                 ):
@@ -474,26 +737,101 @@ class SyncCacContentTask(TaskBase):
         else:
             logger.info(f"No update in component definition: {cd_json}")
 
+    def _update_component_incrementally(
+        self, component: DefinedComponent, oscal_component: DefinedComponent
+    ) -> bool:
+        """
+        Patch the changed rule sets and implemented requirements of a component.
+
+        Returns:
+            Whether the component was updated.
+        """
+        rule_sets = ChangeSummary()
+        props = merge_rule_props(component.props, oscal_component.props, rule_sets)
+        if rule_sets.updated:
+            component.props = props
+
+        implemented_reqs = ChangeSummary()
+        control_implementations, changed = merge_control_implementations(
+            component.control_implementations,
+            oscal_component.control_implementations,
+            implemented_reqs,
+        )
+        if changed or implemented_reqs.updated:
+            component.control_implementations = control_implementations
+
+        self.change_summary = {
+            "rule-sets": rule_sets,
+            "implemented-requirements": implemented_reqs,
+        }
+        logger.info(f"Rule sets of {component.title}: {rule_sets}")
+        logger.info(
+            f"Implemented requirements of {component.title}: {implemented_reqs}"
+        )
+        return rule_sets.updated or changed or implemented_reqs.updated
+
     def _create_compdef(
         self, cd_json: pathlib.Path, oscal_component: DefinedComponent
     ) -> None:
         """Create a component definition in OSCAL."""
-        component_definition = generate_sample_model(ComponentDefinition)
-        component_definition.metadata.title = f"Component definition for {self.product}"
-        component_definition.metadata.version = "1.0"
-        component_definition.components = list()
+        component_definition = self._new_compdef()
         cd_dir = pathlib.Path(os.path.dirname(cd_json))
         cd_dir.mkdir(exist_ok=True, parents=True)
         component_definition.components.append(oscal_component)
         component_definition.oscal_write(cd_json)
         logger.debug(f"Component definition: {cd_json} was created for {self.product}.")
 
-    def _create_or_update_compdef(self) -> None:
-        """Create or update component definition for specified CaC profile."""
+    def _create_compdef_streamed(self, cd_json: pathlib.Path) -> None:
+        """
+        Create a component definition in OSCAL, writing it while it is created.
+
+        Notes: The output is the same as `_create_compdef`, but the rule props and
+        implemented requirements are written as they are created instead of
+        building the component definition in memory first. The rule objects and
+        the controls of the profile are still loaded in memory.
+        """
         oscal_component = generate_sample_model(DefinedComponent)
-        oscal_component = self._add_props(oscal_component)
-        oscal_component = self._add_control_implementations(oscal_component)
+        self._add_component_info(oscal_component)
+        component_fields: Dict[str, Iterable[Any]] = dict()
+        rule_properties = self._iter_rules_properties()
+        if self.rules_by_id:
+            component_fields["props"] = (
+                iter_validation_component_mapping(rule_properties)
+                if oscal_component.type == "validation"
+                else rule_properties
+            )
+        self._load_profile_catalog()
+        component_fields["control_implementations"] = [
+            StreamedModel(
+                self._new_control_implementation(),
+                implemented_requirements=self._iter_implemented_requirements(),
+            )
+        ]
 
+        component_definition = self._new_compdef()
+        cd_dir = pathlib.Path(os.path.dirname(cd_json))
+        cd_dir.mkdir(exist_ok=True, parents=True)
+        write_oscal_json(
+            cd_json,
+            StreamedModel(
+                component_definition,
+                components=[StreamedModel(oscal_component, **component_fields)],
+            ),
+        )
+        logger.debug(
+            f"Component definition: {cd_json} was streamed for {self.product}."
+        )
+
+    def _new_compdef(self) -> ComponentDefinition:
+        """Create a component definition without components."""
+        component_definition = generate_sample_model(ComponentDefinition)
+        component_definition.metadata.title = f"Component definition for {self.product}"
+        component_definition.metadata.version = "1.0"
+        component_definition.components = list()
+        return component_definition
+
+    def _create_or_update_compdef(self) -> None:
+        """Create or update component definition for specified CaC profile."""
         repo_path = pathlib.Path(self.working_dir)
         cd_json: pathlib.Path = ModelUtils.get_model_path_for_name_and_class(
             repo_path,
@@ -502,6 +840,15 @@ class SyncCacContentTask(TaskBase):
             ComponentDefinition,
             FileContentType.JSON,
         )
+        if self.stream and not cd_json.exists():
+            logger.info(f"Streaming component definition for product {self.product}")
+            self._create_compdef_streamed(cd_json)
+            return
+
+        oscal_component = generate_sample_model(DefinedComponent)
+        oscal_component = self._add_props(oscal_component)
+        oscal_component = self._add_control_implementations(oscal_component)
+
         if cd_json.exists():
             logger.info(f"The component definition for {self.product} exists.")
             self._update_compdef(cd_json, oscal_component)
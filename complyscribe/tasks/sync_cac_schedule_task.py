@@ -0,0 +1,568 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""ComplyScribe task to sync all CaC products in dependency order"""
+
+import logging
+import os
+import pathlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from git import GitCommandError, Repo
+from ssg.profiles import _load_yaml_profile_file
+from trestle.common.model_utils import ModelUtils
+from trestle.core.models.file_content_type import FileContentType
+from trestle.oscal.catalog import Catalog
+
+from complyscribe import const
+from complyscribe.cac_index import (
+    MACROS_DIR,
+    POLICY_FILE_SUFFIXES,
+    RULE_CONTENT_DIRS,
+    RULE_FILE,
+    VARIABLE_FILE_SUFFIX,
+    read_policy_id,
+)
+from complyscribe.tasks.authored.profile import AuthoredProfile
+from complyscribe.tasks.base_task import TaskBase, TaskException
+from complyscribe.tasks.sync_cac_catalog_task import SyncCacCatalogTask
+from complyscribe.tasks.sync_cac_content_profile_task import SyncCacContentProfileTask
+from complyscribe.tasks.sync_cac_content_task import SyncCacContentTask
+from complyscribe.utils import (
+    ProductContext,
+    get_cac_products,
+    load_controls_manager,
+    resolve_jobs,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_JOB = "catalog"
+PROFILE_JOB = "profile"
+COMPDEF_JOB = "component-definition"
+ALL_LEVELS = "all"
+
+
+@dataclass
+class SyncJob:
+    """A sync task of the schedule and the ids of the jobs it depends on."""
+
+    job_id: str
+    kind: str
+    args: Dict[str, Any]
+    depends_on: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ChangeImpact:
+    """The CaC content affected by a set of changed files."""
+
+    # Products to sync completely
+    products: Set[str] = field(default_factory=set)
+    # Policies whose controls changed
+    policies: Set[str] = field(default_factory=set)
+    # Product and id of the CaC profiles that changed
+    profiles: Set[Tuple[str, str]] = field(default_factory=set)
+    rules: Set[str] = field(default_factory=set)
+    variables: Set[str] = field(default_factory=set)
+    # Set when a change can affect every product, e.g. of the Jinja macros
+    all_products: bool = False
+
+    def __str__(self) -> str:
+        if self.all_products:
+            return "all products"
+        return (
+            f"{len(self.products)} products, {len(self.policies)} policies, "
+            f"{len(self.profiles)} profiles, {len(self.rules)} rules and "
+            f"{len(self.variables)} variables"
+        )
+
+
+def get_changed_files(cac_content_root: str, git_range: str) -> List[str]:
+    """
+    Get the files of the CaC content changed in a git range.
+
+    Args:
+        cac_content_root: Root of the CaC content project in a git repository
+        git_range: Commit range as accepted by git diff, e.g. main..HEAD
+
+    Returns:
+        The paths of the added, changed and removed files relative to the content
+        root. Renamed files are reported with their old and new path.
+    """
+    try:
+        repo = Repo(cac_content_root, search_parent_directories=True)
+        args = ["--name-only", "--no-renames", git_range]
+        rel_root = os.path.relpath(cac_content_root, repo.working_tree_dir)
+        if rel_root != os.curdir:
+            args.insert(0, f"--relative={rel_root}")
+        output = repo.git.diff(*args)
+    except GitCommandError as e:
+        raise TaskException(f"Failed to get the changes of {git_range}: {e}") from e
+    return [line for line in output.splitlines() if line]
+
+
+def get_change_impact(cac_content_root: str, changed_files: List[str]) -> ChangeImpact:
+    """
+    Map changed files of the CaC content to the content they affect.
+
+    Notes: Policies are identified by the id of the policy file, or of the policy
+    file next to the directory of split control files. Check and remediation files
+    affect their rule, because the rule parameters are read from them. Files that
+    are not used to build OSCAL models, like rule tests, have no impact.
+    """
+    impact = ChangeImpact()
+    for changed_file in changed_files:
+        parts = pathlib.PurePosixPath(changed_file).parts
+        if not parts:
+            continue
+        if changed_file.startswith(f"{MACROS_DIR}/"):
+            impact.all_products = True
+        elif parts[0] == "products" and len(parts) > 2:
+            if parts[2] == "product.yml":
+                impact.products.add(parts[1])
+            elif parts[2] == "profiles" and parts[-1].endswith(".profile"):
+                impact.profiles.add((parts[1], parts[-1].split(".profile")[0]))
+        elif parts[0] == "controls" and parts[-1].lower().endswith(
+            POLICY_FILE_SUFFIXES
+        ):
+            # Control files split into a directory belong to the policy file
+            # named after the directory
+            policy_name = parts[1] if len(parts) > 2 else parts[1].rsplit(".", 1)[0]
+            policy_id = None
+            for suffix in POLICY_FILE_SUFFIXES:
+                policy_file = os.path.join(
+                    cac_content_root, "controls", f"{policy_name}{suffix}"
+                )
+                if os.path.isfile(policy_file):
+                    policy_id = read_policy_id(policy_file)
+                    break
+            impact.policies.add(policy_id or policy_name)
+        elif parts[-1] == RULE_FILE and len(parts) > 1:
+            impact.rules.add(parts[-2])
+        elif rule_id := _get_content_rule_id(cac_content_root, parts):
+            impact.rules.add(rule_id)
+        elif parts[-1].endswith(VARIABLE_FILE_SUFFIX):
+            impact.variables.add(parts[-1].split(VARIABLE_FILE_SUFFIX)[0])
+    return impact
+
+
+def _get_content_rule_id(cac_content_root: str, parts: Tuple[str, ...]) -> str:
+    """Get the id of the rule a check or remediation file belongs to, if any."""
+    for index in range(1, len(parts) - 1):
+        if parts[index] in RULE_CONTENT_DIRS and os.path.isfile(
+            os.path.join(cac_content_root, *parts[:index], RULE_FILE)
+        ):
+            return parts[index - 1]
+    return ""
+
+
+def get_oscal_profile_name(product: str, policy_id: str, level: str) -> str:
+    """Get the name of the OSCAL profile created for a product policy level."""
+    return f"{product}-{policy_id}-{level}"
+
+
+def run_sync_job(job: SyncJob, working_dir: str) -> str:
+    """
+    Create and execute the task of a sync job.
+
+    Notes: Jobs are created from plain data so they can be sent to worker processes.
+
+    Returns:
+        The job id.
+    """
+    args = job.args
+    task: TaskBase
+    if job.kind == CATALOG_JOB:
+        task = SyncCacCatalogTask(
+            cac_content_root=pathlib.Path(args["cac_content_root"]),
+            policy_id=args["policy_id"],
+            oscal_catalog=args["policy_id"],
+            working_dir=working_dir,
+        )
+    elif job.kind == PROFILE_JOB:
+        oscal_catalog_path = ModelUtils.get_model_path_for_name_and_class(
+            pathlib.Path(working_dir), args["policy_id"], Catalog, FileContentType.JSON
+        )
+        task = SyncCacContentProfileTask(
+            cac_content_root=args["cac_content_root"],
+            product=args["product"],
+            oscal_catalog=str(oscal_catalog_path),
+            policy_id=args["policy_id"],
+            filter_by_level=[],
+            authored_profile=AuthoredProfile(trestle_root=working_dir),
+        )
+    elif job.kind == COMPDEF_JOB:
+        task = SyncCacContentTask(
+            args["product"],
+            args["cac_profile"],
+            args["cac_content_root"],
+            args["compdef_type"],
+            args["oscal_profile"],
+            working_dir,
+            use_cache=args["use_cache"],
+        )
+    else:
+        raise TaskException(f"Unknown sync job type {job.kind}")
+    logger.info(f"Running sync job {job.job_id}")
+    task.execute()
+    return job.job_id
+
+
+class SyncCacScheduleTask(TaskBase):
+    """
+    Sync catalogs, profiles and component definitions for CaC products.
+
+    Notes: The product, profile and policy combinations are discovered from the
+    CaC profile selections. A catalog is synced once per policy, an OSCAL profile
+    per product level of the policy and a component definition per CaC profile
+    and selected policy level. Jobs only start once the jobs they depend on have
+    completed. The component definition of a product policy level is written by
+    the first CaC profile selecting it, later profiles selecting the same level
+    are skipped with a warning.
+    """
+
+    def __init__(
+        self,
+        cac_content_root: str,
+        working_dir: str,
+        products: Optional[List[str]] = None,
+        compdef_type: str = "service",
+        jobs: int = 1,
+        use_cache: bool = True,
+        git_range: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the schedule task.
+
+        Args:
+            cac_content_root: Root of the CaC content project
+            working_dir: Trestle workspace to write the OSCAL models to
+            products: Products to sync, defaults to all products of the CaC content
+            compdef_type: Type of the components
+            jobs: Number of worker processes, 0 for the CPU count
+            use_cache: Reuse rules expanded by earlier runs
+            git_range: Optional commit range of the CaC content repository. Only
+            the jobs affected by the files changed in it are run.
+        """
+        self.cac_content_root = cac_content_root
+        self.products: List[str] = products or []
+        self.compdef_type = compdef_type
+        self.jobs = jobs
+        self.use_cache = use_cache
+        self.git_range = git_range
+        super().__init__(working_dir, None)
+
+    def discover_products(self) -> List[str]:
+        """Get all products with a product.yml in the CaC content."""
+        return get_cac_products(self.cac_content_root)
+
+    def build_jobs(self) -> List[SyncJob]:
+        """
+        Build the sync jobs for all products.
+
+        Returns:
+            The jobs in an order that satisfies their dependencies.
+        """
+        jobs: Dict[str, SyncJob] = dict()
+        compdef_jobs_by_output: Dict[str, str] = dict()
+        for product in self.products or self.discover_products():
+            product_context = ProductContext.for_product(self.cac_content_root, product)
+            policies = load_controls_manager(
+                self.cac_content_root, product, product_context
+            ).policies
+            # Profiles are sorted so the same profile wins output collisions
+            for profile in sorted(
+                product_context.profiles, key=lambda profile: profile.profile_id
+            ):
+                cac_profile = os.path.join(
+                    self.cac_content_root,
+                    "products",
+                    product,
+                    "profiles",
+                    f"{profile.profile_id}.profile",
+                )
+                if not os.path.exists(cac_profile):
+                    continue
+                selections = _load_yaml_profile_file(cac_profile).get("selections", [])
+                for selected in selections:
+                    if ":" not in selected:
+                        continue
+                    parts = selected.split(":")
+                    policy = policies.get(parts[0])
+                    if policy is None:
+                        continue
+                    if len(parts) == 3:
+                        levels = [parts[2]]
+                    else:
+                        levels = [level.id for level in policy.levels] or [ALL_LEVELS]
+                    self._add_policy_jobs(
+                        jobs,
+                        compdef_jobs_by_output,
+                        product,
+                        cac_profile,
+                        policy.id,
+                        levels,
+                    )
+        return list(jobs.values())
+
+    def _add_policy_jobs(
+        self,
+        jobs: Dict[str, SyncJob],
+        compdef_jobs_by_output: Dict[str, str],
+        product: str,
+        cac_profile: str,
+        policy_id: str,
+        levels: List[str],
+    ) -> None:
+        """
+        Add the jobs for a policy selected by a CaC profile.
+
+        Notes: The component definitions of all CaC profiles of a product use the
+        same component title, so two profiles selecting the same policy level
+        would overwrite each other. Only the job of the first profile is added,
+        which is the profile with the lowest id as profiles are added in id order.
+        """
+        catalog_job = self._add_job(
+            jobs, CATALOG_JOB, policy_id, {"policy_id": policy_id}
+        )
+        profile_job = self._add_job(
+            jobs,
+            PROFILE_JOB,
+            f"{product}:{policy_id}",
+            {"product": product, "policy_id": policy_id},
+            [catalog_job],
+        )
+        profile_id = os.path.basename(cac_profile).split(".profile")[0]
+        for level in levels:
+            oscal_profile = get_oscal_profile_name(product, policy_id, level)
+            job_name = f"{product}:{profile_id}:{oscal_profile}"
+            # Component definitions are stored per product and OSCAL profile
+            output = f"{product}/{oscal_profile}"
+            existing_job = compdef_jobs_by_output.get(output)
+            if existing_job is not None:
+                if existing_job != f"{COMPDEF_JOB}:{job_name}":
+                    logger.warning(
+                        f"Skipping {policy_id} level {level} of CaC profile "
+                        f"{profile_id}, component definition {output} is already "
+                        f"synced by {existing_job}"
+                    )
+                continue
+            compdef_jobs_by_output[output] = self._add_job(
+                jobs,
+                COMPDEF_JOB,
+                job_name,
+                {
+                    "product": product,
+                    "policy_id": policy_id,
+                    "cac_profile": cac_profile,
+                    "oscal_profile": oscal_profile,
+                    "compdef_type": self.compdef_type,
+                    "use_cache": self.use_cache,
+                },
+                [profile_job],
+            )
+
+    def _add_job(
+        self,
+        jobs: Dict[str, SyncJob],
+        kind: str,
+        name: str,
+        args: Dict[str, Any],
+        depends_on: Optional[List[str]] = None,
+    ) -> str:
+        """Add a job once and return its id."""
+        job_id = f"{kind}:{name}"
+        if job_id not in jobs:
+            args["cac_content_root"] = self.cac_content_root
+            jobs[job_id] = SyncJob(job_id, kind, args, depends_on or [])
+        return job_id
+
+    def select_jobs(self, jobs: List[SyncJob], impact: ChangeImpact) -> List[SyncJob]:
+        """
+        Select the jobs affected by changes to the CaC content.
+
+        Notes: A catalog job is affected by changes to its policy and a profile job
+        by changes to its policy or product. A component definition job is
+        affected as well by changes to its CaC profile, to the profiles it extends
+        and to the rules and variables the profile selects. Dependencies on jobs that are not selected
+        are replaced by their own dependencies, so the selected jobs still run in
+        dependency order.
+
+        Returns:
+            The selected jobs, in the order of the given jobs.
+        """
+        if impact.all_products:
+            return jobs
+        impacted_profiles = self._get_extending_profiles(impact.profiles)
+        selections: Dict[Tuple[str, str], Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        selected_ids: Set[str] = set()
+        for job in jobs:
+            args = job.args
+            product: str = args.get("product", "")
+            affected = (
+                args["policy_id"] in impact.policies or product in impact.products
+            )
+            if not affected and job.kind == COMPDEF_JOB:
+                profile_id = os.path.basename(args["cac_profile"]).split(".profile")[0]
+                if (product, profile_id) in impacted_profiles:
+                    affected = True
+                elif impact.rules or impact.variables:
+                    key = (product, profile_id)
+                    if key not in selections:
+                        selections[key] = self._get_profile_selections(
+                            product, profile_id
+                        )
+                    rules, variables = selections[key]
+                    affected = not (
+                        rules.isdisjoint(impact.rules)
+                        and variables.isdisjoint(impact.variables)
+                    )
+            if affected:
+                selected_ids.add(job.job_id)
+
+        jobs_by_id = {job.job_id: job for job in jobs}
+
+        def selected_dependencies(depends_on: List[str]) -> List[str]:
+            dependencies: List[str] = list()
+            for dep in depends_on:
+                if dep in selected_ids:
+                    dependencies.append(dep)
+                elif dep in jobs_by_id:
+                    dependencies.extend(
+                        selected_dependencies(jobs_by_id[dep].depends_on)
+                    )
+            return list(dict.fromkeys(dependencies))
+
+        return [
+            replace(job, depends_on=selected_dependencies(job.depends_on))
+            for job in jobs
+            if job.job_id in selected_ids
+        ]
+
+    def _get_extending_profiles(
+        self, profiles: Set[Tuple[str, str]]
+    ) -> Set[Tuple[str, str]]:
+        """
+        Get the given CaC profiles and all profiles extending them.
+
+        Notes: Profiles extending a profile are found through the extends key of
+        the profile files of the product, following the extends chain.
+        """
+        extended_by: Dict[str, Dict[str, List[str]]] = dict()
+        result: Set[Tuple[str, str]] = set()
+        pending = list(profiles)
+        while pending:
+            product, profile_id = pending.pop()
+            if (product, profile_id) in result:
+                continue
+            result.add((product, profile_id))
+            if product not in extended_by:
+                extended_by[product] = self._get_extended_by(product)
+            for child in extended_by[product].get(profile_id, []):
+                pending.append((product, child))
+        return result
+
+    def _get_extended_by(self, product: str) -> Dict[str, List[str]]:
+        """Map the ids of the CaC profiles of a product to the profiles extending them."""
+        extended_by: Dict[str, List[str]] = dict()
+        profiles_dir = pathlib.Path(
+            self.cac_content_root, "products", product, "profiles"
+        )
+        if not profiles_dir.is_dir():
+            return extended_by
+        for profile_file in sorted(profiles_dir.glob("*.profile")):
+            parent = _load_yaml_profile_file(str(profile_file)).get("extends")
+            if parent:
+                extended_by.setdefault(parent, []).append(profile_file.stem)
+        return extended_by
+
+    def _get_profile_selections(
+        self, product: str, profile_id: str
+    ) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """Get the rules and variables selected by a CaC profile."""
+        profile = ProductContext.for_product(
+            self.cac_content_root, product
+        ).get_profile(profile_id)
+        if profile is None:
+            return frozenset(), frozenset()
+        return frozenset(profile.rules), frozenset(profile.variables)
+
+    def run_jobs(self, jobs: List[SyncJob]) -> None:
+        """
+        Run jobs in dependency order.
+
+        Notes: With more than one worker, every job whose dependencies have
+        completed is submitted to a process pool. Either way, jobs depending on
+        a failed job are skipped, independent jobs keep running and all failures
+        are reported together.
+        """
+        workers = resolve_jobs(self.jobs)
+        done: Set[str] = set()
+        errors: List[str] = list()
+        if workers == 1:
+            skipped: List[str] = list()
+            for job in jobs:
+                if any(dep not in done for dep in job.depends_on):
+                    skipped.append(job.job_id)
+                    continue
+                try:
+                    run_sync_job(job, self.working_dir)
+                    done.add(job.job_id)
+                except Exception as e:
+                    errors.append(f"Sync job {job.job_id} failed: {e}")
+            errors.extend(f"Sync job {job_id} skipped" for job_id in sorted(skipped))
+            if errors:
+                raise TaskException("\n".join(errors))
+            return
+
+        pending: Dict[str, SyncJob] = {job.job_id: job for job in jobs}
+        running: Dict[Future[str], str] = dict()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for job_id, job in list(pending.items()):
+                    if any(dep not in done for dep in job.depends_on):
+                        continue
+                    del pending[job_id]
+                    running[executor.submit(run_sync_job, job, self.working_dir)] = (
+                        job_id
+                    )
+                if not running:
+                    errors.extend(
+                        f"Sync job {job_id} skipped" for job_id in sorted(pending)
+                    )
+                    break
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    job_id = running.pop(future)
+                    try:
+                        future.result()
+                        done.add(job_id)
+                    except Exception as e:
+                        errors.append(f"Sync job {job_id} failed: {e}")
+        if errors:
+            raise TaskException("\n".join(errors))
+
+    def execute(self) -> int:
+        """Execute the sync jobs of all products."""
+        jobs = self.build_jobs()
+        if not jobs:
+            raise TaskException(
+                f"No products with policy selections found in {self.cac_content_root}"
+            )
+        if self.git_range:
+            changed_files = get_changed_files(self.cac_content_root, self.git_range)
+            impact = get_change_impact(self.cac_content_root, changed_files)
+            jobs = self.select_jobs(jobs, impact)
+            logger.info(
+                f"{len(changed_files)} files changed in {self.git_range} affect "
+                f"{impact}, {len(jobs)} sync jobs selected"
+            )
+            if not jobs:
+                return const.SUCCESS_EXIT_CODE
+        logger.info(f"Scheduling {len(jobs)} sync jobs")
+        self.run_jobs(jobs)
+        return const.SUCCESS_EXIT_CODE
@@ -6,15 +6,14 @@ import logging
 import os.path
 import pathlib
 import re
-from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from ruamel.yaml.comments import CommentedMap, CommentedOrderedMap
 from ruamel.yaml.scanner import ScannerError
 from ssg.constants import BENCHMARKS
 from ssg.controls import Status
 from ssg.profiles import ProfileSelections, get_profiles_from_products
-from ssg.rules import find_rule_dirs, get_rule_dir_id
-from ssg.variables import get_variable_files, get_variable_options
 from trestle.common.const import (
     IMPLEMENTATION_STATUS,
     RULE_ID,
@@ -26,7 +25,6 @@ from trestle.common.const import (
 )
 from trestle.common.model_utils import ModelUtils
 from trestle.core.models.file_content_type import FileContentType
-from trestle.core.profile_resolver import ProfileResolver
 from trestle.oscal.common import Property
 from trestle.oscal.component import (
     ComponentDefinition,
@@ -36,16 +34,17 @@ from trestle.oscal.component import (
     SetParameter,
 )
 
+from complyscribe.cac_index import RuleDirIndex, VariableIndex
 from complyscribe.const import FRAMEWORK_SHORT_NAME, SUCCESS_EXIT_CODE
 from complyscribe.tasks.authored.profile import CatalogControlResolver
-from complyscribe.tasks.base_task import TaskBase
+from complyscribe.tasks.base_task import TaskBase, TaskException
 from complyscribe.utils import (
+    CacYamlSession,
     get_comments_from_yaml_data,
     get_field_comment,
     populate_if_dict_field_not_exist,
-    read_cac_yaml_ordered,
+    resolve_jobs,
     to_literal_scalar_string,
-    write_cac_yaml_ordered,
 )
 
 
@@ -76,11 +75,17 @@ class ParameterDiffInfo:
         cac_content_root: pathlib.Path,
         profile_variables: Dict[str, str],
         oscal_parameters: List[SetParameter],
+        session: Optional[CacYamlSession] = None,
     ):
         """
         Deal with parameter difference when init
+
+        New options are added to the var files loaded in session, the caller
+        flushes the session to write them.
         """
         self.cac_content_root = cac_content_root
+        self._variable_index: Optional[VariableIndex] = None
+        self.session = session if session is not None else CacYamlSession()
         self._parameters_add: List[SetParameter] = []
         self._parameters_update: Dict[str, List[str]] = {}
         self._parameters_remove: List[str] = [
@@ -94,6 +99,17 @@ class ParameterDiffInfo:
             elif profile_variables[parameter.param_id] not in parameter.values:
                 self._parameters_update[parameter.param_id] = parameter.values
 
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the shared variable index out when sent to worker processes."""
+        return {**self.__dict__, "_variable_index": None}
+
+    @property
+    def variable_index(self) -> VariableIndex:
+        """Variables of the content root, shared in the process."""
+        if self._variable_index is None:
+            self._variable_index = VariableIndex.for_root(str(self.cac_content_root))
+        return self._variable_index
+
     @property
     def parameters_add(self) -> List[SetParameter]:
         return self._parameters_add
@@ -110,23 +126,21 @@ class ParameterDiffInfo:
         """
         Add new option to var file
         """
-        for v_file in get_variable_files(self.cac_content_root):
-            if f"{var_id}.var" in v_file:
-                try:
-                    data = read_cac_yaml_ordered(pathlib.Path(v_file))
-                    data["options"].update({var_value: var_value})
-                    write_cac_yaml_ordered(pathlib.Path(v_file), data)
-                    logger.info(
-                        f"Added new option {var_value}: {var_value} to {v_file}"
-                    )
-                except ScannerError:
-                    # currently some var file contains Jinja2 macros,
-                    # temporarily ignore this exception
-                    logger.warning(
-                        f"process {v_file} failed, this file may contains Jinja2 marcos"
-                    )
-
-                break
+        v_file = self.variable_index.get_file(var_id)
+        if v_file is None:
+            return
+        try:
+            data = self.session.load(pathlib.Path(v_file))
+            data["options"].update({var_value: var_value})
+            self.session.mark_dirty(pathlib.Path(v_file))
+            self.variable_index.add_option(var_id, var_value)
+            logger.info(f"Added new option {var_value}: {var_value} to {v_file}")
+        except ScannerError:
+            # currently some var file contains Jinja2 macros,
+            # temporarily ignore this exception
+            logger.warning(
+                f"process {v_file} failed, this file may contains Jinja2 marcos"
+            )
 
     def validate_variables(self) -> None:
         """
@@ -134,9 +148,7 @@ class ParameterDiffInfo:
         if it's invalid
         """
         for parameter in self._parameters_add:
-            all_options = get_variable_options(
-                self.cac_content_root, parameter.param_id
-            )
+            all_options = self.variable_index.get_options(parameter.param_id)
             if not all_options:
                 logger.warning(
                     f"variable {parameter.param_id} not found in cac content"
@@ -150,7 +162,7 @@ class ParameterDiffInfo:
                     self._add_new_option_to_var_file(parameter.param_id, v)
 
         for param_id, param_values in self._parameters_update.items():
-            all_options = get_variable_options(self.cac_content_root, param_id)
+            all_options = self.variable_index.get_options(param_id)
 
             for v in param_values:
                 if v not in all_options:
@@ -164,6 +176,53 @@ class ParameterDiffInfo:
         )
 
 
+# Per process state of control file sync workers, set by _init_control_file_worker
+_worker_task: Optional["SyncOscalCdTask"] = None
+
+
+class _LogRecordCollector(logging.Handler):
+    """Collect the log records of a worker to emit them in the parent process."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = list()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def _init_control_file_worker(task: "SyncOscalCdTask") -> None:
+    """Initialize a control file sync worker process."""
+    global _worker_task
+    _worker_task = task
+
+
+def _sync_control_file_in_worker(
+    control_file_path: pathlib.Path,
+) -> Tuple[bytes, List[logging.LogRecord]]:
+    """
+    Sync a control file in a worker process.
+
+    Returns:
+        The serialized content of the control file and the log records of the sync.
+    """
+    if _worker_task is None:
+        raise TaskException("Control file sync worker is not initialized")
+    collector = _LogRecordCollector()
+    propagate = logger.propagate
+    logger.addHandler(collector)
+    logger.propagate = False
+    try:
+        _worker_task.sync_to_control_file(control_file_path)
+        return _worker_task.session.dump(control_file_path), collector.records
+    finally:
+        logger.removeHandler(collector)
+        logger.propagate = propagate
+
+
 class SyncOscalCdTask(TaskBase):
     """Sync OSCAL component definition to cac content task."""
 
@@ -173,20 +232,36 @@ class SyncOscalCdTask(TaskBase):
         working_dir: str,
         product: str,
         oscal_profile: str,
+        jobs: Optional[int] = 1,
     ) -> None:
-        """Initialize task."""
+        """
+        Initialize task.
+
+        Args:
+            cac_content_root: Root of the CaC content project
+            working_dir: Working directory of the trestle workspace
+            product: Title of the component to sync
+            oscal_profile: Name of the profile in the trestle workspace
+            jobs: Number of control files synced in parallel, 0 or None for the
+            CPU count
+        """
         super().__init__(working_dir, None)
+        self._jobs = jobs
         self.cac_content_root = cac_content_root
         self.product = product
         self.oscal_profile = oscal_profile
         self.control_dir = os.path.join(self.cac_content_root, "controls")
+        self.session = CacYamlSession()
         self.parameter_diff_info: ParameterDiffInfo = ParameterDiffInfo(
-            self.cac_content_root, {}, []
+            self.cac_content_root, {}, [], self.session
         )
         self.implemented_requirement_dict: Dict[str, ImplementedRequirement] = {}
         self.catalog_helper: CatalogControlResolver = CatalogControlResolver()
-        self.all_rule_ids_from_cac: List[str] = list()
+        self.all_rule_ids_from_cac: Set[str] = set()
         self.rule_ids_from_oscal: Set[str] = set()
+        self._catalog_helpers: Dict[str, CatalogControlResolver] = dict()
+        self._cac_profiles: Optional[Dict[str, ProfileSelections]] = None
+        self._cac_profiles_write_count: int = 0
 
     @staticmethod
     def get_oscal_component_rule_ids(
@@ -200,16 +275,16 @@ class SyncOscalCdTask(TaskBase):
                 r.add(prop.value)
         return r
 
-    def get_all_cac_rule_ids(self) -> List[str]:
+    def get_all_cac_rule_ids(self) -> Set[str]:
         """
         Get all rules ids from CaC content repo
         """
-        r = list()
+        r: Set[str] = set()
         for benchmark in BENCHMARKS:
-            for rule_dir in find_rule_dirs(
+            index = RuleDirIndex.for_root(
                 str(self.cac_content_root.joinpath(benchmark).resolve())
-            ):
-                r.append(get_rule_dir_id(rule_dir))
+            )
+            r.update(index.rule_dirs)
 
         return r
 
@@ -459,10 +534,10 @@ class SyncOscalCdTask(TaskBase):
         """
         Sync component definition data to control file
         """
-        control_file_data = read_cac_yaml_ordered(control_file_path)
+        control_file_data = self.session.load(control_file_path)
         controls = control_file_data.get("controls", [])
         self._handle_controls_field(controls)
-        write_cac_yaml_ordered(control_file_path, control_file_data)
+        self.session.mark_dirty(control_file_path)
 
     def sync(self, profile_id: str) -> None:
         """
@@ -479,20 +554,111 @@ class SyncOscalCdTask(TaskBase):
         )
         # sync profile
         # get profile data from yaml
-        profile_data = read_cac_yaml_ordered(profile_path)
+        profile_data = self.session.load(profile_path)
 
         # Handle selections field, update profile file
         policy_ids = self._update_profile_change_in_memory(profile_data, profile_id)
 
         # save profile change
-        write_cac_yaml_ordered(profile_path, profile_data)
+        self.session.mark_dirty(profile_path)
 
         # sync control file
-        for policy_id in policy_ids:
-            control_file_path = pathlib.Path(
-                os.path.join(self.control_dir, f"{policy_id}.yml")
+        control_file_paths = [
+            pathlib.Path(os.path.join(self.control_dir, f"{policy_id}.yml"))
+            for policy_id in dict.fromkeys(policy_ids)
+        ]
+        self.sync_to_control_files(control_file_paths)
+
+    def sync_to_control_files(self, control_file_paths: List[pathlib.Path]) -> None:
+        """
+        Sync component definition data to control files.
+
+        Notes: With more than one job the control files are synced in a process
+        pool and written by this process. Log records of the workers are emitted
+        in control file order and all failures are reported together. As when
+        syncing one at a time, no control file is written if any sync fails.
+        """
+        workers = min(resolve_jobs(self._jobs), len(control_file_paths))
+        if workers <= 1:
+            for control_file_path in control_file_paths:
+                self.sync_to_control_file(control_file_path)
+            return
+
+        # Workers read the control files from disk
+        for control_file_path in control_file_paths:
+            self.session.flush(control_file_path)
+        logger.debug(
+            f"Syncing {len(control_file_paths)} control files with {workers} workers"
+        )
+        errors: List[str] = list()
+        contents: List[Tuple[pathlib.Path, bytes]] = list()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_control_file_worker,
+            initargs=(self,),
+        ) as executor:
+            futures = [
+                executor.submit(_sync_control_file_in_worker, control_file_path)
+                for control_file_path in control_file_paths
+            ]
+            for control_file_path, future in zip(control_file_paths, futures):
+                try:
+                    content, records = future.result()
+                except Exception as e:
+                    errors.append(f"Sync of {control_file_path} failed: {e}")
+                    continue
+                for record in records:
+                    logger.handle(record)
+                contents.append((control_file_path, content))
+        if errors:
+            raise TaskException("\n".join(errors))
+        for control_file_path, content in contents:
+            self.session.write(control_file_path, content)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the caches of this process out when sent to worker processes."""
+        return {**self.__dict__, "_catalog_helpers": dict(), "_cac_profiles": None}
+
+    def get_catalog_helper(self, source: str) -> CatalogControlResolver:
+        """
+        Get the control id resolver of a control implementation source.
+
+        Notes: Each distinct source is resolved once per task.
+        """
+        catalog_helper = self._catalog_helpers.get(source)
+        if catalog_helper is None:
+            catalog_helper = CatalogControlResolver()
+            catalog_helper.load_profile(
+                pathlib.Path(self.working_dir),
+                source,
+                block_params=False,
+                params_format="[.]",
+                show_value_warnings=True,
             )
-            self.sync_to_control_file(control_file_path)
+            self._catalog_helpers[source] = catalog_helper
+        return catalog_helper
+
+    def get_cac_profile(self, profile_id: str) -> ProfileSelections:
+        """
+        Get a cac profile of the product with its variables.
+
+        Notes: ssg reads the variables from the profile and control files on disk,
+        so the profiles of the product are only loaded again after the session
+        wrote cac content files.
+        """
+        if (
+            self._cac_profiles is None
+            or self._cac_profiles_write_count != self.session.write_count
+        ):
+            profiles = get_profiles_from_products(self.cac_content_root, [self.product])
+            self._cac_profiles = {profile.profile_id: profile for profile in profiles}
+            self._cac_profiles_write_count = self.session.write_count
+        profile = self._cac_profiles.get(profile_id)
+        if profile is None:
+            raise RuntimeError(
+                f"profile {profile_id} not found for product {self.product}"
+            )
+        return profile
 
     def make_implemented_requirements_as_dict(
         self, control_implementation: ControlImplementation
@@ -549,32 +715,22 @@ class SyncOscalCdTask(TaskBase):
             logger.debug(f"Found cac profile id: {profile_id}")
             self.make_implemented_requirements_as_dict(control_implementation)
             # use CatalogControlResolver to get control id map between cac and OSCAL
-            catalog_helper = CatalogControlResolver()
-            profile_resolver = ProfileResolver()
-            resolved_catalog = profile_resolver.get_resolved_profile_catalog(
-                pathlib.Path(self.working_dir),
-                control_implementation.source,
-                block_params=False,
-                params_format="[.]",
-                show_value_warnings=True,
-            )
-            catalog_helper.load(resolved_catalog)
-            self.catalog_helper = catalog_helper
+            self.catalog_helper = self.get_catalog_helper(control_implementation.source)
 
-            # check parameters diff
-            profiles = get_profiles_from_products(self.cac_content_root, [self.product])
-            profile_selection_obj: ProfileSelections
-            for profile in profiles:
-                if profile.profile_id == profile_id:
-                    logger.info(f"profile {profile_id} variables: {profile.variables}")
-                    profile_selection_obj = profile
-                    break
+            # check parameters diff, ssg reads the profiles and control files
+            # from disk so edits of previous control implementations are written
+            self.session.flush()
+            profile_selection_obj = self.get_cac_profile(profile_id)
+            logger.info(
+                f"profile {profile_id} variables: {profile_selection_obj.variables}"
+            )
 
             oscal_parameters = control_implementation.set_parameters
             diff = ParameterDiffInfo(
                 self.cac_content_root,
                 profile_selection_obj.variables,
                 [] if oscal_parameters is None else oscal_parameters,
+                self.session,
             )
             diff.validate_variables()
             logger.info(f"parameters diff: {diff}")
@@ -582,4 +738,9 @@ class SyncOscalCdTask(TaskBase):
             # sync
             self.sync(profile_id)
 
+        self.session.flush()
+        logger.debug(
+            f"Loaded {self.session.load_count} and wrote "
+            f"{self.session.write_count} CaC content files"
+        )
         return SUCCESS_EXIT_CODE
@@ -6,7 +6,6 @@ from typing import Any, Dict, List, Set, Tuple
 from ssg.controls import ControlsManager, Policy
 from trestle.common.const import MODEL_TYPE_PROFILE
 from trestle.common.model_utils import ModelUtils
-from trestle.core.profile_resolver import ProfileResolver
 from trestle.oscal.profile import Profile
 
 from complyscribe.const import SUCCESS_EXIT_CODE
@@ -90,15 +89,13 @@ class SyncOscalProfileTask(TaskBase):
         Load all controls from OSCAL profiles
         """
         for _, profile_path in profiles:
-            profile_resolver = ProfileResolver()
-            resolved_catalog = profile_resolver.get_resolved_profile_catalog(
+            self.catalog_helper.load_profile(
                 pathlib.Path(self.working_dir),
                 os.path.join(profile_path, "profile.json"),
                 block_params=False,
                 params_format="[.]",
                 show_value_warnings=True,
             )
-            self.catalog_helper.load(resolved_catalog)
 
     def get_level_with_ancestors(
         self, control_mgr: ControlsManager
@@ -173,6 +170,7 @@ class SyncOscalProfileTask(TaskBase):
         control_mgr = load_controls_manager(
             str(self.cac_content_root.resolve()),
             self.product,
+            policy_ids=[self.cac_policy_id],
         )
         # get level with ancestors
         self.level_with_ancestors = self.get_level_with_ancestors(control_mgr)
@@ -3,18 +3,17 @@
 
 """Transform rules from existing Compliance as Code locations into OSCAL properties."""
 
+import hashlib
 import logging
+import math
 import os
-from typing import Any, Dict, List, Optional, Tuple
-
-from ssg.products import load_product_yaml, product_yaml_path
-from ssg.profiles import get_profiles_from_products
-from ssg.rules import find_rule_dirs_in_paths, get_rule_dir_id, get_rule_dir_yaml
-from ssg.variables import (
-    get_variable_options,
-    get_variable_property,
-    get_variables_from_profiles,
-)
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ssg.rules import get_rule_dir_yaml
+from ssg.variables import get_variables_from_profiles
 from ssg.yaml import open_and_macro_expand_from_dir
 from trestle.common.const import TRESTLE_GENERIC_NS
 from trestle.core.generators import generate_sample_model
@@ -28,17 +27,33 @@ from trestle.tasks.csv_to_oscal_cd import (
     _RuleSetIdMgr,
 )
 
+from complyscribe.cac_index import (
+    RULE_CONTENT_DIRS,
+    ExpandedRuleCache,
+    RuleDirIndex,
+    VariableIndex,
+    hash_macro_files,
+)
+from complyscribe.utils import ProductContext, hash_str, resolve_jobs
+
 
 logger = logging.getLogger(__name__)
 
 TRESTLE_CD_NS = f"{TRESTLE_GENERIC_NS}/cd"
 
+IDENTIFIER_PATTERN = re.compile(r"\w+")
 
-def get_component_info(product_name: str, cac_path: str) -> Tuple[str, str]:
+
+def get_component_info(
+    product_name: str,
+    cac_path: str,
+    product_context: Optional[ProductContext] = None,
+) -> Tuple[str, str]:
     """Get the product name from product yml file via the SSG library."""
     if product_name and cac_path:
-        product_yml_path = product_yaml_path(cac_path, product_name)
-        product = load_product_yaml(product_yml_path)
+        if product_context is None:
+            product_context = ProductContext.for_product(cac_path, product_name)
+        product = product_context.product_yaml
         component_title = product._primary_data.get("product")
         component_description = product._primary_data.get("full_name")
         return (component_title, component_description)
@@ -67,34 +82,53 @@ def get_validation_component_mapping(props: Property) -> List[Dict[str, str]]:
         List[Dict]: The updated list with the new "Check_Id" and
         "Check_Description" entry.
     """
-    transformed_list = [transform_property(prop) for prop in props]
-    rule_check_mapping = []
-    for prop in transformed_list:
-        rule_check_mapping.append(prop)
+    return list(iter_validation_component_mapping(props))
+
+
+def iter_validation_component_mapping(
+    props: Optional[Iterable[Property]],
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield the props of get_validation_component_mapping one at a time.
+
+    Notes: The Check entries follow the Rule_Description of a rule, or its
+    Parameter_Value_Alternatives if it has one, so only the props of the current
+    rule after its Check entries are held back.
+    """
+    check_id_entry: Dict[str, str] = dict()
+    # The Check entries of the current rule followed by the props after them
+    held: List[Dict[str, str]] = list()
+    for prop in map(transform_property, props or []):
         if prop["name"] == "Rule_Id":
+            yield from held
+            held = list()
             check_id_entry = {
                 "name": "Check_Id",
                 "ns": prop["ns"],
                 "value": prop["value"],
                 "remarks": prop["remarks"],
             }
-        if prop["name"] == "Rule_Description":
+            yield prop
+        elif prop["name"] == "Rule_Description":
+            yield from held
+            yield prop
             check_description_entry = {
                 "name": "Check_Description",
                 "ns": prop["ns"],
                 "value": prop["value"],
                 "remarks": prop["remarks"],
             }
-            # Append the Check entry follow Rule_Description
-            rule_check_mapping.append(check_id_entry)
-            rule_check_mapping.append(check_description_entry)
-        # If this rule has paramters, append the Check entry follow paramters
-        if prop["name"] == "Parameter_Value_Alternatives":
-            rule_check_mapping.remove(check_id_entry)
-            rule_check_mapping.remove(check_description_entry)
-            rule_check_mapping.append(check_id_entry)
-            rule_check_mapping.append(check_description_entry)
-    return rule_check_mapping
+            held = [check_id_entry, check_description_entry]
+        elif prop["name"] == "Parameter_Value_Alternatives" and held:
+            # Move the Check entries after the parameter values
+            yield from held[2:]
+            yield prop
+            held = held[:2]
+        elif held:
+            held.append(prop)
+        else:
+            yield prop
+    yield from held
 
 
 def add_prop(name: str, value: str, remarks: Optional[str] = None) -> Property:
@@ -108,23 +142,124 @@ def add_prop(name: str, value: str, remarks: Optional[str] = None) -> Property:
     return prop
 
 
-def get_benchmark_root(root: str, product: str) -> str:
+def get_benchmark_root(
+    root: str, product: str, product_context: Optional[ProductContext] = None
+) -> str:
     """Get the benchmark root."""
-    product_yml_path = product_yaml_path(root, product)
-    product_yaml = load_product_yaml(product_yml_path)
-    product_dir = product_yaml.get("product_dir")
-    benchmark_root = os.path.join(product_dir, product_yaml.get("benchmark_root"))
-    return benchmark_root
+    if product_context is None:
+        product_context = ProductContext.for_product(root, product)
+    return product_context.benchmark_root
+
+
+def get_profile_params(
+    root: str,
+    product: str,
+    profile_id: str,
+    product_context: Optional[ProductContext] = None,
+) -> Dict[str, Any]:
+    if product_context is None:
+        product_context = ProductContext.for_product(root, product)
+    profile = product_context.get_profile(profile_id, sort=True)
+    if profile is None:
+        return {}
+    return get_variables_from_profiles([profile])
+
+
+def _get_template_values(value: Any) -> Iterator[str]:
+    """Yield the string values of rule template variables."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _get_template_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _get_template_values(item)
+    elif isinstance(value, str):
+        yield value
+
+
+def expand_rule(
+    root: str,
+    rule_dir: str,
+    substitutions: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Expand the Jinja macros of a rule.yml file.
 
+    Args:
+        root: Root of the CaC content project
+        rule_dir: Directory of the rule
+        substitutions: Product substitutions dictionary
 
-def get_profile_params(root: str, product: str, profile_id: str) -> Dict[str, Any]:
-    profiles = get_profiles_from_products(root, [product], sorted=True)
-    params = {}
-    for profile in profiles:
-        if profile.profile_id == profile_id:
-            params = get_variables_from_profiles([profile])
-            break
-    return params
+    Returns:
+        The rule title and the sorted string values of the rule template
+        variables, e.g. the xccdf_variable the templated checks refer to.
+    """
+    rule_file = get_rule_dir_yaml(rule_dir)
+    rule_yaml = open_and_macro_expand_from_dir(
+        rule_file, root, substitutions_dict=substitutions
+    )
+    template = rule_yaml.get("template") or dict()
+    return {
+        "title": rule_yaml["title"].replace("\n", " ").strip(),
+        "template_values": sorted(set(_get_template_values(template.get("vars")))),
+    }
+
+
+def get_rule_content_identifiers(rule_dir: str) -> Set[str]:
+    """
+    Get the identifiers used in the check and remediation files of a rule.
+
+    Args:
+        rule_dir: Directory of the rule
+
+    Returns:
+        The identifier tokens of all files in the check and remediation
+        subdirectories of the rule. Rule tests and policy files are not read.
+    """
+    identifiers: Set[str] = set()
+    for content_dir in RULE_CONTENT_DIRS:
+        content_path = os.path.join(rule_dir, content_dir)
+        if not os.path.isdir(content_path):
+            continue
+        for dir_path, _, file_names in os.walk(content_path):
+            for file_name in file_names:
+                try:
+                    with open(os.path.join(dir_path, file_name), encoding="utf-8") as f:
+                        identifiers.update(IDENTIFIER_PATTERN.findall(f.read()))
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.debug(f"Skipping rule content file {file_name}: {e}")
+    return identifiers
+
+
+# Per process state of rule expansion workers, set by _init_rule_worker
+_worker_root: str = ""
+_worker_substitutions: Dict[str, Any] = dict()
+
+
+def _init_rule_worker(root: str, substitutions: Dict[str, Any]) -> None:
+    """Initialize a rule expansion worker process."""
+    global _worker_root, _worker_substitutions
+    _worker_root = root
+    _worker_substitutions = substitutions
+
+
+def _expand_rule_chunk(
+    rule_dirs: List[Tuple[str, str]],
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Expand a chunk of rules in a worker process.
+
+    Returns:
+        A (rule id, expanded rule data, error) tuple for each rule in the chunk.
+    """
+    results: List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]] = list()
+    for rule_id, rule_dir in rule_dirs:
+        try:
+            rule_data = expand_rule(_worker_root, rule_dir, dict(_worker_substitutions))
+            results.append((rule_id, rule_data, None))
+        except FileNotFoundError as e:
+            results.append((rule_id, None, f"Could not load rule {rule_id}: {e}"))
+    return results
 
 
 class ParamInfo:
@@ -208,34 +343,81 @@ class RulesTransformer:
         root: str,
         product: str,
         profile: str,
+        product_context: Optional[ProductContext] = None,
+        jobs: int = 1,
+        rule_cache: Optional[ExpandedRuleCache] = None,
     ) -> None:
-        """Initialize."""
+        """
+        Initialize.
+
+        Args:
+            root: Root of the CaC content project
+            product: Product to load rules for
+            profile: Path of the CaC profile
+            product_context: Optional product context to reuse
+            jobs: Number of processes used to expand rule files. 1 expands rules
+            in this process, 0 uses the CPU count.
+            rule_cache: Optional cache of expanded rules shared between runs
+        """
         self.root = root
         self.product = product
+        self.jobs = jobs
+        self.product_context = (
+            product_context
+            if product_context is not None
+            else ProductContext.for_product(root, product)
+        )
+
+        benchmark_root = self.product_context.benchmark_root
+        self.rules_dirs_for_product: Dict[str, str] = RuleDirIndex.for_root(
+            benchmark_root
+        ).rule_dirs
 
-        benchmark_root = get_benchmark_root(root, self.product)
-        self.rules_dirs_for_product: Dict[str, str] = dict()
-        for dir_path in find_rule_dirs_in_paths([benchmark_root]):
-            rule_id = get_rule_dir_id(dir_path)
-            self.rules_dirs_for_product[rule_id] = dir_path
+        self.variable_index = VariableIndex.for_root(root)
+        self._variable_ids = frozenset(self.variable_index.variable_ids())
+
+        self.rule_cache = rule_cache
+        self._expansion_hash = ""
+        if rule_cache is not None:
+            self._expansion_hash = hash_str(
+                f"{self.product_context.substitutions_hash}:{hash_macro_files(root)}"
+            )
 
         self._rules_by_id: Dict[str, RuleInfo] = dict()
         self.profile_id = os.path.basename(profile).split(".profile")[0]
-        self.profile_params = get_profile_params(root, product, self.profile_id)
+        self.profile_params = get_profile_params(
+            root, product, self.profile_id, self.product_context
+        )
 
     def _new_param_obj(self, param_id: str) -> ParamInfo:
-        param_description = get_variable_property(self.root, param_id, "description")
+        param_description = self.variable_index.get_description(param_id)
         param_obj = ParamInfo(param_id, param_description)
         return param_obj
 
-    def _get_params(self, root: str, rule_obj: RuleInfo) -> None:
-        # Here need to add params only in this rule.
+    def _get_rule_variables(
+        self, rule_obj: RuleInfo, rule_data: Dict[str, Any]
+    ) -> Set[str]:
+        """
+        Get the ids of the variables a rule refers to.
+
+        Notes: Variables are referenced by the rule template variables and by the
+        check and remediation files of the rule. The files are read on every run,
+        so they are not part of the rule cache key.
+        """
+        identifiers = set(rule_data["template_values"])
+        identifiers.update(get_rule_content_identifiers(rule_obj.rule_dir))
+        return identifiers & self._variable_ids
+
+    def _get_params(self, rule_obj: RuleInfo, rule_data: Dict[str, Any]) -> None:
+        """Add the profile parameters referenced by the rule to the rule object."""
+        referenced = self._get_rule_variables(rule_obj, rule_data)
         for param_id, param_data in self.profile_params.items():
+            if param_id not in referenced:
+                continue
             param_obj = self._new_param_obj(param_id)
             selected_value = param_data[self.product][self.profile_id]
             param_obj.set_selected_value(selected_value)
-            options = get_variable_options(root, param_id)
-            param_obj.set_options(options)
+            param_obj.set_options(self.variable_index.get_options(param_id))
             rule_obj.add_parameter(param_obj)
 
     def add_rules(self, rules: List[str]) -> None:
@@ -247,10 +429,16 @@ class RulesTransformer:
         Notes: This attempt to load all rules and will raise an error if any fail.
         """
         rule_errors: List[str] = list()
-        for rule_id in rules:
-            error = self._add_rule(rule_id)
-            if error:
-                rule_errors.append(error)
+        workers = resolve_jobs(self.jobs)
+        if workers > 1 and len(rules) > 1:
+            rule_errors = self._add_rules_in_parallel(rules, workers)
+        else:
+            for rule_id in rules:
+                error = self._add_rule(rule_id)
+                if error:
+                    rule_errors.append(error)
+        if self.rule_cache is not None:
+            self.rule_cache.save()
 
         if len(rule_errors) > 0:
             raise RuntimeError(
@@ -258,6 +446,80 @@ class RulesTransformer:
                     \n{', '.join(rule_errors)}"
             )
 
+    def _add_rules_in_parallel(self, rules: List[str], workers: int) -> List[str]:
+        """
+        Load rules by expanding rule files in a process pool.
+
+        Notes: Rules are added and errors reported in the order of the rule ids,
+        so the result is the same as loading them one at a time.
+        """
+        new_rule_objs: Dict[str, RuleInfo] = dict()
+        new_rule_data: Dict[str, Dict[str, Any]] = dict()
+        errors: Dict[str, str] = dict()
+        for rule_id in rules:
+            if (
+                rule_id in self._rules_by_id
+                or rule_id in new_rule_objs
+                or rule_id in errors
+            ):
+                continue
+            try:
+                new_rule_objs[rule_id] = self._new_rule_obj(rule_id)
+            except ValueError as e:
+                errors[rule_id] = f"Could not find rule {rule_id}: {e}"
+
+        cache_keys: Dict[str, str] = dict()
+        rule_dirs: List[Tuple[str, str]] = list()
+        for rule_id, rule_obj in new_rule_objs.items():
+            key, cached = self._lookup_rule_cache(rule_obj)
+            if cached is not None:
+                rule_obj.add_description(cached["title"])
+                new_rule_data[rule_id] = cached
+                continue
+            if key is not None:
+                cache_keys[rule_id] = key
+            rule_dirs.append((rule_id, rule_obj.rule_dir))
+
+        chunk_size = max(1, math.ceil(len(rule_dirs) / (workers * 4)))
+        chunks = [
+            rule_dirs[i : i + chunk_size]  # noqa: E203
+            for i in range(0, len(rule_dirs), chunk_size)
+        ]
+        if chunks:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_rule_worker,
+                initargs=(self.root, self.product_context.substitutions),
+            ) as executor:
+                for results in executor.map(_expand_rule_chunk, chunks):
+                    for rule_id, rule_data, error in results:
+                        if rule_data is None:
+                            errors[rule_id] = str(error)
+                            continue
+                        new_rule_objs[rule_id].add_description(rule_data["title"])
+                        new_rule_data[rule_id] = rule_data
+                        if rule_id in cache_keys:
+                            self._store_rule_cache(cache_keys[rule_id], rule_data)
+        return self._merge_rules(rules, new_rule_objs, new_rule_data, errors)
+
+    def _merge_rules(
+        self,
+        rules: List[str],
+        new_rule_objs: Dict[str, RuleInfo],
+        new_rule_data: Dict[str, Dict[str, Any]],
+        errors: Dict[str, str],
+    ) -> List[str]:
+        """Add expanded rule objects in rule id order and return the errors."""
+        rule_errors: List[str] = list()
+        for rule_id in rules:
+            if rule_id in errors:
+                rule_errors.append(errors[rule_id])
+            elif rule_id in new_rule_objs and rule_id not in self._rules_by_id:
+                rule_obj = new_rule_objs[rule_id]
+                self._get_params(rule_obj, new_rule_data[rule_id])
+                self._rules_by_id[rule_id] = rule_obj
+        return rule_errors
+
     def _add_rule(self, rule_id: str) -> Optional[str]:
         """Add a single rule to the rules_by_id dictionary."""
         try:
@@ -293,15 +555,54 @@ class RulesTransformer:
         Args:
             rule_obj: The rule object where collection rule data is stored.
         """
-        product_yml_path = product_yaml_path(self.root, self.product)
-        product_yaml = load_product_yaml(product_yml_path)
-        rule_file = get_rule_dir_yaml(rule_obj.rule_dir)
-        rule_yaml = open_and_macro_expand_from_dir(
-            rule_file, self.root, substitutions_dict=product_yaml._data_as_dict
+        rule_data = self._expand_rule(rule_obj)
+        rule_obj.add_description(rule_data["title"])
+        self._get_params(rule_obj, rule_data)
+
+    def _expand_rule(self, rule_obj: RuleInfo) -> Dict[str, Any]:
+        """Get the expanded rule data, from the rule cache when possible."""
+        key, cached = self._lookup_rule_cache(rule_obj)
+        if cached is not None:
+            return cached
+        rule_data = expand_rule(
+            self.root,
+            rule_obj.rule_dir,
+            self.product_context.substitutions,
         )
+        if key is not None:
+            self._store_rule_cache(key, rule_data)
+        return rule_data
+
+    def _lookup_rule_cache(
+        self, rule_obj: RuleInfo
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Get the rule cache key of a rule and the cached data, if any."""
+        key = self._rule_cache_key(rule_obj)
+        if key is None or self.rule_cache is None:
+            return None, None
+        return key, self.rule_cache.get(key)
+
+    def _store_rule_cache(self, key: str, data: Dict[str, Any]) -> None:
+        """Store expanded rule data in the rule cache."""
+        if self.rule_cache is not None:
+            self.rule_cache.put(key, data)
+
+    def _rule_cache_key(self, rule_obj: RuleInfo) -> Optional[str]:
+        """
+        Get the rule cache key of a rule.
 
-        rule_obj.add_description(rule_yaml["title"].replace("\n", " ").strip())
-        self._get_params(self.root, rule_obj)
+        Notes: The key covers the rule.yml content, the product substitutions and the
+        macro files. Variable ids are not part of the key, so adding variables does
+        not invalidate cached rules. None is returned when caching is disabled or
+        the rule file cannot be read, so the expansion reports the error.
+        """
+        if self.rule_cache is None:
+            return None
+        try:
+            content = pathlib.Path(get_rule_dir_yaml(rule_obj.rule_dir)).read_bytes()
+        except OSError:
+            return None
+        return hash_str(f"{self._expansion_hash}:{hashlib.sha256(content).hexdigest()}")
 
     @staticmethod
     def _get_params_properties(
@@ -345,13 +646,13 @@ class RulesTransformer:
 
     def transform(self, rule_objs: List[RuleInfo]) -> List[Property]:
         """Get the rules properties for a set of rule ids."""
-        rule_properties: List[Property] = list()
+        return list(self.iter_transform(rule_objs))
 
+    def iter_transform(self, rule_objs: List[RuleInfo]) -> Iterator[Property]:
+        """Yield the rules properties for a set of rule ids one rule at a time."""
         start_val = -1
         for i, rule_obj in enumerate(rule_objs):
             rule_set_mgr = _RuleSetIdMgr(start_val + i, len(rule_objs))
-            rule_set_props = self._get_rule_properties(
+            yield from self._get_rule_properties(
                 rule_set_mgr.get_next_rule_set_id(), rule_obj
             )
-            rule_properties.extend(rule_set_props)
-        return rule_properties
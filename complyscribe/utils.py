@@ -2,15 +2,26 @@
 # Copyright (c) 2024 Red Hat, Inc.
 
 """Common utility functions."""
+import hashlib
+import io
+import json
+import logging
 import os
 import pathlib
+import tempfile
 import textwrap
-from typing import Any, List
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple, Type, TypeVar
 
 from ruamel.yaml import YAML, CommentedMap, CommentToken
 from ruamel.yaml.scalarstring import LiteralScalarString
-from ssg.controls import ControlsManager
+from ssg.controls import ControlsManager, Policy
 from ssg.products import load_product_yaml, product_yaml_path
+from ssg.profiles import ProfileSelections, get_profiles_from_products
+
+from complyscribe.const import CACHE_DIR_ENV_VAR, CACHE_DIR_NAME
+
+
+logger = logging.getLogger(__name__)
 
 
 def populate_if_dict_field_not_exist(
@@ -83,25 +94,370 @@ def read_cac_yaml_ordered(file_path: pathlib.Path) -> Any:
     return yaml.load(file_path)
 
 
+def _get_cac_yaml_writer() -> YAML:
+    """Get the YAML instance used to write CaC content files."""
+    yaml = YAML()
+    yaml.indent(mapping=4, sequence=6, offset=4)
+    return yaml
+
+
 def write_cac_yaml_ordered(file_path: pathlib.Path, data: Any) -> None:
     """
     Serializes a Python object into a CaC content YAML stream, preserving the order.
     """
-    yaml = YAML()
-    yaml.indent(mapping=4, sequence=6, offset=4)
-    yaml.dump(data, file_path)
+    _get_cac_yaml_writer().dump(data, file_path)
+
+
+class CacYamlSession:
+    """
+    CaC content YAML documents loaded once and written once.
+
+    Notes: `load` reads a file with `read_cac_yaml_ordered` the first time and
+    returns the same document afterwards, so edits made in memory accumulate
+    across the whole task. Edited documents are marked with `mark_dirty` and
+    written by `flush`. A document is only written when its serialized bytes
+    differ from the content of the file. `load_count` and `write_count` count the
+    files actually parsed and written.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty session."""
+        self._documents: Dict[pathlib.Path, Any] = dict()
+        self._dirty: Dict[pathlib.Path, None] = dict()
+        self.load_count = 0
+        self.write_count = 0
+
+    @staticmethod
+    def _key(file_path: pathlib.Path) -> pathlib.Path:
+        return pathlib.Path(os.path.abspath(file_path))
+
+    def load(self, file_path: pathlib.Path) -> Any:
+        """
+        Get the document of a CaC content YAML file.
+
+        Args:
+            file_path: Path of the YAML file
+
+        Returns:
+            The document shared by all callers in the session
+        """
+        key = self._key(file_path)
+        if key not in self._documents:
+            self._documents[key] = read_cac_yaml_ordered(key)
+            self.load_count += 1
+        return self._documents[key]
+
+    def mark_dirty(self, file_path: pathlib.Path) -> None:
+        """Mark the loaded document of a file as edited."""
+        key = self._key(file_path)
+        if key not in self._documents:
+            raise ValueError(f"{file_path} is not loaded in the session")
+        self._dirty[key] = None
+
+    def dump(self, file_path: pathlib.Path) -> bytes:
+        """Serialize the loaded document of a file."""
+        stream = io.BytesIO()
+        _get_cac_yaml_writer().dump(self._documents[self._key(file_path)], stream)
+        return stream.getvalue()
+
+    def flush(self, file_path: Optional[pathlib.Path] = None) -> None:
+        """
+        Write edited documents whose content changed.
+
+        Args:
+            file_path: Only flush this file, defaults to all edited documents
+        """
+        keys = list(self._dirty) if file_path is None else [self._key(file_path)]
+        for key in keys:
+            if key not in self._dirty:
+                continue
+            del self._dirty[key]
+            self._write_if_changed(key, self.dump(key))
+
+    def write(self, file_path: pathlib.Path, content: bytes) -> None:
+        """
+        Write the serialized content of a file edited outside the session.
+
+        Notes: The loaded document of the file is dropped and loaded again on next
+        use. The file is only written when the content changed.
+        """
+        key = self._key(file_path)
+        self._documents.pop(key, None)
+        self._dirty.pop(key, None)
+        self._write_if_changed(key, content)
+
+    def _write_if_changed(self, key: pathlib.Path, content: bytes) -> None:
+        if key.exists() and key.read_bytes() == content:
+            logger.debug(f"{key} is unchanged, skipping write")
+            return
+        key.write_bytes(content)
+        self.write_count += 1
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the session without its documents, they stay in this process."""
+        return {**self.__dict__, "_documents": dict(), "_dirty": dict()}
+
+
+_S = TypeVar("_S", bound="SharedInstances")
+
+
+class SharedInstances:
+    """
+    Mixin keeping one instance per key and class shared in the process.
+
+    Notes: Every subclass has its own registry. `_get_shared` creates an instance
+    from the given arguments and prepares it with `_init_shared` the first time a
+    key is requested. `clear_shared_instances` resets the registries of all
+    subclasses at once.
+    """
+
+    _registries: List[Dict[Any, Any]] = []
+    _instances: Dict[Any, Any]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._instances = dict()
+        SharedInstances._registries.append(cls._instances)
+
+    @classmethod
+    def _get_shared(cls: Type[_S], key: Hashable, *args: Any) -> _S:
+        """Get the shared instance for a key, creating it from args if needed."""
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = cls(*args)
+            instance._init_shared()
+            cls._instances[key] = instance
+        return instance
+
+    def _init_shared(self) -> None:
+        """Prepare a new instance before it is shared."""
+
+    @classmethod
+    def clear_instances(cls) -> None:
+        """Forget the instances of this class shared in this process."""
+        cls._instances.clear()
+
+
+def clear_shared_instances() -> None:
+    """Forget the shared instances of all classes in this process."""
+    for registry in SharedInstances._registries:
+        registry.clear()
+
+
+class ProductContext(SharedInstances):
+    """
+    Product data loaded once per CaC content root and product.
+
+    Notes: Use `for_product` to share one instance per product in the process.
+    `load_count` counts how many times a product yaml was actually parsed and
+    `controls_load_count` how many times a controls manager was loaded.
+    """
 
+    load_count: int = 0
+    controls_load_count: int = 0
 
-def load_controls_manager(cac_content_root: str, product: str) -> ControlsManager:
+    def __init__(self, cac_content_root: str, product: str) -> None:
+        """Load the product yaml."""
+        self.cac_content_root = cac_content_root
+        self.product = product
+        product_yml_path = product_yaml_path(cac_content_root, product)
+        self.product_yaml = load_product_yaml(product_yml_path)
+        self._substitutions: Dict[str, Any] = self.product_yaml._data_as_dict
+        self._substitutions_hash: Optional[str] = None
+        # Sorted selections -> profiles
+        self._profiles: Dict[bool, List[ProfileSelections]] = dict()
+        # (controls dir fingerprint, policy ids or None for all) -> manager
+        self._controls_managers: Dict[
+            Tuple[str, Optional[FrozenSet[str]]], ControlsManager
+        ] = dict()
+        ProductContext.load_count += 1
+
+    @classmethod
+    def for_product(cls, cac_content_root: str, product: str) -> "ProductContext":
+        """Get the shared product context for a CaC content root and product."""
+        key = (os.path.abspath(cac_content_root), product)
+        return cls._get_shared(key, str(cac_content_root), product)
+
+    @property
+    def substitutions(self) -> Dict[str, Any]:
+        """
+        Get a copy of the product substitutions dictionary.
+
+        Notes: A copy is returned because the ssg Jinja helpers add macros
+        to the dictionary they are given.
+        """
+        return dict(self._substitutions)
+
+    @property
+    def substitutions_hash(self) -> str:
+        """Get a stable hash of the product substitutions dictionary."""
+        if self._substitutions_hash is None:
+            self._substitutions_hash = hash_str(
+                json.dumps(self._substitutions, sort_keys=True, default=str)
+            )
+        return self._substitutions_hash
+
+    @property
+    def profiles(self) -> List[ProfileSelections]:
+        """Get the resolved profiles of the product, loaded on first use."""
+        return self.get_profiles()
+
+    def get_profiles(self, sort: bool = False) -> List[ProfileSelections]:
+        """
+        Get the resolved profiles of the product, loaded on first use.
+
+        Args:
+            sort: Get the profiles with sorted rules and variables instead of
+            the order of the profile files
+
+        Notes: Rules are synced in profile file order, so both orders are
+        loaded and cached separately.
+        """
+        profiles = self._profiles.get(sort)
+        if profiles is None:
+            profiles = get_profiles_from_products(
+                self.cac_content_root, [self.product], sorted=sort
+            )
+            self._profiles[sort] = profiles
+        return profiles
+
+    def get_profile(
+        self, profile_id: str, sort: bool = False
+    ) -> Optional[ProfileSelections]:
+        """Get a resolved profile of the product by id."""
+        return next(
+            (
+                profile
+                for profile in self.get_profiles(sort)
+                if profile.profile_id == profile_id
+            ),
+            None,
+        )
+
+    @property
+    def benchmark_root(self) -> str:
+        """Get the benchmark root of the product."""
+        return os.path.join(
+            self.product_yaml.get("product_dir"),
+            self.product_yaml.get("benchmark_root"),
+        )
+
+    @property
+    def controls_dir(self) -> str:
+        """Get the controls directory of the CaC content root."""
+        return os.path.join(self.cac_content_root, "controls")
+
+    def get_controls_manager(
+        self, policy_ids: Optional[List[str]] = None
+    ) -> ControlsManager:
+        """
+        Get a loaded controls manager, shared until the control files change.
+
+        Args:
+            policy_ids: Optionally load only these policies instead of all
+            policies in the controls directory.
+
+        Notes: Managers are keyed by a fingerprint of the controls directory, so a
+        manager is loaded again once any control file changes. A manager with all
+        policies also serves requests for a subset of policies.
+        """
+        fingerprint = fingerprint_dir(self.controls_dir)
+        full_key: Tuple[str, Optional[FrozenSet[str]]] = (fingerprint, None)
+        key = (fingerprint, None if policy_ids is None else frozenset(policy_ids))
+        manager = self._controls_managers.get(full_key) or self._controls_managers.get(
+            key
+        )
+        if manager is None:
+            manager = self._load_controls_manager(policy_ids)
+            self._controls_managers = {
+                k: v for k, v in self._controls_managers.items() if k[0] == fingerprint
+            }
+            self._controls_managers[key] = manager
+        return manager
+
+    def _load_controls_manager(
+        self, policy_ids: Optional[List[str]] = None
+    ) -> ControlsManager:
+        """Load a controls manager with all or only the given policies."""
+        ProductContext.controls_load_count += 1
+        control_mgr = ControlsManager(self.controls_dir, self.product_yaml)
+        if policy_ids is not None:
+            try:
+                self._load_policies(control_mgr, policy_ids)
+                return control_mgr
+            except Exception as e:
+                logger.debug(
+                    f"Loading policies {', '.join(policy_ids)} by file name failed, "
+                    f"loading all policies: {e}"
+                )
+                control_mgr = ControlsManager(self.controls_dir, self.product_yaml)
+        control_mgr.load()
+        return control_mgr
+
+    def _load_policies(
+        self, control_mgr: ControlsManager, policy_ids: List[str]
+    ) -> None:
+        """
+        Load policies into a controls manager by the <policy id>.yml file name convention.
+
+        Notes: Raises an error when a policy file does not exist, holds another
+        policy or refers to controls of a policy that is not loaded.
+        """
+        for policy_id in policy_ids:
+            policy_file = os.path.join(self.controls_dir, f"{policy_id}.yml")
+            if not os.path.isfile(policy_file):
+                raise FileNotFoundError(f"No control file {policy_file}")
+            policy = Policy(policy_file, self.product_yaml)
+            policy.load()
+            if policy.id != policy_id:
+                raise ValueError(f"{policy_file} holds policy {policy.id}")
+            control_mgr.policies[policy.id] = policy
+        control_mgr.resolve_controls()
+
+
+def get_cac_products(cac_content_root: str) -> List[str]:
+    """Get all products with a product.yml in the CaC content."""
+    products_dir = pathlib.Path(cac_content_root, "products")
+    return sorted(
+        product_yml.parent.name for product_yml in products_dir.glob("*/product.yml")
+    )
+
+
+def load_controls_manager(
+    cac_content_root: str,
+    product: str,
+    product_context: Optional[ProductContext] = None,
+    policy_ids: Optional[List[str]] = None,
+) -> ControlsManager:
     """
-    Loads and initializes a ControlsManager instance.
+    Get a loaded ControlsManager instance, shared within the process.
+
+    Args:
+        cac_content_root: Root of the CaC content project
+        product: Product to load controls for
+        product_context: Optional product context to reuse
+        policy_ids: Optionally load only these policies
     """
-    product_yml_path = product_yaml_path(cac_content_root, product)
-    product_yaml = load_product_yaml(product_yml_path)
-    controls_dir = os.path.join(cac_content_root, "controls")
-    control_mgr = ControlsManager(controls_dir, product_yaml)
-    control_mgr.load()
-    return control_mgr
+    if product_context is None:
+        product_context = ProductContext.for_product(cac_content_root, product)
+    return product_context.get_controls_manager(policy_ids)
+
+
+def fingerprint_dir(directory: str) -> str:
+    """Hash the relative paths, sizes and modification times of all files in a directory."""
+    entries: List[str] = list()
+    for dir_path, dir_names, file_names in os.walk(directory):
+        dir_names.sort()
+        for name in sorted(file_names):
+            path = os.path.join(dir_path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(
+                f"{os.path.relpath(path, directory)}:{stat.st_mtime_ns}:{stat.st_size}"
+            )
+    return hash_str("\n".join(entries))
 
 
 def to_literal_scalar_string(s: str) -> LiteralScalarString:
@@ -109,3 +465,77 @@ def to_literal_scalar_string(s: str) -> LiteralScalarString:
     Convert a string to a literal scalar string.
     """
     return LiteralScalarString(textwrap.dedent(s))
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """
+    Get the number of workers to use for a pool.
+
+    Args:
+        jobs: Requested number of workers, 0 or None for the CPU count.
+    """
+    if jobs is None or jobs == 0:
+        return os.cpu_count() or 1
+    if jobs < 0:
+        raise ValueError(f"Invalid number of jobs: {jobs}")
+    return jobs
+
+
+def get_cache_dir() -> pathlib.Path:
+    """
+    Get the directory used for persistent complyscribe caches.
+
+    Notes: The location can be set with the COMPLYSCRIBE_CACHE_DIR environment
+    variable, otherwise it follows the XDG base directory convention.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    if cache_dir:
+        return pathlib.Path(cache_dir)
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return pathlib.Path(xdg_cache_home, CACHE_DIR_NAME)
+
+
+def hash_str(value: str) -> str:
+    """Return the sha256 hex digest of a string."""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def read_json_cache(cache_file: pathlib.Path) -> Optional[Any]:
+    """
+    Read a JSON cache file.
+
+    Returns:
+        The cached data or None if the file does not exist or cannot be read.
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring unreadable cache file {cache_file}: {e}")
+        return None
+
+
+def write_json_cache(cache_file: pathlib.Path, data: Any) -> None:
+    """
+    Atomically write a JSON cache file.
+
+    Notes: Caches are an optimization, so failures to write are logged and ignored.
+    """
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=cache_file.parent, prefix=f".{cache_file.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.debug(f"Failed to write cache file {cache_file}: {e}")
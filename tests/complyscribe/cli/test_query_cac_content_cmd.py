@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Unit test for query-cac-content command"""
+import json
+
+from click.testing import CliRunner
+
+from complyscribe.cli.commands.query_cac_content import query_cac_content_cmd
+from tests.testutils import TEST_DATA_DIR
+
+
+test_product = "rhel8"
+test_content_dir = TEST_DATA_DIR / "content_dir"
+
+
+def test_query_cac_content() -> None:
+    """Tests querying the controls and profiles of a rule and variable"""
+    runner = CliRunner()
+    result = runner.invoke(
+        query_cac_content_cmd,
+        [
+            "--cac-content-root",
+            str(test_content_dir),
+            "--product",
+            test_product,
+            "--rule",
+            "configure_crypto_policy",
+            "--variable",
+            "var_sshd_set_keepalive",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    output = json.loads(result.output)
+    rule = output[test_product]["rules"]["configure_crypto_policy"]
+    assert {"policy": "abcd-levels", "control": "S5"} in rule["controls"]
+    variable = output[test_product]["variables"]["var_sshd_set_keepalive"]
+    assert "example" in variable["profiles"]
+
+
+def test_query_cac_content_no_ids() -> None:
+    """Tests that a rule or variable is required"""
+    runner = CliRunner()
+    result = runner.invoke(
+        query_cac_content_cmd, ["--cac-content-root", str(test_content_dir)]
+    )
+    assert result.exit_code == 2
+    assert "At least one --rule or --variable is required." in result.output
@@ -5,11 +5,13 @@
 import pathlib
 from typing import Any, Generator, Tuple
 
+import pytest
 from click import BaseCommand
 from click.testing import CliRunner
 from git import Repo
 from ssg.controls import Policy
 from trestle.common.const import REPLACE_ME
+from trestle.common.model_utils import ModelUtils
 from trestle.oscal.catalog import Catalog, Control
 from trestle.oscal.component import ComponentDefinition
 
@@ -18,6 +20,7 @@ from complyscribe.cli.commands.sync_cac_content import (
     sync_cac_content_cmd,
     sync_cac_content_profile_cmd,
     sync_content_to_component_definition_cmd,
+    sync_content_to_component_definitions_cmd,
 )
 from tests.testutils import TEST_DATA_DIR, setup_for_catalog, setup_for_profile
 
@@ -292,7 +295,7 @@ def test_sync_product(tmp_repo: Tuple[str, Repo]) -> None:
     component = compdef.components[0]
     assert component.title == "rhel8"
     # Check rules component props are added
-    assert len(component.props) == 24
+    assert len(component.props) == 12
     rule_ids = [p.value for p in component.props if p.name == "Rule_Id"]
     assert sorted(rule_ids) == [
         "configure_crypto_policy",
@@ -397,11 +400,136 @@ def test_sync_product_create_validation_component(tmp_repo: Tuple[str, Repo]) ->
     assert component_definition.exists()
     compdef = ComponentDefinition.oscal_read(component_definition)
     component = compdef.components[0]
-    assert len(component.props) == 30
+    assert len(component.props) == 18
     assert component.title == "openscap"
     assert component.type == "validation"
 
 
+@pytest.mark.parametrize("component_definition_type", ["service", "validation"])
+def test_sync_product_streamed(
+    tmp_repo: Tuple[str, Repo], component_definition_type: str
+) -> None:
+    """Tests that a streamed component definition matches the one built in memory."""
+    repo_dir, _ = tmp_repo
+    repo_path = pathlib.Path(repo_dir)
+    setup_for_catalog(repo_path, test_cat, "catalog")
+    setup_for_profile(repo_path, test_prof, "profile")
+    component_definition = repo_path.joinpath(test_comp_path)
+
+    runner = CliRunner()
+    args = [
+        "--product",
+        test_product,
+        "--repo-path",
+        str(repo_path.resolve()),
+        "--cac-content-root",
+        test_content_dir,
+        "--cac-profile",
+        test_cac_profile,
+        "--oscal-profile",
+        test_prof,
+        "--committer-email",
+        "test@email.com",
+        "--committer-name",
+        "test name",
+        "--branch",
+        "test",
+        "--dry-run",
+        "--component-definition-type",
+        component_definition_type,
+    ]
+    result = runner.invoke(sync_content_to_component_definition_cmd, args)
+    assert result.exit_code == 0
+    compdef = ComponentDefinition.oscal_read(component_definition)
+    component_definition.unlink()
+
+    result = runner.invoke(
+        sync_content_to_component_definition_cmd, args + ["--stream"]
+    )
+    assert result.exit_code == 0
+    streamed_compdef = ComponentDefinition.oscal_read(component_definition)
+    assert ModelUtils.models_are_equivalent(
+        streamed_compdef.components, compdef.components, ignore_all_uuid=True
+    )
+
+
+def test_sync_product_batch(tmp_repo: Tuple[str, Repo]) -> None:
+    """Tests syncing several profile pairs of a product in one run."""
+    repo_dir, _ = tmp_repo
+    repo_path = pathlib.Path(repo_dir)
+    setup_for_catalog(repo_path, test_cat, "catalog")
+    setup_for_profile(repo_path, test_prof, "profile")
+    profiles_file = repo_path.joinpath("profiles.yaml")
+    profiles_file.write_text(
+        f"- cac-profile: {test_cac_profile}\n"
+        f"  oscal-profile: {test_prof}\n"
+        "  component-definition-type: validation\n"
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        sync_content_to_component_definitions_cmd,
+        [
+            "--product",
+            test_product,
+            "--repo-path",
+            str(repo_path.resolve()),
+            "--cac-content-root",
+            test_content_dir,
+            "--profile",
+            f"{test_cac_profile}:{test_prof}",
+            "--profiles-file",
+            str(profiles_file),
+            "--committer-email",
+            "test@email.com",
+            "--committer-name",
+            "test name",
+            "--branch",
+            "test",
+            "--dry-run",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    compdef = ComponentDefinition.oscal_read(repo_path.joinpath(test_comp_path))
+    assert [component.title for component in compdef.components] == [
+        "rhel8",
+        "openscap",
+    ]
+    assert len(compdef.components[0].props) == 12
+    assert len(compdef.components[1].props) == 18
+
+
+def test_sync_product_batch_invalid_pair(tmp_repo: Tuple[str, Repo]) -> None:
+    """Tests that batch sync rejects malformed profile pairs."""
+    repo_dir, _ = tmp_repo
+    repo_path = pathlib.Path(repo_dir)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        sync_content_to_component_definitions_cmd,
+        [
+            "--product",
+            test_product,
+            "--repo-path",
+            str(repo_path.resolve()),
+            "--cac-content-root",
+            test_content_dir,
+            "--profile",
+            test_cac_profile,
+            "--committer-email",
+            "test@email.com",
+            "--committer-name",
+            "test name",
+            "--branch",
+            "test",
+            "--dry-run",
+        ],
+    )
+    assert result.exit_code == 2
+    assert "Invalid profile pair" in result.output
+
+
 def test_missing_required_profile_option(tmp_repo: Tuple[str, Repo]) -> None:
     """Tests missing required option in sync-cac-content-profile command."""
 
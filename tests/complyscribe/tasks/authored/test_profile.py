@@ -11,8 +11,10 @@ import pytest
 from trestle.common.load_validate import load_validate_model_path
 from trestle.common.model_utils import ModelUtils
 from trestle.core.models.file_content_type import FileContentType
+from trestle.core.profile_resolver import ProfileResolver
 from trestle.oscal.profile import CombinationMethodValidValues, Profile
 
+from complyscribe.oscal_cache import ResolvedCatalogCache
 from complyscribe.tasks.authored.profile import AuthoredProfile, CatalogControlResolver
 from tests import testutils
 
@@ -131,3 +133,28 @@ def test_control_resolver(tmp_trestle_dir: str, input: str, response: str) -> No
     c2l.load(catalog)
     result_id = c2l.get_id(input)
     assert result_id == response
+
+
+def test_control_resolver_profile(tmp_trestle_dir: str) -> None:
+    "Test loading the CatalogControlResolver from a persisted profile index."
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = testutils.setup_for_profile(trestle_root, test_prof, "")
+    expected = CatalogControlResolver()
+    expected.load(
+        ProfileResolver.get_resolved_profile_catalog(trestle_root, args.profile_path)
+    )
+
+    c2l = CatalogControlResolver()
+    c2l.load_profile(trestle_root, args.profile_path)
+    assert c2l.all_controls == expected.all_controls
+    assert c2l._controls_by_label == expected._controls_by_label
+    assert ResolvedCatalogCache.for_dir().misses == 1
+
+    # A new process loads the index without resolving or reading the catalog
+    ResolvedCatalogCache.clear_instances()
+    c2l = CatalogControlResolver()
+    c2l.load_profile(trestle_root, args.profile_path)
+    cache = ResolvedCatalogCache.for_dir()
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert c2l.get_id("AC-2(2)") == "ac-2.2"
+    assert c2l._controls_by_label == expected._controls_by_label
@@ -4,6 +4,7 @@
 
 """Test author types for ComplyScribe"""
 
+import pathlib
 from unittest.mock import Mock
 
 import pytest
@@ -92,3 +93,31 @@ def test_get_model_dir_with_invalid_type() -> None:
     ):
         mock = Mock(spec=AuthoredObjectBase)
         _ = types.get_trestle_model_dir(mock)
+
+
+def test_get_model_inputs(tmp_trestle_dir: str) -> None:
+    """Test that model inputs include the imported models only."""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    _ = testutils.setup_for_compdef(trestle_root, test_comp, "")
+    _ = testutils.setup_for_profile(trestle_root, "simplified_nist_profile", "")
+    _ = testutils.setup_for_catalog(
+        trestle_root, "simplified_nist_catalog", "", "other_catalog"
+    )
+
+    profile = AuthoredProfile(tmp_trestle_dir)
+    catalog_path = (
+        trestle_root / "catalogs" / "simplified_nist_catalog" / "catalog.json"
+    )
+    assert types.get_model_inputs(profile, "md_prof", test_prof) == [
+        trestle_root / "md_prof" / test_prof,
+        trestle_root / "profiles" / test_prof,
+        catalog_path,
+    ]
+    assert types.get_model_dependency_names(profile, test_prof) == set()
+
+    compdef = AuthoredComponentDefinition(tmp_trestle_dir)
+    profile_path = trestle_root / "profiles" / test_prof / "profile.json"
+    assert types.get_model_dependencies(compdef, test_comp) == [
+        catalog_path,
+        profile_path,
+    ]
@@ -6,6 +6,7 @@
 
 import os
 import pathlib
+import shutil
 from typing import List
 from unittest.mock import Mock, patch
 
@@ -30,6 +31,7 @@ from complyscribe.tasks.authored.compdef import AuthoredComponentDefinition
 from complyscribe.tasks.authored.profile import AuthoredProfile
 from complyscribe.tasks.authored.ssp import AuthoredSSP, SSPIndex
 from complyscribe.tasks.base_task import ModelFilter, TaskException
+from complyscribe.tasks.model_manifest import ModelManifest
 from tests import testutils
 
 
@@ -101,6 +103,29 @@ def test_assemble_task_with_non_existent_markdown(tmp_trestle_dir: str) -> None:
         assemble_task.execute()
 
 
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_assemble_task_with_failures(tmp_trestle_dir: str, jobs: int) -> None:
+    """Test that failures of models assembled alone or in parallel are reported together"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    md_path = os.path.join(cat_md_dir, test_cat)
+    args = testutils.setup_for_catalog(trestle_root, test_cat, md_path)
+    cat_generate = CatalogGenerate()
+    assert cat_generate._run(args) == 0
+    # Markdown for catalogs that do not exist in the workspace
+    for name in ("missing_a", "missing_b"):
+        shutil.copytree(trestle_root / md_path, trestle_root / cat_md_dir / name)
+
+    catalog = AuthoredCatalog(tmp_trestle_dir)
+    assemble_task = AssembleTask(catalog, cat_md_dir, jobs=jobs)
+
+    with pytest.raises(TaskException) as e:
+        assemble_task.execute()
+    errors = str(e.value).splitlines()
+    assert len(errors) == 2
+    assert any("missing_a" in error for error in errors)
+    assert any("missing_b" in error for error in errors)
+
+
 @pytest.mark.parametrize(
     "skip_list",
     [
@@ -133,6 +158,42 @@ def test_assemble_task_with_skip(tmp_trestle_dir: str, skip_list: List[str]) ->
         mock.assemble.assert_not_called()
 
 
+def test_assemble_task_with_manifest(tmp_trestle_dir: str) -> None:
+    """Test that models with unchanged inputs are not assembled again"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    md_path = os.path.join(cat_md_dir, test_cat)
+    args = testutils.setup_for_catalog(trestle_root, test_cat, md_path)
+    cat_generate = CatalogGenerate()
+    assert cat_generate._run(args) == 0
+
+    mock = Mock(spec=AuthoredObjectBase)
+    mock.get_trestle_root.return_value = tmp_trestle_dir
+
+    def assemble(version: str) -> None:
+        manifest = ModelManifest(tmp_trestle_dir)
+        manifest.load()
+        assemble_task = AssembleTask(mock, cat_md_dir, version, manifest=manifest)
+        assert assemble_task.execute() == 0
+
+    with patch(
+        "complyscribe.tasks.authored.types.get_trestle_model_dir"
+    ) as mock_get_trestle_model_dir:
+        mock_get_trestle_model_dir.return_value = "catalogs"
+
+        assemble("1.0.0")
+        assert mock.assemble.call_count == 1
+        assemble("1.0.0")
+        assert mock.assemble.call_count == 1
+
+        # A different version or changed markdown assembles the model again
+        assemble("1.0.1")
+        assert mock.assemble.call_count == 2
+        ac1_md_path = os.path.join(trestle_root, md_path, "ac", "ac-1.md")
+        testutils.replace_string_in_file(ac1_md_path, "Access Control", "Changed")
+        assemble("1.0.1")
+        assert mock.assemble.call_count == 3
+
+
 def test_catalog_assemble_task(tmp_trestle_dir: str) -> None:
     """Test catalog assemble at the task level"""
     trestle_root = pathlib.Path(tmp_trestle_dir)
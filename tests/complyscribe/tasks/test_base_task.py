@@ -9,7 +9,7 @@ from typing import List
 
 import pytest
 
-from complyscribe.tasks.base_task import ModelFilter
+from complyscribe.tasks.base_task import ModelFilter, TaskBase, TaskException
 
 
 @pytest.mark.parametrize(
@@ -35,3 +35,43 @@ def test_is_skipped(
     model_path = pathlib.Path(model_name)
     model_filter = ModelFilter(skip_list, include_list)
     assert model_filter.is_skipped(model_path) == expected
+
+
+def test_is_skipped_with_changed_files(tmp_path: pathlib.Path) -> None:
+    """Test skip logic with changed files."""
+    model_filter = ModelFilter([], ["*"])
+    model_filter.set_changed_files(
+        [tmp_path / "markdown" / "changed" / "ac" / "ac-1.md"]
+    )
+    assert not model_filter.is_skipped(tmp_path / "markdown" / "changed")
+    assert model_filter.is_skipped(tmp_path / "markdown" / "unchanged")
+
+    model_filter = ModelFilter(["changed"], ["*"])
+    model_filter.set_changed_files([tmp_path / "markdown" / "changed" / "ac-1.md"])
+    assert model_filter.is_skipped(tmp_path / "markdown" / "changed")
+
+
+class _ModelTask(TaskBase):
+    def execute(self) -> int:
+        return 0
+
+
+def _process_model(model: pathlib.Path) -> None:
+    if model.name == "failed":
+        raise TaskException(f"Task failed for model {model}")
+    elif model.name == "crashed":
+        raise KeyError("missing")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_for_models_with_errors(tmp_path: pathlib.Path, jobs: int) -> None:
+    """Test that unexpected errors are reported with their type and model."""
+    models = [tmp_path / name for name in ["failed", "ok", "crashed"]]
+    task = _ModelTask(str(tmp_path), None)
+    with pytest.raises(TaskException) as e:
+        task.run_for_models(models, _process_model, jobs)
+    assert str(e.value).splitlines() == [
+        f"Task failed for model {models[0]}",
+        f"Unexpected KeyError processing model {models[2]}: 'missing'",
+    ]
+    assert isinstance(e.value.__cause__, KeyError)
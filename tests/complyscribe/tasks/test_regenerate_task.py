@@ -5,9 +5,11 @@
 """Test for complyscribe regenerate task"""
 
 import argparse
+import logging
 import os
 import pathlib
-from typing import List
+import shutil
+from typing import Dict, List
 from unittest.mock import Mock, patch
 
 import pytest
@@ -22,6 +24,7 @@ from complyscribe.tasks.authored.compdef import AuthoredComponentDefinition
 from complyscribe.tasks.authored.profile import AuthoredProfile
 from complyscribe.tasks.authored.ssp import AuthoredSSP, SSPIndex
 from complyscribe.tasks.base_task import ModelFilter, TaskException
+from complyscribe.tasks.model_manifest import ModelManifest
 from complyscribe.tasks.regenerate_task import RegenerateTask
 from tests import testutils
 
@@ -110,6 +113,34 @@ def test_regenerate_task_with_skip(tmp_trestle_dir: str, skip_list: List[str]) -
         mock.regenerate.assert_not_called()
 
 
+def test_regenerate_task_with_changed_files(tmp_trestle_dir: str) -> None:
+    """Test that models are selected by the changes to the paths they are built from"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    _ = testutils.setup_for_profile(trestle_root, test_prof, "")
+    _ = testutils.setup_for_catalog(trestle_root, test_cat, "", "other_catalog")
+
+    mock = Mock(spec=AuthoredProfile)
+    mock.get_trestle_root.return_value = tmp_trestle_dir
+    model_filter = ModelFilter([], ["*"])
+    regenerate_task = RegenerateTask(
+        mock, markdown_dir=prof_md_dir, model_filter=model_filter
+    )
+
+    with patch(
+        "complyscribe.tasks.authored.types.get_trestle_model_dir"
+    ) as mock_get_trestle_model_dir:
+        mock_get_trestle_model_dir.return_value = "profiles"
+
+        for changed_file, call_count in [
+            (trestle_root / prof_md_dir / test_prof / "ac" / "ac-1.md", 1),
+            (trestle_root / "catalogs" / test_cat / "catalog.json", 2),
+            (trestle_root / "catalogs" / "other_catalog" / "catalog.json", 2),
+        ]:
+            model_filter.set_changed_files([changed_file])
+            assert regenerate_task.execute() == 0
+            assert mock.regenerate.call_count == call_count
+
+
 def test_catalog_regenerate_task(tmp_trestle_dir: str) -> None:
     """Test catalog regenerate at the task level"""
     trestle_root = pathlib.Path(tmp_trestle_dir)
@@ -123,6 +154,94 @@ def test_catalog_regenerate_task(tmp_trestle_dir: str) -> None:
     assert os.path.exists(os.path.join(tmp_trestle_dir, md_path))
 
 
+def test_regenerate_task_with_manifest(
+    tmp_trestle_dir: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that models with unchanged inputs are not regenerated again"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    md_path = os.path.join(cat_md_dir, test_cat)
+    _ = testutils.setup_for_catalog(trestle_root, test_cat, md_path)
+    catalog = AuthoredCatalog(tmp_trestle_dir)
+
+    def regenerate() -> None:
+        manifest = ModelManifest(tmp_trestle_dir)
+        manifest.load()
+        caplog.clear()
+        assert RegenerateTask(catalog, cat_md_dir, manifest=manifest).execute() == 0
+
+    with caplog.at_level(logging.INFO):
+        regenerate()
+        assert "Skipping 0 unchanged models" in caplog.text
+        assert os.path.exists(os.path.join(tmp_trestle_dir, md_path))
+        regenerate()
+        assert "Skipping 1 unchanged models" in caplog.text
+
+        # Changed JSON regenerates the model
+        catalog_path = trestle_root / "catalogs" / test_cat / "catalog.json"
+        testutils.replace_string_in_file(str(catalog_path), "Access Control", "Changed")
+        regenerate()
+        assert "Skipping 0 unchanged models" in caplog.text
+
+
+def test_manifest_runs_dependents(tmp_trestle_dir: str) -> None:
+    """Test that models are run after the changed models they depend on"""
+    models = [pathlib.Path(name) for name in ["child", "parent", "other"]]
+    dependencies = {"child": {"parent"}, "parent": set(), "other": set()}
+    inputs = {"child": "a", "parent": "a", "other": "a"}
+    runs: List[List[str]] = []
+
+    def get_state(model: pathlib.Path) -> str:
+        return inputs[model.name] + "".join(
+            inputs[name] for name in sorted(dependencies[model.name])
+        )
+
+    def run(changed: List[pathlib.Path]) -> None:
+        runs.append([model.name for model in changed])
+        # Processing the parent changes the inputs of the child
+        if "parent" in runs[-1]:
+            inputs["parent"] += "b"
+
+    manifest = ModelManifest(tmp_trestle_dir, read_only=True)
+    manifest.run_changed(
+        "task", models, get_state, lambda model: dependencies[model.name], run
+    )
+    assert runs == [["parent", "other"], ["child"]]
+
+    # The states recorded on save make the next run a no-op
+    runs.clear()
+    manifest.save()
+    manifest.run_changed(
+        "task", models, get_state, lambda model: dependencies[model.name], run
+    )
+    assert runs == []
+    assert not manifest.manifest_file.exists()
+
+
+def _read_tree(directory: pathlib.Path) -> Dict[str, bytes]:
+    return {
+        str(path.relative_to(directory)): path.read_bytes()
+        for path in directory.rglob("*")
+        if path.is_file()
+    }
+
+
+def test_regenerate_task_in_parallel(tmp_trestle_dir: str) -> None:
+    """Test that regenerating models in parallel writes the same markdown"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    _ = testutils.setup_for_catalog(trestle_root, test_cat, cat_md_dir)
+    catalogs_dir = trestle_root / "catalogs"
+    for i in range(3):
+        shutil.copytree(catalogs_dir / test_cat, catalogs_dir / f"{test_cat}_{i}")
+
+    catalog = AuthoredCatalog(tmp_trestle_dir)
+    assert RegenerateTask(catalog, "md_serial").execute() == 0
+    assert RegenerateTask(catalog, "md_parallel", jobs=2).execute() == 0
+
+    serial = _read_tree(trestle_root / "md_serial")
+    assert len({name.split(os.sep)[0] for name in serial}) == 4
+    assert _read_tree(trestle_root / "md_parallel") == serial
+
+
 def test_profile_regenerate_task(tmp_trestle_dir: str) -> None:
     """Test profile regenerate at the task level"""
     trestle_root = pathlib.Path(tmp_trestle_dir)
@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+
+"""Test for ComplyScribe sync CaC catalog task."""
+
+import logging
+import pathlib
+import time
+from typing import Any, Generator
+
+import pytest
+from trestle.core.generators import generate_sample_model
+from trestle.oscal.catalog import Catalog, Control, Group
+
+from complyscribe.tasks.sync_cac_catalog_task import CatalogIndex, SyncCacCatalogTask
+
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_FAMILIES = 50
+BENCHMARK_CONTROLS_PER_FAMILY = 20
+BENCHMARK_ENHANCEMENTS_PER_CONTROL = 4
+
+
+def _new_control(control_id: str) -> Control:
+    control = generate_sample_model(Control)
+    control.id = control_id
+    return control
+
+
+def _flatten_controls(controls: Any) -> Generator[Control, None, None]:
+    for control in controls:
+        if control.controls:
+            yield from _flatten_controls(control.controls)
+        if isinstance(control, Control):
+            yield control
+
+
+def test_catalog_index() -> None:
+    """Test looking up and adding groups and controls by id."""
+    catalog = generate_sample_model(Catalog)
+    group = generate_sample_model(Group)
+    group.id = "ac"
+    control = _new_control("ac-1")
+    control.controls = []
+    group.controls = [control]
+    catalog.groups = [group]
+
+    index = CatalogIndex(catalog)
+    # Assigned models are copied, so compare with the ones in the catalog
+    group = index.get_group("ac")
+    assert group is not None
+    assert group is catalog.groups[0]
+    assert index.get_group("au") is None
+    parent = index.get_control(group, "ac-1")
+    assert parent is not None
+    assert parent is group.controls[0]
+
+    enhancement = _new_control("ac-1.1")
+    index.add_control(parent, enhancement)
+    assert parent.controls == [enhancement]
+    assert index.get_control(parent, "ac-1.1") is enhancement
+    # Children are looked up per parent
+    assert index.get_control(group, "ac-1.1") is None
+
+    new_group = generate_sample_model(Group)
+    new_group.id = "au"
+    index.add_group(new_group)
+    assert catalog.groups[-1] is new_group
+    assert index.get_group("au") is new_group
+
+
+def _write_benchmark_policy(controls_dir: pathlib.Path) -> int:
+    """Write a synthetic NIST like policy and return the number of controls."""
+    lines = [
+        "id: benchmark",
+        "title: Synthetic benchmark policy",
+        "policy: Synthetic benchmark policy",
+        "controls:",
+    ]
+    count = 0
+    for family in range(BENCHMARK_FAMILIES):
+        family_id = f"F{family:02d}"
+        for number in range(1, BENCHMARK_CONTROLS_PER_FAMILY + 1):
+            control_ids = [f"{family_id}-{number}"] + [
+                f"{family_id}-{number}({enhancement})"
+                for enhancement in range(1, BENCHMARK_ENHANCEMENTS_PER_CONTROL + 1)
+            ]
+            for control_id in control_ids:
+                lines.append(f"  - id: {control_id}")
+                lines.append(f"    title: {control_id} - Control {control_id}")
+                lines.append(
+                    f"    description: 'Configure [Assignment: {control_id} value].'"
+                )
+                count += 1
+    controls_dir.mkdir(parents=True)
+    controls_dir.joinpath("benchmark.yml").write_text("\n".join(lines) + "\n")
+    return count
+
+
+@pytest.mark.slow
+def test_sync_catalog_benchmark(tmp_path: pathlib.Path, tmp_trestle_dir: str) -> None:
+    """Benchmark syncing a synthetic 5,000 control policy into a catalog."""
+    cac_content_root = tmp_path / "content"
+    count = _write_benchmark_policy(cac_content_root / "controls")
+    assert count == 5000
+
+    task = SyncCacCatalogTask(
+        cac_content_root=cac_content_root,
+        policy_id="benchmark",
+        oscal_catalog="benchmark",
+        working_dir=tmp_trestle_dir,
+    )
+    policy = task._load_policy_controls()
+
+    # Create the catalog, then merge the policy into the existing catalog
+    for run in ("create", "merge"):
+        start = time.perf_counter()
+        task._create_or_update_catalog(policy)
+        logger.info(
+            f"Catalog {run} of {count} controls took {time.perf_counter() - start:.3f}s"
+        )
+
+    catalog = Catalog.oscal_read(
+        pathlib.Path(tmp_trestle_dir, "catalogs", "benchmark", "catalog.json")
+    )
+    assert len(catalog.groups) == BENCHMARK_FAMILIES
+    assert sum(1 for _ in _flatten_controls(catalog.groups)) == count
@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+
+"""Test for the incremental update of ComplyScribe sync CaC content task."""
+
+from typing import List
+from unittest.mock import Mock
+
+from ssg.controls import Status
+from trestle.core.generators import generate_sample_model
+from trestle.oscal.common import Property
+from trestle.oscal.component import (
+    ControlImplementation,
+    ImplementedRequirement,
+    Statement,
+)
+
+from complyscribe.tasks.sync_cac_content_task import (
+    ChangeSummary,
+    SyncCacContentTask,
+    merge_control_implementations,
+    merge_implemented_requirements,
+    merge_rule_props,
+)
+
+
+def _rule_props(rule_ids: List[str]) -> List[Property]:
+    props: List[Property] = list()
+    for i, rule_id in enumerate(rule_ids):
+        props.append(Property(name="Rule_Id", value=rule_id, remarks=f"rule_set_{i}"))
+        props.append(
+            Property(
+                name="Rule_Description",
+                value=f"{rule_id} desc",
+                remarks=f"rule_set_{i}",
+            )
+        )
+    return props
+
+
+def _implemented_req(control_id: str, rule_id: str) -> ImplementedRequirement:
+    implemented_req = generate_sample_model(ImplementedRequirement)
+    implemented_req.control_id = control_id
+    implemented_req.props = [Property(name="Rule_Id", value=rule_id)]
+    statement = generate_sample_model(Statement)
+    statement.statement_id = f"{control_id}_smt.a"
+    implemented_req.statements = [statement]
+    return implemented_req
+
+
+def test_merge_rule_props() -> None:
+    """Test merging component props by rule id."""
+    old_props = _rule_props(["rule_a", "rule_b", "rule_c"])
+    new_props = _rule_props(["rule_a", "rule_x"])
+    summary = ChangeSummary()
+    merged = merge_rule_props(old_props, new_props, summary)
+    assert merged is not None
+    assert [prop.value for prop in merged] == [
+        "rule_a",
+        "rule_a desc",
+        "rule_x",
+        "rule_x desc",
+    ]
+    assert merged[0] is old_props[0]
+    assert (summary.added, summary.changed, summary.removed, summary.unchanged) == (
+        1,
+        0,
+        2,
+        1,
+    )
+    assert summary.updated
+
+    summary = ChangeSummary()
+    assert merge_rule_props(old_props, _rule_props([]), summary) is None
+    assert summary.removed == 3
+
+
+def test_merge_rule_props_keeps_renumbered_rule_sets() -> None:
+    """Test that inserting a rule keeps the props of the later rule sets."""
+    old_props = _rule_props(["rule_a", "rule_b", "rule_c"])
+    new_props = _rule_props(["rule_a", "rule_x", "rule_b", "rule_c"])
+    summary = ChangeSummary()
+    merged = merge_rule_props(old_props, new_props, summary)
+    assert merged is not None
+    assert [(prop.value, prop.remarks) for prop in merged] == [
+        (prop.value, prop.remarks) for prop in new_props
+    ]
+    # The later rule sets are kept and renumbered
+    assert merged[0] is old_props[0]
+    assert merged[4] is not new_props[4]
+    assert merged[4].remarks == "rule_set_2"
+    assert old_props[2].remarks == "rule_set_1"
+    assert (summary.added, summary.changed, summary.removed, summary.unchanged) == (
+        1,
+        0,
+        0,
+        3,
+    )
+
+    # A changed rule set matched by rule id takes the new props
+    new_props = _rule_props(["rule_a", "rule_c"])
+    new_props[3].value = "rule_c new desc"
+    summary = ChangeSummary()
+    merged = merge_rule_props(old_props, new_props, summary)
+    assert merged is not None
+    assert merged[3].value == "rule_c new desc"
+    assert (summary.added, summary.changed, summary.removed, summary.unchanged) == (
+        0,
+        1,
+        1,
+        1,
+    )
+
+
+def test_merge_implemented_requirements() -> None:
+    """Test merging implemented requirements by control id."""
+    old_reqs = [_implemented_req("ac-1", "rule_a"), _implemented_req("ac-2", "rule_b")]
+    new_reqs = [
+        _implemented_req("ac-1", "rule_a"),
+        _implemented_req("ac-2", "rule_c"),
+        _implemented_req("ac-3", "rule_d"),
+    ]
+    summary = ChangeSummary()
+    merged = merge_implemented_requirements(old_reqs, new_reqs, summary)
+
+    assert [req.control_id for req in merged] == ["ac-1", "ac-2", "ac-3"]
+    # Unchanged requirements are kept and changed ones keep their UUIDs
+    assert merged[0] is old_reqs[0]
+    assert merged[1].uuid == old_reqs[1].uuid
+    assert merged[1].statements[0].uuid == old_reqs[1].statements[0].uuid
+    assert merged[1].props[0].value == "rule_c"
+    assert merged[2].uuid == new_reqs[2].uuid
+    assert str(summary) == "1 added, 1 changed, 0 removed, 1 unchanged"
+
+
+def test_merge_control_implementations() -> None:
+    """Test merging control implementations by source."""
+    old_ci = generate_sample_model(ControlImplementation)
+    old_ci.source = "profiles/example/profile.json"
+    old_ci.implemented_requirements = [_implemented_req("ac-1", "rule_a")]
+    new_ci = generate_sample_model(ControlImplementation)
+    new_ci.source = old_ci.source
+    new_ci.implemented_requirements = [_implemented_req("ac-1", "rule_a")]
+
+    summary = ChangeSummary()
+    merged, changed = merge_control_implementations([old_ci], [new_ci], summary)
+    assert merged is not None
+    assert not changed
+    assert not summary.updated
+    assert merged[0].uuid == old_ci.uuid
+    assert merged[0].implemented_requirements[0].uuid == (
+        old_ci.implemented_requirements[0].uuid
+    )
+
+    other_ci = generate_sample_model(ControlImplementation)
+    other_ci.source = "profiles/other/profile.json"
+    summary = ChangeSummary()
+    merged, changed = merge_control_implementations([old_ci], [other_ci], summary)
+    assert changed
+    assert merged == [other_ci]
+    assert (summary.added, summary.removed) == (1, 1)
+
+
+def test_implemented_requirement_rule_selection(tmp_trestle_dir: str) -> None:
+    """Test that implemented requirements only include the selected rules."""
+    task = SyncCacContentTask(
+        "rhel8", "example.profile", "content", "service", "profile", tmp_trestle_dir
+    )
+    task._product_context = Mock()
+    task._product_context.get_profile.return_value = Mock(
+        rules=["rule_a", "rule_b", "rule_c"], unselected_rules=["rule_c"]
+    )
+    task._collect_rules()
+    assert task.rule_selection == frozenset(["rule_a", "rule_b"])
+    # The selection is frozen once the rules are collected
+    task.rules.append("rule_c")
+
+    task.catalog_helper = Mock(get_id=lambda control_id: control_id.lower())
+    task.rules_by_id = {rule_id: Mock() for rule_id in ["rule_a", "rule_b", "rule_c"]}
+    rules_transformer = Mock()
+    rules_transformer.get_rule_id_props.side_effect = lambda rule_ids: [
+        Property(name="Rule_Id", value=rule_id) for rule_id in rule_ids
+    ]
+    control = Mock(
+        id="AC-1",
+        notes="",
+        status=Status.AUTOMATED,
+        rules=["rule_c", "rule_b", "var_x=1", "rule_a", "rule_missing"],
+    )
+    implemented_req = task._create_implemented_requirement(control, rules_transformer)
+    assert implemented_req is not None
+    assert implemented_req.control_id == "ac-1"
+    rule_ids = [p.value for p in implemented_req.props if p.name == "Rule_Id"]
+    assert rule_ids == ["rule_b", "rule_a"]
@@ -0,0 +1,276 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+
+"""Test for ComplyScribe sync CaC schedule task."""
+
+import pathlib
+import shutil
+from typing import Dict, List
+from unittest.mock import Mock
+
+import pytest
+from git import Repo
+
+from complyscribe.tasks import sync_cac_schedule_task
+from complyscribe.tasks.base_task import TaskException
+from complyscribe.tasks.sync_cac_schedule_task import (
+    CATALOG_JOB,
+    COMPDEF_JOB,
+    PROFILE_JOB,
+    ChangeImpact,
+    SyncCacScheduleTask,
+    SyncJob,
+    get_change_impact,
+    get_changed_files,
+)
+from complyscribe.utils import ProductContext
+
+
+test_product = "rhel8"
+test_content_path = pathlib.Path("tests/data/content_dir").resolve()
+test_content_dir = str(test_content_path)
+
+
+def test_build_jobs(tmp_trestle_dir: str) -> None:
+    """Test discovering sync jobs from the CaC profile selections."""
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir)
+    assert task.discover_products() == [test_product]
+
+    jobs = {job.job_id: job for job in task.build_jobs()}
+    catalog_job = f"{CATALOG_JOB}:abcd-levels"
+    profile_job = f"{PROFILE_JOB}:{test_product}:abcd-levels"
+    compdef_job = f"{COMPDEF_JOB}:{test_product}:example:rhel8-abcd-levels-medium"
+    assert list(jobs.keys()) == [catalog_job, profile_job, compdef_job]
+    assert jobs[catalog_job].depends_on == []
+    assert jobs[profile_job].depends_on == [catalog_job]
+    assert jobs[compdef_job].depends_on == [profile_job]
+    assert jobs[compdef_job].args["cac_profile"] == str(
+        test_content_path / "products" / test_product / "profiles" / "example.profile"
+    )
+    assert jobs[compdef_job].args["oscal_profile"] == "rhel8-abcd-levels-medium"
+
+
+def test_add_policy_jobs_skips_output_collisions(
+    tmp_trestle_dir: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that profiles selecting the same policy level do not share an output."""
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir)
+    jobs: Dict[str, SyncJob] = dict()
+    compdef_jobs_by_output: Dict[str, str] = dict()
+    profiles_dir = test_content_path / "products" / test_product / "profiles"
+    for profile_id, levels in [
+        ("example", ["low", "medium"]),
+        ("example", ["medium"]),
+        ("other", ["medium", "high"]),
+    ]:
+        task._add_policy_jobs(
+            jobs,
+            compdef_jobs_by_output,
+            test_product,
+            str(profiles_dir / f"{profile_id}.profile"),
+            "abcd-levels",
+            levels,
+        )
+
+    compdef_jobs = [job.job_id for job in jobs.values() if job.kind == COMPDEF_JOB]
+    assert compdef_jobs == [
+        f"{COMPDEF_JOB}:{test_product}:example:rhel8-abcd-levels-low",
+        f"{COMPDEF_JOB}:{test_product}:example:rhel8-abcd-levels-medium",
+        f"{COMPDEF_JOB}:{test_product}:other:rhel8-abcd-levels-high",
+    ]
+    assert caplog.text.count("Skipping abcd-levels level medium") == 1
+    assert f"already synced by {compdef_jobs[1]}" in caplog.text
+
+
+def test_build_jobs_sorts_profiles(
+    tmp_path: pathlib.Path, tmp_trestle_dir: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the profile with the lowest id wins output collisions."""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_path, content_dir)
+    profiles_dir = content_dir / "products" / test_product / "profiles"
+    shutil.copy(profiles_dir / "example.profile", profiles_dir / "example_gui.profile")
+    product_context = Mock(
+        profiles=[Mock(profile_id="example_gui"), Mock(profile_id="example")]
+    )
+    monkeypatch.setattr(
+        ProductContext,
+        "for_product",
+        Mock(return_value=product_context),
+    )
+    policy = Mock(id="abcd-levels", levels=[])
+    monkeypatch.setattr(
+        sync_cac_schedule_task,
+        "load_controls_manager",
+        Mock(return_value=Mock(policies={"abcd-levels": policy})),
+    )
+
+    task = SyncCacScheduleTask(str(content_dir), tmp_trestle_dir, [test_product])
+    compdef_jobs = [job.job_id for job in task.build_jobs() if job.kind == COMPDEF_JOB]
+    assert compdef_jobs == [
+        f"{COMPDEF_JOB}:{test_product}:example:rhel8-abcd-levels-medium"
+    ]
+
+
+def test_run_jobs_in_order(
+    tmp_trestle_dir: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that jobs run after the jobs they depend on."""
+    executed: List[str] = list()
+
+    def run_sync_job(job: SyncJob, working_dir: str) -> str:
+        executed.append(job.job_id)
+        return job.job_id
+
+    monkeypatch.setattr(sync_cac_schedule_task, "run_sync_job", run_sync_job)
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir)
+    task.run_jobs(task.build_jobs())
+    assert executed == [job.job_id for job in task.build_jobs()]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_jobs_skips_dependents_of_failures(tmp_trestle_dir: str, jobs: int) -> None:
+    """Test that jobs depending on a failed job are skipped alone or in the pool."""
+    sync_jobs = [
+        SyncJob("a", "unknown", {}),
+        SyncJob("b", "unknown", {}, ["a"]),
+        SyncJob("c", "unknown", {}),
+    ]
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir, jobs=jobs)
+    with pytest.raises(TaskException) as e:
+        task.run_jobs(sync_jobs)
+    assert "Sync job a failed: Unknown sync job type unknown" in str(e.value)
+    assert "Sync job b skipped" in str(e.value)
+    assert "Sync job c failed: Unknown sync job type unknown" in str(e.value)
+
+
+def test_get_change_impact() -> None:
+    """Test mapping changed CaC files to the content they affect."""
+    impact = get_change_impact(
+        test_content_dir,
+        [
+            "controls/1234-example.yml",
+            "controls/abcd-levels/section-1.yml",
+            "products/rhel8/profiles/example.profile",
+            "products/rhel9/product.yml",
+            "linux_os/guide/test/sshd_set_keepalive/rule.yml",
+            "linux_os/guide/test/sshd_set_keepalive/tests/correct.pass.sh",
+            "linux_os/guide/test/configure_crypto_policy/bash/shared.sh",
+            "linux_os/guide/test/var_sshd_set_keepalive.var",
+            "docs/manual.md",
+        ],
+    )
+    # Policies are identified by the id in their policy file
+    assert impact.policies == {"1234-levels", "abcd-levels"}
+    assert impact.profiles == {("rhel8", "example")}
+    assert impact.products == {"rhel9"}
+    # Remediations affect their rule, rule tests have no impact
+    assert impact.rules == {"configure_crypto_policy", "sshd_set_keepalive"}
+    assert impact.variables == {"var_sshd_set_keepalive"}
+    assert not impact.all_products
+
+    impact = get_change_impact(test_content_dir, ["shared/macros/10-ansible.jinja"])
+    assert impact.all_products
+
+
+def test_select_jobs(tmp_trestle_dir: str) -> None:
+    """Test selecting only the jobs affected by changed CaC content."""
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir)
+    jobs = task.build_jobs()
+    catalog_job, profile_job, compdef_job = [job.job_id for job in jobs]
+
+    # A rule selected by the CaC profile only affects its component definition
+    selected = task.select_jobs(jobs, ChangeImpact(rules={"sshd_set_keepalive"}))
+    assert [job.job_id for job in selected] == [compdef_job]
+    assert selected[0].depends_on == []
+    assert jobs[2].depends_on == [profile_job]
+
+    # Changed controls affect every job of the policy
+    selected = task.select_jobs(jobs, ChangeImpact(policies={"abcd-levels"}))
+    assert [job.job_id for job in selected] == [catalog_job, profile_job, compdef_job]
+
+    assert task.select_jobs(jobs, ChangeImpact(rules={"unselected_rule"})) == []
+    assert task.select_jobs(jobs, ChangeImpact(all_products=True)) == jobs
+
+
+def test_select_jobs_follows_extends(
+    tmp_path: pathlib.Path, tmp_trestle_dir: str
+) -> None:
+    """Test that a changed CaC profile selects the profiles extending it."""
+    profiles_dir = tmp_path / "products" / test_product / "profiles"
+    profiles_dir.mkdir(parents=True)
+    for profile_id, parent in [
+        ("example", None),
+        ("example_gui", "example"),
+        ("example_gui_strict", "example_gui"),
+        ("other", None),
+    ]:
+        content = "documentation_complete: true\n"
+        if parent:
+            content += f"extends: {parent}\n"
+        (profiles_dir / f"{profile_id}.profile").write_text(content)
+    jobs = [
+        SyncJob(
+            profile_id,
+            COMPDEF_JOB,
+            {
+                "product": test_product,
+                "policy_id": "abcd-levels",
+                "cac_profile": str(profiles_dir / f"{profile_id}.profile"),
+            },
+        )
+        for profile_id in ["example", "example_gui", "example_gui_strict", "other"]
+    ]
+    task = SyncCacScheduleTask(str(tmp_path), tmp_trestle_dir)
+    selected = task.select_jobs(
+        jobs, ChangeImpact(profiles={(test_product, "example_gui")})
+    )
+    assert [job.job_id for job in selected] == ["example_gui", "example_gui_strict"]
+    selected = task.select_jobs(
+        jobs, ChangeImpact(profiles={(test_product, "example")})
+    )
+    assert [job.job_id for job in selected] == [
+        "example",
+        "example_gui",
+        "example_gui_strict",
+    ]
+
+
+def test_select_jobs_keeps_output_order(tmp_trestle_dir: str) -> None:
+    """Test that jobs writing the same output stay ordered when selected."""
+    jobs = [
+        SyncJob(job_id, COMPDEF_JOB, {"product": "p", "policy_id": policy_id})
+        for job_id, policy_id in [("a", "x"), ("b", "y"), ("c", "x")]
+    ]
+    for job, previous in zip(jobs[1:], jobs):
+        job.args["cac_profile"] = "example.profile"
+        job.depends_on = [previous.job_id]
+    task = SyncCacScheduleTask(test_content_dir, tmp_trestle_dir)
+    selected = task.select_jobs(jobs, ChangeImpact(policies={"x"}))
+    assert [(job.job_id, job.depends_on) for job in selected] == [
+        ("a", []),
+        ("c", ["a"]),
+    ]
+
+
+def test_get_changed_files(tmp_path: pathlib.Path) -> None:
+    """Test listing the files changed in a commit range relative to the content."""
+    repo = Repo.init(tmp_path)
+    content_root = tmp_path / "content"
+    rule_file = content_root / "rules" / "rule_a" / "rule.yml"
+    rule_file.parent.mkdir(parents=True)
+    rule_file.write_text("title: Rule A\n")
+    tmp_path.joinpath("README.md").write_text("readme\n")
+    repo.index.add([str(rule_file), str(tmp_path / "README.md")])
+    repo.index.commit("Add rule")
+    rule_file.write_text("title: Rule A changed\n")
+    tmp_path.joinpath("README.md").write_text("readme changed\n")
+    repo.index.add([str(rule_file), str(tmp_path / "README.md")])
+    repo.index.commit("Change rule")
+
+    assert get_changed_files(str(content_root), "HEAD~1..HEAD") == [
+        "rules/rule_a/rule.yml"
+    ]
+    with pytest.raises(TaskException, match="Failed to get the changes"):
+        get_changed_files(str(content_root), "missing..HEAD")
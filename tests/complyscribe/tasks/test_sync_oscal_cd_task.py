@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+
+"""Test for the parameter handling of ComplyScribe sync OSCAL cd task."""
+
+import logging
+import pathlib
+import shutil
+from unittest.mock import Mock, patch
+
+import pytest
+from trestle.oscal.common import Property
+from trestle.oscal.component import ImplementedRequirement, SetParameter
+
+from complyscribe.cac_index import RuleDirIndex, VariableIndex
+from complyscribe.tasks.base_task import TaskException
+from complyscribe.tasks.sync_oscal_content_cd_task import (
+    ParameterDiffInfo,
+    SyncOscalCdTask,
+)
+from complyscribe.utils import CacYamlSession
+from tests import testutils
+from tests.testutils import TEST_DATA_DIR
+
+
+test_content_dir = TEST_DATA_DIR / "content_dir"
+
+
+def test_validate_variables(tmp_path: pathlib.Path) -> None:
+    """Test validating parameters against the indexed variables."""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    session = CacYamlSession()
+    diff = ParameterDiffInfo(
+        content_dir,
+        {"var_password_pam_minlen": "14"},
+        [
+            SetParameter(param_id="var_sshd_set_keepalive", values=["42", "43"]),
+            SetParameter(param_id="var_missing", values=["1"]),
+            SetParameter(param_id="var_password_pam_minlen", values=["44"]),
+        ],
+        session,
+    )
+    diff.validate_variables()
+
+    assert [p.param_id for p in diff.parameters_add] == ["var_sshd_set_keepalive"]
+    assert diff.variable_index is VariableIndex.for_root(str(content_dir))
+    options = diff.variable_index.get_options("var_sshd_set_keepalive")
+    assert options["42"] == "42" and options["43"] == "43"
+    assert diff.variable_index.get_options("var_password_pam_minlen")["44"] == "44"
+
+    # Var files are written once when the session is flushed
+    var_file = (
+        content_dir / "linux_os" / "guide" / "test" / "var_sshd_set_keepalive.var"
+    )
+    assert b"42" not in var_file.read_bytes()
+    session.flush()
+    assert session.write_count == 2
+    assert b"'42': '42'\n" in var_file.read_bytes()
+
+
+def test_get_all_cac_rule_ids(
+    tmp_path: pathlib.Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test getting the rule ids from the persisted rule directory index."""
+    task = SyncOscalCdTask(test_content_dir, str(tmp_path), "rhel8", "example")
+    caplog.set_level(logging.INFO)
+    with patch(
+        "complyscribe.tasks.sync_oscal_content_cd_task.BENCHMARKS",
+        [str(pathlib.Path("linux_os", "guide"))],
+    ):
+        rule_ids = task.get_all_cac_rule_ids()
+        assert rule_ids == {
+            "configure_crypto_policy",
+            "file_groupownership_sshd_private_key",
+            "sshd_set_keepalive",
+        }
+        assert "directories listed" in caplog.text
+
+        # The persisted index is reused without walking the benchmark again
+        RuleDirIndex.clear_instances()
+        caplog.clear()
+        assert task.get_all_cac_rule_ids() == rule_ids
+        assert "directories listed" not in caplog.text
+
+
+def test_resolution_is_memoized(tmp_trestle_dir: str) -> None:
+    """Test resolving each source and loading the cac profiles once per task."""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = testutils.setup_for_profile(trestle_root, "simplified_nist_profile", "")
+    task = SyncOscalCdTask(test_content_dir, tmp_trestle_dir, "rhel8", "example")
+    catalog_helper = task.get_catalog_helper(args.profile_path)
+    assert task.get_catalog_helper(args.profile_path) is catalog_helper
+    assert catalog_helper.get_id("AC-2(2)") == "ac-2.2"
+
+    profiles = [Mock(profile_id="example"), Mock(profile_id="other")]
+    with patch(
+        "complyscribe.tasks.sync_oscal_content_cd_task.get_profiles_from_products",
+        return_value=profiles,
+    ) as mock_get_profiles:
+        assert task.get_cac_profile("example") is profiles[0]
+        assert task.get_cac_profile("other") is profiles[1]
+        assert mock_get_profiles.call_count == 1
+
+        # Profiles are loaded again once cac content files were written
+        task.session.write_count += 1
+        assert task.get_cac_profile("example") is profiles[0]
+        assert mock_get_profiles.call_count == 2
+
+        with pytest.raises(RuntimeError, match="profile missing not found"):
+            task.get_cac_profile("missing")
+
+
+def _control_file(control_id: str) -> str:
+    return f"id: {control_id.lower()}\ncontrols:\n  - id: {control_id}\n    rules: []\n"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_sync_to_control_files(
+    tmp_trestle_dir: str, jobs: int, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test syncing control files one at a time and in a process pool."""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = testutils.setup_for_profile(trestle_root, "simplified_nist_profile", "")
+    controls_dir = trestle_root / "controls"
+    controls_dir.mkdir()
+    control_files = list()
+    for control_id in ["AC-1", "AC-2", "AC-3"]:
+        control_file = controls_dir / f"{control_id.lower()}.yml"
+        control_file.write_text(_control_file(control_id))
+        control_files.append(control_file)
+
+    task = SyncOscalCdTask(trestle_root, tmp_trestle_dir, "rhel8", "example", jobs)
+    task.catalog_helper = task.get_catalog_helper(args.profile_path)
+    task.all_rule_ids_from_cac = {"sshd_set_keepalive"}
+    for control_id in ["ac-1", "ac-2", "ac-3", "ac-4"]:
+        task.implemented_requirement_dict[control_id] = ImplementedRequirement(
+            uuid="11111111-1111-4111-8111-111111111111",
+            control_id=control_id,
+            description="",
+            props=[Property(name="Rule_Id", value="sshd_set_keepalive")],
+        )
+    caplog.set_level(logging.INFO)
+    task.sync_to_control_files(control_files)
+    task.session.flush()
+
+    for control_id, control_file in zip(["AC-1", "AC-2", "AC-3"], control_files):
+        assert control_file.read_text() == (
+            f"id: {control_id.lower()}\ncontrols:\n    - id: {control_id}\n"
+            "      rules:\n          - sshd_set_keepalive\n"
+        )
+    assert [
+        record.getMessage() for record in caplog.records if "Add rule" in record.msg
+    ] == [
+        f"Add rule sshd_set_keepalive to control: {control_id}"
+        for control_id in ["AC-1", "AC-2", "AC-3"]
+    ]
+    assert task.session.write_count == 3
+
+    if jobs > 1:
+        # Nothing is written when a control file fails to sync
+        control_file = controls_dir / "ac-4.yml"
+        control_file.write_text(_control_file("AC-4"))
+        with pytest.raises(TaskException, match="missing.yml failed") as e:
+            task.sync_to_control_files(
+                [
+                    control_file,
+                    controls_dir / "missing.yml",
+                    controls_dir / "missing2.yml",
+                ]
+            )
+        assert "missing2.yml failed" in str(e.value)
+        task.session.flush()
+        assert control_file.read_text() == _control_file("AC-4")
+        assert task.session.write_count == 3
@@ -5,6 +5,7 @@
 """Test for top-level complyscribe logic."""
 
 import os
+import pathlib
 from typing import Callable, List, Tuple
 from unittest.mock import Mock, patch
 
@@ -14,7 +15,7 @@ from git.repo import Repo
 
 from complyscribe.bot import ComplyScribe, RepoException
 from complyscribe.provider import GitProvider, GitProviderException
-from complyscribe.tasks.base_task import TaskBase, TaskException
+from complyscribe.tasks.base_task import ModelFilter, TaskBase, TaskException
 
 
 def check_lists_equal(list1: List[str], list2: List[str]) -> bool:
@@ -295,6 +296,40 @@ def test_run_with_failed_pre_task(tmp_repo: Tuple[str, Repo]) -> None:
         )
 
 
+def test_run_with_base_ref(tmp_repo: Tuple[str, Repo]) -> None:
+    """Test bot run with tasks limited to models changed since a base ref"""
+    repo_path, repo = tmp_repo
+
+    markdown_dir = pathlib.Path(repo_path, "markdown")
+    for model_name in ["changed", "unchanged"]:
+        model_dir = markdown_dir / model_name
+        model_dir.mkdir(parents=True)
+        model_dir.joinpath("ac-1.md").write_text("Test content")
+    repo.git.add(all=True)
+    repo.index.commit("Add markdown")
+    repo.create_head("base", force=True)
+    markdown_dir.joinpath("changed", "ac-1.md").write_text("Updated content")
+    repo.git.add(all=True)
+    repo.index.commit("Update markdown")
+
+    mock = Mock(spec=TaskBase)
+    mock.filter = ModelFilter([], ["*"])
+    mock.execute.return_value = 0
+
+    bot = ComplyScribe(
+        working_dir=repo_path,
+        branch="main",
+        commit_name="Test User",
+        commit_email="test@example.com",
+    )
+    bot.run(patterns=["*.md"], dry_run=True, pre_tasks=[mock], base_ref="base")
+    assert not mock.filter.is_skipped(markdown_dir / "changed")
+    assert mock.filter.is_skipped(markdown_dir / "unchanged")
+
+    with pytest.raises(RepoException, match="Git diff against missing failed"):
+        bot.run(patterns=["*.md"], dry_run=True, pre_tasks=[mock], base_ref="missing")
+
+
 def test_run_with_provider(tmp_repo: Tuple[str, Repo]) -> None:
     """Test bot run with mock git provider"""
     repo_path, repo = tmp_repo
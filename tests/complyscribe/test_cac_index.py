@@ -0,0 +1,311 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Test for CaC content indexes"""
+
+import os
+import pathlib
+import shutil
+from typing import Dict, List
+
+import pytest
+
+from complyscribe import cac_index
+from complyscribe.cac_index import (
+    ContentReverseIndex,
+    ExpandedRuleCache,
+    PolicyIndex,
+    RuleDirIndex,
+    VariableIndex,
+    hash_macro_files,
+    read_policy_id,
+)
+from tests.testutils import TEST_DATA_DIR
+
+
+test_content_dir = TEST_DATA_DIR / "content_dir"
+test_benchmark_root = test_content_dir / "linux_os" / "guide"
+
+
+def test_rule_dir_index(tmp_path: pathlib.Path) -> None:
+    """Test building the rule directory index from scratch"""
+    index = RuleDirIndex(str(test_benchmark_root), cache_dir=tmp_path)
+    index.refresh()
+
+    assert sorted(index.rule_ids()) == [
+        "configure_crypto_policy",
+        "file_groupownership_sshd_private_key",
+        "sshd_set_keepalive",
+    ]
+    assert index.rule_dirs["sshd_set_keepalive"] == str(
+        test_benchmark_root / "test" / "sshd_set_keepalive"
+    )
+    assert index.cache_file.exists()
+
+
+def test_rule_dir_index_incremental(tmp_path: pathlib.Path) -> None:
+    """Test that a persisted index only lists changed directories"""
+    benchmark_root = tmp_path / "guide"
+    shutil.copytree(test_benchmark_root, benchmark_root)
+    cache_dir = tmp_path / "cache"
+
+    index = RuleDirIndex(str(benchmark_root), cache_dir=cache_dir)
+    index.refresh()
+    total_dirs = index.listed_dirs
+    assert total_dirs > 1
+
+    # A fresh instance loaded from disk does not need to list anything
+    index = RuleDirIndex(str(benchmark_root), cache_dir=cache_dir)
+    index.load()
+    index.refresh()
+    assert index.listed_dirs == 0
+    assert len(index.rule_ids()) == 3
+
+    # Adding a rule only lists the changed parent and the new directory
+    new_rule = benchmark_root / "test" / "new_rule"
+    new_rule.mkdir()
+    new_rule.joinpath("rule.yml").write_text("title: New rule\n")
+    index = RuleDirIndex(str(benchmark_root), cache_dir=cache_dir)
+    index.load()
+    index.refresh()
+    assert index.listed_dirs == 2
+    assert index.rule_dirs["new_rule"] == str(new_rule)
+
+    # Removing a rule is detected as well
+    shutil.rmtree(benchmark_root / "test" / "sshd_set_keepalive")
+    index.refresh()
+    assert "sshd_set_keepalive" not in index.rule_dirs
+
+
+def _find_rule_dirs(base_dir: pathlib.Path) -> Dict[str, str]:
+    """Map rule ids to directories the way ssg.rules.find_rule_dirs walks them."""
+    rule_dirs: Dict[str, str] = dict()
+    for root, dirs, _ in os.walk(base_dir):
+        dirs.sort()
+        for dir_name in dirs:
+            dir_path = os.path.join(root, dir_name)
+            if os.path.exists(os.path.join(dir_path, "rule.yml")):
+                rule_dirs[dir_name] = dir_path
+    return rule_dirs
+
+
+def test_rule_dir_index_walk_order(tmp_path: pathlib.Path) -> None:
+    """Test that duplicate and symlinked rules resolve like find_rule_dirs"""
+    benchmark_root = tmp_path / "guide"
+    for rule_dir in ["dup", "a/dup", "a/b/dup", "a/other", "z/only"]:
+        benchmark_root.joinpath(rule_dir).mkdir(parents=True)
+        benchmark_root.joinpath(rule_dir, "rule.yml").write_text("title: Rule\n")
+    outside = tmp_path / "outside"
+    outside.joinpath("linked_rule").mkdir(parents=True)
+    outside.joinpath("linked_rule", "rule.yml").write_text("title: Rule\n")
+    outside.joinpath("group", "hidden_rule").mkdir(parents=True)
+    outside.joinpath("group", "hidden_rule", "rule.yml").write_text("title: Rule\n")
+    benchmark_root.joinpath("linked_rule").symlink_to(outside / "linked_rule")
+    benchmark_root.joinpath("linked_group").symlink_to(outside / "group")
+
+    index = RuleDirIndex(str(benchmark_root), cache_dir=tmp_path / "cache")
+    index.refresh()
+    expected = _find_rule_dirs(benchmark_root)
+    assert index.rule_dirs == expected
+    assert index.rule_dirs["dup"] == str(benchmark_root / "a" / "b" / "dup")
+    assert "linked_rule" in index.rule_dirs
+    assert "hidden_rule" not in index.rule_dirs
+
+    # The persisted index resolves them the same way
+    index = RuleDirIndex(str(benchmark_root), cache_dir=tmp_path / "cache")
+    index.load()
+    index.refresh()
+    assert index.listed_dirs == 0
+    assert index.rule_dirs == expected
+
+
+def test_rule_dir_index_shared() -> None:
+    """Test that indexes are shared per benchmark root"""
+    index = RuleDirIndex.for_root(str(test_benchmark_root))
+    assert RuleDirIndex.for_root(f"{test_benchmark_root}/.") is index
+    assert RuleDirIndex.for_root(str(test_benchmark_root)) is index
+
+
+def test_expanded_rule_cache(tmp_path: pathlib.Path) -> None:
+    """Test storing and reloading expanded rules"""
+    cache = ExpandedRuleCache(cache_dir=tmp_path)
+    assert cache.get("a") is None
+    cache.put("a", {"title": "Rule A"})
+    cache.save()
+    assert cache.cache_file.exists()
+
+    cache = ExpandedRuleCache(cache_dir=tmp_path)
+    cache.load()
+    assert cache.get("a") == {"title": "Rule A"}
+    assert cache.hits == 1
+
+    # Recent hits do not rewrite the cache, old ones record the new use
+    cache.cache_file.unlink()
+    cache.save()
+    assert not cache.cache_file.exists()
+    cache._entries["a"][0] -= ExpandedRuleCache.USE_INTERVAL
+    cache.get("a")
+    cache.save()
+    assert cache.cache_file.exists()
+
+
+def test_expanded_rule_cache_eviction(tmp_path: pathlib.Path) -> None:
+    """Test that the least recently used entries are evicted"""
+    cache = ExpandedRuleCache(cache_dir=tmp_path, max_entries=2)
+    cache.put("a", {"title": "Rule A"})
+    cache.put("b", {"title": "Rule B"})
+    cache.get("a")
+    cache.put("c", {"title": "Rule C"})
+    cache.save()
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_hash_macro_files(tmp_path: pathlib.Path) -> None:
+    """Test that the macro hash changes with the macro files"""
+    content_dir = tmp_path / "content"
+    shutil.copytree(test_content_dir / "shared", content_dir / "shared")
+    macros_hash = hash_macro_files(str(content_dir))
+    assert macros_hash == hash_macro_files(str(test_content_dir))
+
+    macro_file = content_dir / "shared" / "macros" / "test-macros.jinja"
+    macro_file.write_text(
+        macro_file.read_text() + "\n{{% macro new() %}}{{% endmacro %}}\n"
+    )
+    assert hash_macro_files(str(content_dir)) != macros_hash
+
+
+def test_variable_index() -> None:
+    """Test loading variables once per content root"""
+    index = VariableIndex.for_root(str(test_content_dir))
+    assert VariableIndex.for_root(str(test_content_dir)) is index
+    assert index.variable_ids() == {
+        "var_password_pam_minlen",
+        "var_sshd_set_keepalive",
+        "var_system_crypto_policy",
+    }
+    assert index.get_description("var_sshd_set_keepalive") == (
+        "Specify the maximum number of idle message counts before session is terminated."
+    )
+    assert index.get_options("var_sshd_set_keepalive")["default"] == 0
+    assert index.get_file("var_sshd_set_keepalive") == str(
+        test_benchmark_root / "test" / "var_sshd_set_keepalive.var"
+    )
+    assert index.get_description("var_missing") == ""
+    assert index.get_options("var_missing") == {}
+
+
+def test_read_policy_id(tmp_path: pathlib.Path) -> None:
+    """Test reading only the top-level id of a policy file"""
+    policy_file = tmp_path / "policy.yml"
+    policy_file.write_text("controls:\n  - id: control-1\nid: 'my-policy'  # comment\n")
+    assert read_policy_id(str(policy_file)) == "my-policy"
+    policy_file.write_text("id: {{{ product }}}-policy\n")
+    assert read_policy_id(str(policy_file)) is None
+    assert read_policy_id(str(tmp_path / "missing.yml")) is None
+
+
+def test_policy_index(tmp_path: pathlib.Path) -> None:
+    """Test finding policy files and reading only changed files"""
+    controls_dir = tmp_path / "controls"
+    shutil.copytree(test_content_dir / "controls", controls_dir)
+    cache_dir = tmp_path / "cache"
+
+    index = PolicyIndex(str(controls_dir), cache_dir=cache_dir)
+    # The policy is not named after its file
+    assert index.find("1234-levels") == str(controls_dir / "1234-example.yml")
+    assert index.read_files == 3
+    assert index.find("missing") is None
+    assert index.read_files == 0
+
+    # A fresh instance loaded from disk finds the policy without reading files
+    index = PolicyIndex(str(controls_dir), cache_dir=cache_dir)
+    index.load()
+    assert index.find("abcd-levels") == str(controls_dir / "abcd-levels.yml")
+    assert index.read_files == 0
+
+    # Changed ids are picked up
+    policy_file = controls_dir / "abcd-levels.yml"
+    policy_file.write_text(
+        policy_file.read_text().replace("id: abcd-levels", "id: abcd-renamed")
+    )
+    assert index.find("abcd-levels") is None
+    assert index.find("abcd-renamed") == str(policy_file)
+
+
+def test_content_reverse_index(tmp_path: pathlib.Path) -> None:
+    """Test looking up the controls and profiles using rules and variables"""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    cache_dir = tmp_path / "cache"
+
+    index = ContentReverseIndex(str(content_dir), "rhel8", cache_dir=cache_dir)
+    index.refresh()
+    assert index.built
+    assert index.get_rule_controls("configure_crypto_policy") == [
+        ("abcd-levels", "S5"),
+        ("abcd-levels", "S6"),
+        ("abcd-levels", "S7"),
+    ]
+    assert "example" in index.get_rule_profiles("sshd_set_keepalive")
+    assert "example" in index.get_variable_profiles("var_sshd_set_keepalive")
+    # Ids are matched exactly and variables are not indexed as rules
+    assert index.get_rule_controls("configure_crypto") == []
+    assert index.get_rule_controls("var_system_crypto_policy=fips") == []
+
+    # A fresh instance loaded from disk is not rebuilt
+    index = ContentReverseIndex(str(content_dir), "rhel8", cache_dir=cache_dir)
+    index.load()
+    index.refresh()
+    assert not index.built
+    assert len(index.get_rule_controls("configure_crypto_policy")) == 3
+
+    # Changed control files rebuild the index
+    policy_file = content_dir / "controls" / "abcd-levels.yml"
+    policy_file.write_text(
+        policy_file.read_text().replace(
+            "      - configure_crypto_policy\n      - var_system_crypto_policy=future",
+            "      - var_system_crypto_policy=future",
+        )
+    )
+    index.refresh()
+    assert index.built
+    assert index.get_rule_controls("configure_crypto_policy") == [
+        ("abcd-levels", "S5"),
+        ("abcd-levels", "S6"),
+    ]
+
+
+def test_content_reverse_index_for_products(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test fingerprinting the shared control files once for all products"""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    (content_dir / "products" / "rhel9" / "profiles").mkdir(parents=True)
+    fingerprinted: List[str] = list()
+
+    def fingerprint_dir(directory: str) -> str:
+        fingerprinted.append(os.path.relpath(directory, content_dir))
+        return directory
+
+    monkeypatch.setattr(cac_index, "fingerprint_dir", fingerprint_dir)
+    monkeypatch.setattr(ContentReverseIndex, "build", lambda self: None)
+    indexes = ContentReverseIndex.for_products(str(content_dir), ["rhel8", "rhel9"])
+    assert list(indexes.keys()) == ["rhel8", "rhel9"]
+    assert indexes["rhel8"] is ContentReverseIndex.for_product(
+        str(content_dir), "rhel8"
+    )
+    assert fingerprinted == [
+        "controls",
+        os.path.join("products", "rhel8", "profiles"),
+        os.path.join("products", "rhel9", "profiles"),
+    ]
+
+    # Later refreshes fingerprint the control files again
+    fingerprinted.clear()
+    indexes["rhel8"].refresh()
+    assert fingerprinted == ["controls", os.path.join("products", "rhel8", "profiles")]
@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Test for the resolved profile catalog cache"""
+
+import pathlib
+from typing import Any, Dict, List
+
+import pytest
+from trestle.common.model_utils import ModelUtils
+from trestle.core.profile_resolver import ProfileResolver
+from trestle.oscal.catalog import Catalog
+
+from complyscribe import oscal_cache
+from complyscribe.oscal_cache import ResolvedCatalogCache, _load_model_dict
+from tests.testutils import setup_for_profile
+
+
+test_prof = "simplified_nist_profile"
+
+
+def test_resolved_catalog_cache(tmp_trestle_dir: str, tmp_path: pathlib.Path) -> None:
+    """Test that resolved catalogs are reused until an imported model changes"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = setup_for_profile(trestle_root, test_prof, "")
+    profile_path = args.profile_path
+    cache_dir = tmp_path / "cache"
+    expected = ProfileResolver.get_resolved_profile_catalog(
+        trestle_root, profile_path, block_params=False, params_format="[.]"
+    )
+
+    cache = ResolvedCatalogCache(cache_dir)
+    catalog = cache.get_resolved_profile_catalog(
+        trestle_root, profile_path, block_params=False, params_format="[.]"
+    )
+    assert ModelUtils.models_are_equivalent(catalog, expected, ignore_all_uuid=True)
+    # Callers get their own copy of the cached catalog
+    catalog.metadata.title = "Modified by the caller"
+    cached = cache.get_resolved_profile_catalog(
+        trestle_root, profile_path, block_params=False, params_format="[.]"
+    )
+    assert cached is not catalog
+    assert ModelUtils.models_are_equivalent(cached, expected, ignore_all_uuid=True)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Other options are resolved separately
+    cache.get_resolved_profile_catalog(trestle_root, profile_path)
+    assert cache.misses == 2
+
+    # A new process reads the resolved catalog from disk
+    cache = ResolvedCatalogCache(cache_dir)
+    catalog = cache.get_resolved_profile_catalog(
+        trestle_root, profile_path, block_params=False, params_format="[.]"
+    )
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert ModelUtils.models_are_equivalent(catalog, expected, ignore_all_uuid=True)
+
+    # Changing the imported catalog resolves the profile again
+    catalog_path = trestle_root.joinpath(
+        "catalogs", "simplified_nist_catalog", "catalog.json"
+    )
+    imported = Catalog.oscal_read(catalog_path)
+    imported.metadata.title = "Changed catalog"
+    imported.oscal_write(catalog_path)
+    cache.get_resolved_profile_catalog(
+        trestle_root, profile_path, block_params=False, params_format="[.]"
+    )
+    assert cache.misses == 1
+    # Older catalogs of the profile are replaced
+    assert len(list(cache.catalogs_dir.glob("*.json"))) == 2
+
+
+def test_resolved_catalog_cache_keys(
+    tmp_trestle_dir: str, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the imported models are only read again when they changed"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = setup_for_profile(trestle_root, test_prof, "")
+    loaded: List[pathlib.Path] = list()
+
+    def load_model_dict(path: pathlib.Path) -> Dict[str, Any]:
+        loaded.append(path)
+        return _load_model_dict(path)
+
+    monkeypatch.setattr(oscal_cache, "_load_model_dict", load_model_dict)
+    cache = ResolvedCatalogCache(tmp_path / "cache")
+    cache.get_resolved_profile_catalog(trestle_root, args.profile_path)
+    assert len(loaded) == 2
+
+    loaded.clear()
+    cache.get_resolved_profile_catalog(trestle_root, args.profile_path)
+    assert loaded == []
+    assert cache.hits == 1
+
+    catalog_path = trestle_root.joinpath(
+        "catalogs", "simplified_nist_catalog", "catalog.json"
+    )
+    imported = Catalog.oscal_read(catalog_path)
+    imported.metadata.title = "Changed catalog"
+    imported.oscal_write(catalog_path)
+    cache.get_resolved_profile_catalog(trestle_root, args.profile_path)
+    assert len(loaded) == 2
+    assert cache.misses == 2
+
+
+def test_catalog_index_kept_with_catalog(
+    tmp_trestle_dir: str, tmp_path: pathlib.Path
+) -> None:
+    """Test that writing a resolved catalog keeps the index of the same key"""
+    trestle_root = pathlib.Path(tmp_trestle_dir)
+    args = setup_for_profile(trestle_root, test_prof, "")
+    cache = ResolvedCatalogCache(tmp_path / "cache")
+    index = cache.get_catalog_index(
+        trestle_root,
+        args.profile_path,
+        "titles",
+        lambda catalog: {"title": catalog.metadata.title},
+    )
+    (index_file,) = cache.catalogs_dir.glob("*.titles.json")
+    (catalog_file,) = set(cache.catalogs_dir.glob("*.json")) - {index_file}
+
+    # A new process resolves and writes the missing catalog again
+    catalog_file.unlink()
+    cache = ResolvedCatalogCache(tmp_path / "cache")
+    cache.get_resolved_profile_catalog(trestle_root, args.profile_path)
+    assert catalog_file.exists()
+    assert index_file.exists()
+    assert (
+        cache.get_catalog_index(
+            trestle_root, args.profile_path, "titles", lambda catalog: {}
+        )
+        == index
+    )
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Test for the incremental OSCAL JSON writer"""
+
+import logging
+import pathlib
+import tracemalloc
+from typing import Callable, Iterator, List
+
+import pytest
+from trestle.core.generators import generate_sample_model
+from trestle.oscal.common import Property
+from trestle.oscal.component import (
+    ComponentDefinition,
+    ControlImplementation,
+    DefinedComponent,
+    ImplementedRequirement,
+)
+
+from complyscribe.oscal_stream import StreamedModel, write_oscal_json
+
+
+logger = logging.getLogger(__name__)
+
+TEST_NS = "https://oscal-compass.github.io/compliance-trestle/schemas/oscal/cd"
+
+
+def _iter_props(count: int) -> Iterator[Property]:
+    for i in range(count):
+        yield Property(
+            name="Rule_Id", value=f"rule_{i}", remarks=f"rule_set_{i:05d}", ns=TEST_NS
+        )
+
+
+def _iter_implemented_requirements(
+    count: int, rules_per_control: int
+) -> Iterator[ImplementedRequirement]:
+    for i in range(count):
+        implemented_req = generate_sample_model(ImplementedRequirement)
+        implemented_req.control_id = f"ac-{i}"
+        implemented_req.description = f"Implementation of control ac-{i}"
+        implemented_req.props = list(_iter_props(rules_per_control))
+        yield implemented_req
+
+
+def _new_models() -> List[ComponentDefinition]:
+    component_definition = generate_sample_model(ComponentDefinition)
+    component_definition.components = [generate_sample_model(DefinedComponent)]
+    return [component_definition]
+
+
+def _write_in_memory(path: pathlib.Path, props: int, controls: int) -> None:
+    (component_definition,) = _new_models()
+    component = component_definition.components[0]
+    component.props = list(_iter_props(props))
+    control_implementation = generate_sample_model(ControlImplementation)
+    control_implementation.implemented_requirements = list(
+        _iter_implemented_requirements(controls, 10)
+    )
+    component.control_implementations = [control_implementation]
+    component_definition.oscal_write(path)
+
+
+def _write_streamed(path: pathlib.Path, props: int, controls: int) -> None:
+    (component_definition,) = _new_models()
+    component = component_definition.components[0]
+    write_oscal_json(
+        path,
+        StreamedModel(
+            component_definition,
+            components=[
+                StreamedModel(
+                    component,
+                    props=_iter_props(props),
+                    control_implementations=[
+                        StreamedModel(
+                            generate_sample_model(ControlImplementation),
+                            implemented_requirements=_iter_implemented_requirements(
+                                controls, 10
+                            ),
+                        )
+                    ],
+                )
+            ],
+        ),
+    )
+
+
+def test_write_oscal_json(tmp_path: pathlib.Path) -> None:
+    """Test that streamed models are written like oscal_write"""
+    component_definition = generate_sample_model(ComponentDefinition)
+    component = generate_sample_model(DefinedComponent)
+    component.props = list(_iter_props(3))
+    component.control_implementations = [generate_sample_model(ControlImplementation)]
+    component_definition.components = [component]
+    expected = tmp_path / "expected.json"
+    component_definition.oscal_write(expected)
+
+    component = component_definition.components[0]
+    control_implementation = component.control_implementations[0]
+    streamed = tmp_path / "streamed.json"
+    write_oscal_json(
+        streamed,
+        StreamedModel(
+            component_definition,
+            components=[
+                StreamedModel(
+                    component,
+                    props=(prop.dict(by_alias=True) for prop in component.props),
+                    control_implementations=[
+                        StreamedModel(
+                            control_implementation,
+                            implemented_requirements=iter(
+                                control_implementation.implemented_requirements
+                            ),
+                        )
+                    ],
+                )
+            ],
+        ),
+    )
+    assert streamed.read_bytes() == expected.read_bytes()
+
+    # Models without streamed fields and empty streams are written the same way
+    write_oscal_json(streamed, component_definition)
+    assert streamed.read_bytes() == expected.read_bytes()
+    write_oscal_json(streamed, StreamedModel(component, links=[]))
+    assert b'"links": []' in streamed.read_bytes()
+
+
+@pytest.mark.slow
+def test_write_oscal_json_memory(tmp_path: pathlib.Path) -> None:
+    """Benchmark the peak memory of writing a large component definition"""
+    peaks = dict()
+    writers: List[Callable[[pathlib.Path, int, int], None]] = [
+        _write_in_memory,
+        _write_streamed,
+    ]
+    for writer in writers:
+        path = tmp_path / f"{writer.__name__}.json"
+        tracemalloc.start()
+        writer(path, 20000, 2000)
+        _, peaks[writer.__name__] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        logger.info(
+            f"{writer.__name__}: {path.stat().st_size / 2**20:.1f} MiB written, "
+            f"peak memory {peaks[writer.__name__] / 2**20:.1f} MiB"
+        )
+    assert peaks["_write_streamed"] < peaks["_write_in_memory"] / 2
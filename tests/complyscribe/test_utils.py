@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Test for common utility functions"""
+
+import os
+import pathlib
+import shutil
+from unittest.mock import Mock, patch
+
+from complyscribe.utils import (
+    CacYamlSession,
+    ProductContext,
+    SharedInstances,
+    clear_shared_instances,
+    load_controls_manager,
+)
+from tests.testutils import TEST_DATA_DIR
+
+
+test_product = "rhel8"
+test_content_dir = TEST_DATA_DIR / "content_dir"
+
+
+def test_controls_manager_is_shared() -> None:
+    """Test that the controls manager is loaded once per product"""
+    load_count = ProductContext.controls_load_count
+
+    manager = load_controls_manager(str(test_content_dir), test_product)
+    assert load_controls_manager(str(test_content_dir), test_product) is manager
+    # A manager with all policies also serves subsets
+    assert (
+        load_controls_manager(
+            str(test_content_dir), test_product, policy_ids=["abcd-levels"]
+        )
+        is manager
+    )
+    assert ProductContext.controls_load_count == load_count + 1
+    assert sorted(manager.policies.keys()) == [
+        "1234-levels",
+        "abcd-levels",
+        "nist_ocp4",
+    ]
+
+
+def test_product_profiles_keep_file_order() -> None:
+    """Test that profiles in file order and sorted are cached separately"""
+    context = ProductContext(str(test_content_dir), test_product)
+    profiles = [Mock(profile_id="example")]
+    sorted_profiles = [Mock(profile_id="example")]
+    with patch(
+        "complyscribe.utils.get_profiles_from_products",
+        side_effect=[profiles, sorted_profiles],
+    ) as mock_get_profiles:
+        assert context.profiles is profiles
+        assert context.get_profile("example") is profiles[0]
+        assert context.get_profile("example", sort=True) is sorted_profiles[0]
+        assert context.get_profiles(sort=True) is sorted_profiles
+        assert context.get_profile("missing") is None
+    assert [call.kwargs for call in mock_get_profiles.call_args_list] == [
+        {"sorted": False},
+        {"sorted": True},
+    ]
+
+
+def test_controls_manager_subset() -> None:
+    """Test loading only the requested policies"""
+    manager = load_controls_manager(
+        str(test_content_dir), test_product, policy_ids=["abcd-levels"]
+    )
+    assert list(manager.policies.keys()) == ["abcd-levels"]
+    assert manager.get_all_controls_of_level("abcd-levels", "low")
+
+
+def test_controls_manager_subset_falls_back() -> None:
+    """Test that policies not named after their file are found by a full load"""
+    # The 1234-levels policy is stored in 1234-example.yml
+    manager = load_controls_manager(
+        str(test_content_dir), test_product, policy_ids=["1234-levels"]
+    )
+    assert sorted(manager.policies.keys()) == [
+        "1234-levels",
+        "abcd-levels",
+        "nist_ocp4",
+    ]
+
+
+def test_controls_manager_reloaded_on_change(tmp_path: pathlib.Path) -> None:
+    """Test that changed control files invalidate the shared controls manager"""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    manager = load_controls_manager(str(content_dir), test_product)
+
+    policy_file = content_dir / "controls" / "abcd-levels.yml"
+    stat = policy_file.stat()
+    os.utime(policy_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_controls_manager(str(content_dir), test_product) is not manager
+
+
+def test_cac_yaml_session(tmp_path: pathlib.Path) -> None:
+    """Test that CaC files are loaded once and only written when changed"""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    profile_file = (
+        content_dir / "products" / test_product / "profiles" / "example.profile"
+    )
+    control_file = content_dir / "controls" / "abcd-levels.yml"
+
+    session = CacYamlSession()
+    profile_data = session.load(profile_file)
+    assert session.load(profile_file) is profile_data
+    profile_data["title"] = "Updated title"
+    session.mark_dirty(profile_file)
+    profile_data["description"] = "Updated description"
+    session.mark_dirty(profile_file)
+    control_data = session.load(control_file)
+    control_data["controls"][0]["title"] = "Updated control"
+    session.mark_dirty(control_file)
+    session.flush(profile_file)
+    assert session.write_count == 1
+    assert b"Updated description" in profile_file.read_bytes()
+
+    session.flush()
+    assert (session.load_count, session.write_count) == (2, 2)
+    assert b"Updated control" in control_file.read_bytes()
+
+    # Documents without changes are not written again
+    session.mark_dirty(profile_file)
+    session.mark_dirty(control_file)
+    session.flush()
+    assert session.write_count == 2
+
+
+class _SharedExample(SharedInstances):
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.prepared = False
+
+    def _init_shared(self) -> None:
+        self.prepared = True
+
+
+def test_shared_instances() -> None:
+    """Test sharing instances per key and clearing all registries at once"""
+    example = _SharedExample._get_shared("a", "a")
+    assert example.prepared
+    assert _SharedExample._get_shared("a", "a") is example
+    assert _SharedExample._get_shared("b", "b") is not example
+
+    clear_shared_instances()
+    assert _SharedExample._get_shared("a", "a") is not example
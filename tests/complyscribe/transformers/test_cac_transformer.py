@@ -0,0 +1,173 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (c) 2025 Red Hat, Inc.
+
+"""Test for CaC content rules transformer"""
+
+import pathlib
+import shutil
+
+import pytest
+
+from complyscribe.cac_index import ExpandedRuleCache, VariableIndex
+from complyscribe.transformers.cac_transformer import (
+    RulesTransformer,
+    get_component_info,
+)
+from complyscribe.utils import ProductContext, load_controls_manager
+from tests.testutils import TEST_DATA_DIR
+
+
+test_product = "rhel8"
+test_content_dir = str(TEST_DATA_DIR / "content_dir")
+test_cac_profile = f"{test_content_dir}/products/rhel8/profiles/example.profile"
+test_rules = [
+    "configure_crypto_policy",
+    "file_groupownership_sshd_private_key",
+    "sshd_set_keepalive",
+]
+
+
+def test_product_context_is_reused() -> None:
+    """Test that the product yaml is loaded once for all product consumers"""
+    load_count = ProductContext.load_count
+
+    transformer = RulesTransformer(test_content_dir, test_product, test_cac_profile)
+    transformer.add_rules(test_rules)
+    RulesTransformer(test_content_dir, test_product, test_cac_profile)
+    assert get_component_info(test_product, test_content_dir) == (
+        "rhel8",
+        "Red Hat Enterprise Linux 8",
+    )
+    load_controls_manager(test_content_dir, test_product)
+
+    assert ProductContext.load_count == load_count + 1
+    assert sorted(transformer.get_all_rule_objs().keys()) == test_rules
+
+
+def test_product_context_passed_through() -> None:
+    """Test that an explicit product context is used as is"""
+    context = ProductContext(test_content_dir, test_product)
+    transformer = RulesTransformer(
+        test_content_dir, test_product, test_cac_profile, product_context=context
+    )
+    assert transformer.product_context is context
+    assert context.controls_dir == f"{test_content_dir}/controls"
+    assert context.benchmark_root.endswith("linux_os/guide")
+
+
+def test_add_rules_in_parallel() -> None:
+    """Test that parallel rule expansion matches serial expansion"""
+    serial = RulesTransformer(test_content_dir, test_product, test_cac_profile)
+    serial.add_rules(test_rules)
+    parallel = RulesTransformer(
+        test_content_dir, test_product, test_cac_profile, jobs=2
+    )
+    parallel.add_rules(test_rules)
+
+    serial_rules = serial.get_all_rule_objs()
+    parallel_rules = parallel.get_all_rule_objs()
+    assert list(parallel_rules.keys()) == list(serial_rules.keys())
+    for rule_id, rule_obj in parallel_rules.items():
+        assert rule_obj.description == serial_rules[rule_id].description
+        assert [p.id for p in rule_obj._parameters] == [
+            p.id for p in serial_rules[rule_id]._parameters
+        ]
+    assert parallel_rules["sshd_set_keepalive"].description == (
+        "Test Set SSH Client Alive Count Max"
+    )
+
+
+def test_add_rules_in_parallel_errors() -> None:
+    """Test that parallel rule expansion aggregates errors"""
+    transformer = RulesTransformer(
+        test_content_dir, test_product, test_cac_profile, jobs=2
+    )
+    with pytest.raises(RuntimeError, match="Could not find rule missing_rule"):
+        transformer.add_rules(["sshd_set_keepalive", "missing_rule"])
+
+
+def test_add_rules_with_cache(tmp_path: pathlib.Path) -> None:
+    """Test that expanded rules are reused from the rule cache"""
+    cache = ExpandedRuleCache(cache_dir=tmp_path)
+    transformer = RulesTransformer(
+        test_content_dir, test_product, test_cac_profile, rule_cache=cache
+    )
+    transformer.add_rules(test_rules)
+    assert cache.misses == len(test_rules)
+    assert cache.cache_file.exists()
+
+    cache = ExpandedRuleCache(cache_dir=tmp_path)
+    cache.load()
+    cached = RulesTransformer(
+        test_content_dir, test_product, test_cac_profile, rule_cache=cache
+    )
+    cached.add_rules(test_rules)
+    assert cache.hits == len(test_rules)
+    assert cache.misses == 0
+    for rule_id, rule_obj in cached.get_all_rule_objs().items():
+        expected = transformer.get_all_rule_objs()[rule_id]
+        assert rule_obj.description == expected.description
+
+
+def test_add_rules_attaches_referenced_params() -> None:
+    """Test that rules only get the profile parameters they reference"""
+    transformer = RulesTransformer(test_content_dir, test_product, test_cac_profile)
+    transformer.add_rules(test_rules)
+    rule_objs = transformer.get_all_rule_objs()
+
+    params = {
+        rule_id: [p.id for p in rule_obj._parameters]
+        for rule_id, rule_obj in rule_objs.items()
+    }
+    assert params == {
+        "configure_crypto_policy": ["var_system_crypto_policy"],
+        "file_groupownership_sshd_private_key": [],
+        "sshd_set_keepalive": ["var_sshd_set_keepalive"],
+    }
+    param = rule_objs["sshd_set_keepalive"]._parameters[0]
+    assert param.description == (
+        "Specify the maximum number of idle message counts before session is terminated."
+    )
+    assert param.options["default"] == 0
+
+
+def test_add_rules_attaches_check_variables(tmp_path: pathlib.Path) -> None:
+    """Test that rule variables come from the checks and remediations only"""
+    content_dir = tmp_path / "content_dir"
+    shutil.copytree(test_content_dir, content_dir)
+    rule_dir = content_dir / "linux_os" / "guide" / "test"
+    rule_dir = rule_dir / "file_groupownership_sshd_private_key"
+    rule_file = rule_dir / "rule.yml"
+    rule_file.write_text(
+        rule_file.read_text().replace(
+            "must be\n", "must be (see var_sshd_set_keepalive)\n"
+        )
+    )
+    profile = str(content_dir / "products" / "rhel8" / "profiles" / "example.profile")
+    cache = ExpandedRuleCache(cache_dir=tmp_path)
+    transformer = RulesTransformer(
+        str(content_dir), test_product, profile, rule_cache=cache
+    )
+    transformer.add_rules(["file_groupownership_sshd_private_key"])
+    rule_obj = transformer.get_all_rule_objs()["file_groupownership_sshd_private_key"]
+    assert rule_obj._parameters == []
+    key = transformer._rule_cache_key(rule_obj)
+
+    (rule_dir / "oval").mkdir()
+    (rule_dir / "oval" / "shared.xml").write_text(
+        '<external_variable id="var_sshd_set_keepalive" datatype="int" />\n'
+    )
+    shutil.copy(
+        rule_dir.parent / "var_sshd_set_keepalive.var",
+        rule_dir.parent / "var_new.var",
+    )
+    VariableIndex.clear_instances()
+    transformer = RulesTransformer(
+        str(content_dir), test_product, profile, rule_cache=cache
+    )
+    transformer.add_rules(["file_groupownership_sshd_private_key"])
+    rule_obj = transformer.get_all_rule_objs()["file_groupownership_sshd_private_key"]
+    assert [p.id for p in rule_obj._parameters] == ["var_sshd_set_keepalive"]
+    # Adding variables does not invalidate the cached rule
+    assert transformer._rule_cache_key(rule_obj) == key
+    assert cache.hits == 1
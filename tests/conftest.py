@@ -23,6 +23,7 @@ from complyscribe.transformers.trestle_rule import (
     Profile,
     TrestleRule,
 )
+from complyscribe.utils import clear_shared_instances
 from tests.testutils import clean, repo_setup
 
 
@@ -32,6 +33,17 @@ YieldFixture = Generator[T, None, None]
 _TEST_PREFIX = "complyscribe_tests"
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> YieldFixture[pathlib.Path]:
+    """Keep persistent complyscribe caches out of the user cache directory"""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv(const.CACHE_DIR_ENV_VAR, str(cache_dir))
+    yield cache_dir
+    clear_shared_instances()
+
+
 @pytest.fixture(scope="function")
 def tmp_repo() -> YieldFixture[Tuple[str, Repo]]:
     """Create a temporary git repository with an initialized trestle workspace root"""
@@ -0,0 +1,5 @@
+# platform = multi_platform_all
+
+{{{ bash_instantiate_variables("var_system_crypto_policy") }}}
+
+update-crypto-policies --set ${var_system_crypto_policy}